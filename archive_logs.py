@@ -0,0 +1,40 @@
+"""
+Move log_records days older than LOG_ARCHIVE_AFTER_DAYS into parquet files
+under LOG_ARCHIVE_DIR, one verified transaction per day. Meant to run daily
+from cron:
+
+    python archive_logs.py
+    python archive_logs.py --before 2025-01-01
+"""
+import asyncio
+import argparse
+from datetime import date, timedelta
+from src.core.config import settings
+from src.core.database import AsyncSessionLocal
+from src.core.dependencies import get_log_archive
+
+
+async def main(before: date, dry_run: bool):
+    archive = get_log_archive()
+    async with AsyncSessionLocal() as db:
+        days = await archive.archivable_days(before, db)
+        await db.rollback()
+
+        for log_date in days:
+            if dry_run:
+                print(f"{log_date.isoformat()}: would be archived")
+                continue
+            rows = await archive.archive_day(log_date, db)
+            print(f"{log_date.isoformat()}: {rows} row(s) archived")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--before",
+        type=date.fromisoformat,
+        default=date.today() - timedelta(days=settings.LOG_ARCHIVE_AFTER_DAYS)
+    )
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(main(args.before, args.dry_run))
@@ -0,0 +1,59 @@
+"""
+Fill log_records.geohash for rows written before the column existed:
+
+    python backfill_geohash.py --start 2025-01-01 --end 2025-01-31
+"""
+import asyncio
+import argparse
+from datetime import date, timedelta
+from sqlalchemy import select, update
+from src.core.database import AsyncSessionLocal
+from src.core.models import LogRecord
+from src.utils import geohash
+
+BATCH_SIZE = 5000
+
+
+async def backfill_day(log_date: date) -> int:
+    filled = 0
+    async with AsyncSessionLocal() as db:
+        while True:
+            result = await db.execute(
+                select(LogRecord.id, LogRecord.latitude, LogRecord.longitude)
+                .where(
+                    LogRecord.log_date == log_date,
+                    LogRecord.geohash == None,
+                    LogRecord.latitude != None,
+                    LogRecord.longitude != None
+                )
+                .limit(BATCH_SIZE)
+            )
+            rows = result.fetchall()
+            if not rows:
+                return filled
+            # ORM bulk UPDATE by primary key, one commit per batch
+            await db.execute(update(LogRecord), [
+                {
+                    "id": row_id,
+                    "log_date": log_date,
+                    "geohash": geohash.encode(latitude, longitude)
+                }
+                for row_id, latitude, longitude in rows
+            ])
+            await db.commit()
+            filled += len(rows)
+
+
+async def main(start: date, end: date):
+    current = start
+    while current <= end:
+        print(f"{current.isoformat()}: {await backfill_day(current)} row(s)")
+        current += timedelta(days=1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--start", type=date.fromisoformat, default=date.today())
+    parser.add_argument("--end", type=date.fromisoformat, default=date.today())
+    args = parser.parse_args()
+    asyncio.run(main(args.start, args.end))
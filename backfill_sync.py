@@ -0,0 +1,40 @@
+"""
+Resync internal agents' Lark Base records for a date range, e.g. after an
+outage longer than SYNC_CATCH_UP_DAYS or to repair drifted totals:
+
+    python backfill_sync.py --start 2025-01-01 --end 2025-01-31
+"""
+import asyncio
+import argparse
+from datetime import date, timedelta
+from src.core.config import settings
+from src.core.database import AsyncSessionLocal
+from src.core.dependencies import get_lark_client
+from src.services.analytics import LarkUsersAnalytics
+from src.services.synchronize import LarkSynchronizer
+
+
+async def main(start: date, end: date, exact: bool):
+    lark = get_lark_client()
+    current = start
+    while current <= end:
+        async with AsyncSessionLocal() as db:
+            synchronizer = LarkSynchronizer(
+                db=db,
+                lark=lark,
+                analytics=LarkUsersAnalytics(db),
+                exact=exact
+            )
+            # Lark writes are chunked and bounded by LARK_BASE_BATCH_SIZE/_CONCURRENCY
+            agents, synced = await synchronizer.backfill(current)
+        print(f"{current.isoformat()}: {synced}/{agents} agent(s) synced")
+        current += timedelta(days=1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--start", type=date.fromisoformat, default=date.today())
+    parser.add_argument("--end", type=date.fromisoformat, default=date.today())
+    parser.add_argument("--exact", action="store_true", default=settings.SYNC_EXACT_COUNTS)
+    args = parser.parse_args()
+    asyncio.run(main(args.start, args.end, args.exact))
@@ -2,14 +2,13 @@ import os
 import sys
 import logging
 import asyncio
-from sqlalchemy.orm import Session
 from src.core.config import settings
 from dotenv import load_dotenv
 from datetime import date, datetime
 from lark.token_manager import TokenManager
 from src.lark.lark import Lark
 from src.core.models import LarkHistoryReference
-from src.core.dependencies import get_db
+from src.core.database import AsyncSessionLocal
 from src.db.logger import (
     get_ids_without_lark_ref_for_today,
     get_references_by_target_date,
@@ -86,19 +85,17 @@ def stats_update_payload(
     stats: List[StatisticsQueryResult],
     lookup_table: dict
 ):
-    return {
-        "records": [
-            {
-                "record_id": lookup_table[stat.union_id],
-                "fields": {
-                    "Total Requests": stat.total_requests,
-                    "Positive Count": stat.positive_count,
-                    "For Confirmation Count": stat.for_confirmation_count,
-                    "Unique Scanned Count": stat.unique_scanned_plate,
-                }
-            } for stat in stats
-        ]
-    }
+    return [
+        {
+            "record_id": lookup_table[stat.union_id],
+            "fields": {
+                "Total Requests": stat.total_requests,
+                "Positive Count": stat.positive_count,
+                "For Confirmation Count": stat.for_confirmation_count,
+                "Unique Scanned Count": stat.unique_scanned_plate,
+            }
+        } for stat in stats
+    ]
     
 
 async def logs_lark_sync(
@@ -106,11 +103,11 @@ async def logs_lark_sync(
 ):
     while True:
         try:
-            db = next(get_db())
+            db = AsyncSessionLocal()
             TARGET_LOG_DATE = date.today()
             logger.info("logging at: %s", datetime.now())
 
-            union_ids = get_ids_without_lark_ref_for_today(
+            union_ids = await get_ids_without_lark_ref_for_today(
                 session=db,
                 log_date=TARGET_LOG_DATE
             )
@@ -131,8 +128,8 @@ async def logs_lark_sync(
                     data=data
                 )
 
-                if response.code == 0:
-                    for reference in response.data.records:
+                if response.records:
+                    for reference in response.records:
                         field_agent_id = reference['fields']['Field Agent'][0]['id']
                         reference = LarkHistoryReference(
                             union_id=field_agent_id,
@@ -140,9 +137,9 @@ async def logs_lark_sync(
                             lark_record_id=reference['record_id']
                         )
                         db.add(reference)
-                    db.commit()
+                    await db.commit()
 
-            references = get_references_by_target_date(
+            references = await get_references_by_target_date(
                 target_date=TARGET_LOG_DATE,
                 db=db
             )
@@ -150,7 +147,7 @@ async def logs_lark_sync(
             reference_lookup, union_ids = create_reference_map(references)
 
             if len(union_ids) > 0:
-                stats = get_stats_for_union_ids(
+                stats = await get_stats_for_union_ids(
                     union_ids=union_ids,
                     target_date=TARGET_LOG_DATE,
                     db=db
@@ -167,7 +164,7 @@ async def logs_lark_sync(
                     records=update_payload
                 )
                 logger.debug("updated %s records", len(stats))
-            db.close()
+            await db.close()
         except Exception as e:
             logger.error("Error: %s", e)
         finally:
@@ -79,8 +79,8 @@ while True:
                     data=data
                 ))
 
-                if response.code == 0:
-                    for record in response.data.records:
+                if response.records:
+                    for record in response.records:
                         lark_ref_record = LarkLogRef(
                             name=record['fields']['name'],
                             log_date=CURRENT_DATE_TO_SYNC,
@@ -125,9 +125,7 @@ while True:
                 base_manager.update_records(
                     app_token=settings.BASE_LOGS_APP_TOKEN,
                     table_id=settings.LOGS_TABLE_ID,
-                    records={
-                        "records": update_references_records
-                    }
+                    records=update_references_records
             ))
             print("Done syncing...")
     except Exception as err:
@@ -1,6 +1,8 @@
+from src.core.cold_start import cold_start
 import uvicorn
 import sentry_sdk
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
 from src.api.v1.accounts import router as accounts_router
 from src.api.v1.log_router import router as log_router
 from src.api.v1.user import router as user_router
@@ -10,9 +12,15 @@ from src.api.v4.scanner import router as scanner_v4_router
 from src.api.v3.status import router as users_status_router
 from src.api.v4.notification import router as notification_v4_router
 from src.api.v4.websocket import router as websocket_router
+from src.api.v4.metrics import router as metrics_router
+from src.api.v4.analytics import router as analytics_router
+from src.api.v4.logs import router as logs_v4_router
+from src.api.v4.heatmap import router as heatmap_router
 from src.ws.status import router as ws_status_router
-from src.core.dependencies import settings
+from src.core.dependencies import settings, lifecycle
+from src.core.lifespan import lifespan
 
+cold_start.mark("imports")
 
 # initialize sentry logging
 sentry_sdk.init(
@@ -29,7 +37,20 @@ sentry_sdk.init(
     },
 )
 
-app = FastAPI()
+cold_start.mark("sentry_init")
+
+app = FastAPI(lifespan=lifespan)
+
+
+@app.middleware("http")
+async def reject_while_draining(request: Request, call_next):
+    if not lifecycle.accepting and request.url.path != "/health/live":
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"message": "server is shutting down"},
+            headers={"Retry-After": "5", "Connection": "close"}
+        )
+    return await call_next(request)
 
 app.include_router(log_router)
 app.include_router(user_router)
@@ -41,16 +62,34 @@ app.include_router(user_v4_router)
 app.include_router(scanner_v4_router)
 app.include_router(notification_v4_router)
 app.include_router(websocket_router)
+app.include_router(metrics_router)
+app.include_router(analytics_router)
+app.include_router(logs_v4_router)
+app.include_router(heatmap_router)
 
 
 @app.get("/")
 async def healthcheck():
     return {"message": "server is running!"}
 
+
+@app.get("/health/live")
+async def liveness():
+    return {"alive": True}
+
+
+@app.get("/health/ready")
+async def readiness():
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if lifecycle.ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content=lifecycle.readiness()
+    )
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=int(settings.APP_PORT),
-        reload=True
+        reload=True,
+        timeout_graceful_shutdown=int(settings.SHUTDOWN_DRAIN_TIMEOUT_SECONDS)
     )
@@ -0,0 +1,22 @@
+"""
+Create the upcoming monthly log_records partitions and, when
+LOG_PARTITION_RETENTION_MONTHS is set, detach the expired ones that
+archive_logs.py has already emptied.
+Idempotent, meant to run daily from cron; the app also runs it on startup.
+"""
+import asyncio
+from src.core.config import settings
+from src.core.database import AsyncSessionLocal
+from src.services.partitions import maintain_partitions
+
+
+async def main():
+    async with AsyncSessionLocal() as db:
+        await maintain_partitions(
+            db,
+            months_ahead=settings.LOG_PARTITION_MONTHS_AHEAD,
+            retention_months=settings.LOG_PARTITION_RETENTION_MONTHS
+        )
+
+
+asyncio.run(main())
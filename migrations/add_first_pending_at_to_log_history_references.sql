@@ -0,0 +1,9 @@
+-- Oldest change of a reference not yet synced to Lark Base, the basis of the
+-- sync_lag_seconds metric. Pending references start from their last change.
+ALTER TABLE log_history_references ADD COLUMN first_pending_at TIMESTAMP NULL;
+
+UPDATE log_history_references
+SET first_pending_at = updated_at
+WHERE lark_record_id IS NULL
+   OR last_sync_at IS NULL
+   OR updated_at > last_sync_at;
@@ -0,0 +1,8 @@
+-- Geohash of each scan's latitude/longitude (precision 9, ~5m cells), set
+-- by the app on write. Area queries match the prefixes covering the area,
+-- varchar_pattern_ops lets those LIKE 'prefix%' filters use the index.
+-- Existing rows are filled by backfill_geohash.py.
+ALTER TABLE log_records ADD COLUMN geohash VARCHAR(12) NULL;
+
+CREATE INDEX idx_log_records_log_date_geohash
+    ON log_records (log_date, geohash varchar_pattern_ops);
@@ -0,0 +1,5 @@
+-- Unique Scanned Count moves from the exact daily_agent_plates table to a
+-- per agent/day HyperLogLog sketch. Refill the sketches afterwards with
+-- python rebuild_agent_stats.py --start <first log_date> --end <today>
+ALTER TABLE daily_agent_stats ADD COLUMN plate_sketch BYTEA NULL;
+DROP TABLE IF EXISTS daily_agent_plates;
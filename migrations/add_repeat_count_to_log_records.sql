@@ -0,0 +1,4 @@
+-- Rescans of the same plate by the same agent inside LOG_DEDUP_WINDOW_SECONDS
+-- are folded into one row: repeat_count scans, the latest at last_seen.
+ALTER TABLE log_records ADD COLUMN repeat_count INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE log_records ADD COLUMN last_seen TIMESTAMP WITH TIME ZONE NULL;
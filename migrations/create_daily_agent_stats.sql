@@ -0,0 +1,24 @@
+-- Per agent, per day counters maintained by the log writer's batch flush.
+-- agent_id is the union_id of internal agents and the username of external ones.
+CREATE TABLE IF NOT EXISTS daily_agent_stats (
+    log_date DATE NOT NULL,
+    agent_type VARCHAR NOT NULL,
+    agent_id VARCHAR NOT NULL,
+    total_requests INTEGER NOT NULL DEFAULT 0,
+    positive_count INTEGER NOT NULL DEFAULT 0,
+    for_confirmation_count INTEGER NOT NULL DEFAULT 0,
+    unique_scanned_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now(),
+    CONSTRAINT daily_agent_stats_pkey PRIMARY KEY (log_date, agent_type, agent_id)
+);
+
+-- distinct plates per agent and day, backs the exact unique_scanned_count
+CREATE TABLE IF NOT EXISTS daily_agent_plates (
+    log_date DATE NOT NULL,
+    agent_type VARCHAR NOT NULL,
+    agent_id VARCHAR NOT NULL,
+    scanned_text VARCHAR NOT NULL,
+    CONSTRAINT daily_agent_plates_pkey PRIMARY KEY (log_date, agent_type, agent_id, scanned_text)
+);
+
+-- existing history: python rebuild_agent_stats.py --start <first log_date> --end <today>
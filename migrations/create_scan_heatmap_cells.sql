@@ -0,0 +1,35 @@
+-- Hourly scan counts per geohash cell at each heatmap zoom level (geohash
+-- precision 4, 5 and 6), maintained by the log writer's batch flush.
+CREATE TABLE IF NOT EXISTS scan_heatmap_cells (
+    bucket_start TIMESTAMP WITH TIME ZONE NOT NULL,
+    zoom INTEGER NOT NULL,
+    cell VARCHAR(12) NOT NULL,
+    scans INTEGER NOT NULL DEFAULT 0,
+    positive_count INTEGER NOT NULL DEFAULT 0,
+    for_confirmation_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now(),
+    CONSTRAINT scan_heatmap_cells_pkey PRIMARY KEY (bucket_start, zoom, cell)
+);
+
+-- grid reads filter on one zoom level over a time range
+CREATE INDEX IF NOT EXISTS idx_scan_heatmap_cells_zoom_bucket
+    ON scan_heatmap_cells (zoom, bucket_start);
+
+-- existing history, once add_geohash_to_log_records.sql ran and
+-- backfill_geohash.py filled the column; run it before the writer
+-- maintaining the table is deployed, hours are UTC like the app's
+INSERT INTO scan_heatmap_cells (
+    bucket_start, zoom, cell, scans, positive_count, for_confirmation_count
+)
+SELECT
+    date_trunc('hour', log_records.timestamp AT TIME ZONE 'UTC') AT TIME ZONE 'UTC' AS bucket_start,
+    zoom,
+    left(geohash, zoom) AS cell,
+    sum(repeat_count),
+    coalesce(sum(repeat_count) FILTER (WHERE event_type = 'POSITIVE_PLATE_NOTIFICATION'), 0),
+    coalesce(sum(repeat_count) FILTER (WHERE event_type = 'FOR_CONFIRMATION_NOTIFICATION'), 0)
+FROM log_records
+CROSS JOIN (VALUES (4), (5), (6)) AS zooms(zoom)
+WHERE geohash IS NOT NULL
+GROUP BY 1, 2, 3
+ON CONFLICT (bucket_start, zoom, cell) DO NOTHING;
@@ -0,0 +1,69 @@
+-- Turn log_records into a table range-partitioned by month on log_date.
+-- A partitioned table's primary key must include the partition key, so the
+-- key becomes (id, log_date); inserts use ON CONFLICT (id, log_date).
+-- Run during a quiet window: the copy holds an exclusive lock on log_records.
+-- Further partitions are created ahead of time by maintain_partitions.py.
+BEGIN;
+
+LOCK TABLE log_records IN ACCESS EXCLUSIVE MODE;
+
+ALTER TABLE log_records RENAME TO log_records_legacy;
+ALTER TABLE log_records_legacy RENAME CONSTRAINT log_records_pkey TO log_records_legacy_pkey;
+ALTER TABLE log_records_legacy DROP CONSTRAINT IF EXISTS log_records_id_key;
+ALTER INDEX IF EXISTS idx_log_records_username RENAME TO idx_log_records_legacy_username;
+
+CREATE TABLE log_records (
+    id UUID NOT NULL,
+    scanned_text VARCHAR NULL,
+    latitude DOUBLE PRECISION NULL,
+    longitude DOUBLE PRECISION NULL,
+    union_id VARCHAR NULL,
+    username VARCHAR(64) NULL,
+    event_type VARCHAR NOT NULL,
+    detection_type VARCHAR(64) NULL,
+    log_date DATE NOT NULL DEFAULT CURRENT_DATE,
+    timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT log_records_pkey PRIMARY KEY (id, log_date)
+) PARTITION BY RANGE (log_date);
+
+-- catches rows outside every monthly partition, should stay empty
+CREATE TABLE log_records_default PARTITION OF log_records DEFAULT;
+
+-- one partition per month from the oldest row up to three months ahead
+DO $$
+DECLARE
+    month_start DATE;
+BEGIN
+    FOR month_start IN
+        SELECT generate_series(
+            date_trunc('month', COALESCE((SELECT min(log_date) FROM log_records_legacy), CURRENT_DATE)),
+            date_trunc('month', CURRENT_DATE) + INTERVAL '3 months',
+            INTERVAL '1 month'
+        )::date
+    LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF log_records FOR VALUES FROM (%L) TO (%L)',
+            'log_records_' || to_char(month_start, '"y"YYYY"m"MM'),
+            month_start,
+            (month_start + INTERVAL '1 month')::date
+        );
+    END LOOP;
+END $$;
+
+-- the synchronizer and analytics always filter on a day plus an agent
+CREATE INDEX idx_log_records_log_date_union_id ON log_records (log_date, union_id);
+CREATE INDEX idx_log_records_log_date_username ON log_records (log_date, username);
+
+INSERT INTO log_records (
+    id, scanned_text, latitude, longitude, union_id, username,
+    event_type, detection_type, log_date, timestamp
+)
+SELECT
+    id, scanned_text, latitude, longitude, union_id, username,
+    event_type, detection_type, log_date, timestamp
+FROM log_records_legacy;
+
+COMMIT;
+
+-- once the row counts are verified:
+-- DROP TABLE log_records_legacy;
@@ -0,0 +1,36 @@
+"""
+Recompute daily_agent_stats from raw log_records for a date range, e.g. to
+backfill after the migration or to repair drift:
+
+    python rebuild_agent_stats.py --start 2025-01-01 --end 2025-01-31
+"""
+import asyncio
+import argparse
+from datetime import date, timedelta
+from src.core.database import AsyncSessionLocal
+from src.core.dependencies import get_log_archive
+from src.db.agent_stats import rebuild_daily_agent_stats
+
+
+async def main(start: date, end: date):
+    archive = get_log_archive()
+    current = start
+    while current <= end:
+        if archive.has_day(current):
+            # its raw rows left log_records, a rebuild would wipe its stats
+            print(f"{current.isoformat()}: archived, skipped")
+            current += timedelta(days=1)
+            continue
+        # one day per transaction keeps the lock on daily_agent_stats short
+        async with AsyncSessionLocal() as db:
+            rows = await rebuild_daily_agent_stats(current, current, db)
+        print(f"{current.isoformat()}: {rows} agent(s)")
+        current += timedelta(days=1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--start", type=date.fromisoformat, default=date.today())
+    parser.add_argument("--end", type=date.fromisoformat, default=date.today())
+    args = parser.parse_args()
+    asyncio.run(main(args.start, args.end))
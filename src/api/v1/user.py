@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
-from src.core.dependencies import get_token_manager, get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.core.dependencies import get_token_manager, get_async_db, GetIdentityCache
 from src.lark.token_manager import TokenManager, UserInformationDataResponse
 from src.db.user import find_lark_account, create_lark_account
 from src.core.dtos import LarkAccountDTO
@@ -22,8 +22,9 @@ class GetUserResponse(BaseModel):
 @router.get('/user', response_model=GetUserResponse)
 async def get_user(
     code: str,
+    identity_cache: GetIdentityCache,
     token_manager: TokenManager = Depends(get_token_manager),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
         user_access_token = (
@@ -32,7 +33,7 @@ async def get_user(
 
         user_information = (await token_manager.get_user_information(user_access_token)).data
 
-        lark_account = find_lark_account(
+        lark_account = await find_lark_account(
             union_id=user_information.union_id,
             db=db
         )
@@ -44,11 +45,13 @@ async def get_user(
                 name=user_information.name
             )
 
-            lark_account = create_lark_account(
+            lark_account = await create_lark_account(
                 account_dto=lark_account_dto,
                 db=db
             )
 
+        identity_cache.invalidate("internal", lark_account.union_id)
+
         return {
             "message": "success", 
             "data": user_information
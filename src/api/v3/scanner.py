@@ -1,4 +1,3 @@
-import os
 from fastapi import (
     APIRouter,
     Depends,
@@ -6,14 +5,14 @@ from fastapi import (
     UploadFile,
     File,
     status,
-    HTTPException,
-    BackgroundTasks
+    HTTPException
 )
 from src.core.dependencies import (
     get_account_status, 
-    get_db, 
+    get_async_db, 
     LarkNotificationDepends, 
-    GetLoggerSession
+    GetLoggerSession,
+    GetLifecycle
 )
 
 from src.core.account_status import AccountStatus
@@ -21,11 +20,11 @@ from pydantic import BaseModel
 from typing import Literal, List
 from src.core.dtos import Account, Detection
 from src.utils.file_utils import store_file
-from src.lark.token_manager import TokenManager
 from src.utils.plate_helper import normalize_plate
 from src.utils.rate_limiter import RateLimiter
 from src.db.user import find_lark_account
-from sqlalchemy.orm import Session
+from src.core.principal import Principal
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.core.dependencies import settings
 
 
@@ -34,11 +33,6 @@ router = APIRouter(
     tags=['Scanner 3.0']
 )
 
-token_manager = TokenManager(
-    app_id=os.getenv('CHOPPER_APP_ID', ""),
-    app_secret=os.getenv('CHOPPER_APP_SECRET', "")
-)
-
 rate_limiter = RateLimiter()
 
 class LicensePlateCheckResponse(BaseModel):
@@ -65,9 +59,9 @@ async def plate_check(
     form: CheckPlateRequest,
     logger: GetLoggerSession,
     account_status: AccountStatus = Depends(get_account_status),
-    session: Session = Depends(get_db),
+    session: AsyncSession = Depends(get_async_db),
 ):
-    lark_account = find_lark_account(
+    lark_account = await find_lark_account(
         union_id=form.union_id,
         db=session
     )
@@ -81,8 +75,8 @@ async def plate_check(
     plate_number = normalize_plate(form.plate)
 
     await logger.request(
+        principal=Principal.from_lark_account(lark_account),
         plate_no=plate_number,
-        user_id=form.union_id,
         location=(form.latitude, form.longitude),
         event_type='PLATE_CHECKING',
         detection_type='plates'
@@ -117,7 +111,7 @@ async def plate_check(
 
 @router.post('/notify/group-chat')
 async def notify_group_chat(
-    background_tasks: BackgroundTasks,
+    lifecycle: GetLifecycle,
     lark_notification: LarkNotificationDepends,
     logger: GetLoggerSession,
     plate: str = Form(...),
@@ -126,9 +120,9 @@ async def notify_group_chat(
     latitude: float = Form(...),
     longitude: float = Form(...),
     account_status: AccountStatus = Depends(get_account_status),
-    session: Session = Depends(get_db)
+    session: AsyncSession = Depends(get_async_db)
 ):
-    lark_account = find_lark_account(
+    lark_account = await find_lark_account(
         union_id=union_id,
         db=session
     )
@@ -150,8 +144,8 @@ async def notify_group_chat(
     if account := account_status.get_account_info_by_plate(plate):
         file_path = store_file(image)
         await logger.request(
+            principal=Principal.from_lark_account(lark_account),
             plate_no=plate,
-            user_id=lark_account.union_id,
             location=(latitude, longitude),
             event_type='POSITIVE_PLATE_NOTIFICATION',
             detection_type='plates'
@@ -167,10 +161,12 @@ async def notify_group_chat(
             longitude=longitude,
             detected_by=lark_account.name
         )
-        background_tasks.add_task(
-            lark_notification.detection_notify,
-            data=detection,
-            group_chat_id=settings.MAIN_GC_ID
+        lifecycle.spawn(
+            lark_notification.detection_notify(
+                data=detection,
+                group_chat_id=settings.MAIN_GC_ID
+            ),
+            name="detection_notify"
         )
         return ScannerResponse.model_validate({
             "message": "queued notification sent", 
@@ -180,8 +176,8 @@ async def notify_group_chat(
     elif similar_accounts := account_status.get_similar_accounts_by_plate(plate):
         file_path = store_file(image)
         await logger.request(
+            principal=Principal.from_lark_account(lark_account),
             plate_no=plate,
-            user_id=lark_account.union_id,
             location=(latitude, longitude),
             event_type='FOR_CONFIRMATION_NOTIFICATION',
             detection_type='plates'
@@ -197,10 +193,12 @@ async def notify_group_chat(
             longitude=longitude,
             detected_by=lark_account.name
         )
-        background_tasks.add_task(
-            lark_notification.detection_notify,
-            data=detection,
-            group_chat_id=settings.MAIN_GC_ID
+        lifecycle.spawn(
+            lark_notification.detection_notify(
+                data=detection,
+                group_chat_id=settings.MAIN_GC_ID
+            ),
+            name="detection_notify"
         )
         return ScannerResponse.model_validate({
             "message": "queued notification sent", 
@@ -0,0 +1,58 @@
+from datetime import date
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, status
+from pydantic import BaseModel
+from src.core.dependencies import (
+    GetAsyncDatabaseSession,
+    GetPrincipal
+)
+from src.core.dtos import TokenUserType
+from src.db.agent_stats import count_distinct_plates, get_plate_sketch
+
+
+router = APIRouter(
+    prefix='/api/v4',
+    tags=['Analytics']
+)
+
+
+class UniquePlatesResponse(BaseModel):
+    start: date
+    end: date
+    agent_type: Optional[TokenUserType]
+    agent_ids: Optional[List[str]]
+    unique_plate_count: int
+    exact: bool
+
+
+@router.get('/analytics/unique-plates')
+async def get_unique_plates(
+    db: GetAsyncDatabaseSession,
+    _: GetPrincipal,
+    start: date = Query(description="First day of the range"),
+    end: Optional[date] = Query(None, description="Last day of the range, defaults to start"),
+    agent_type: Optional[TokenUserType] = Query(None),
+    agent_ids: Optional[List[str]] = Query(None, description="Agents to count together, every agent when omitted"),
+    exact: bool = Query(False, description="Count from the raw logs instead of the sketches")
+) -> UniquePlatesResponse:
+    end = end or start
+    if end < start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end must not be before start"
+        )
+
+    if exact:
+        unique_plate_count = await count_distinct_plates(start, end, db, agent_type, agent_ids)
+    else:
+        sketch = await get_plate_sketch(start, end, db, agent_type, agent_ids)
+        unique_plate_count = sketch.count()
+
+    return UniquePlatesResponse(
+        start=start,
+        end=end,
+        agent_type=agent_type,
+        agent_ids=agent_ids,
+        unique_plate_count=unique_plate_count,
+        exact=exact
+    )
@@ -1,12 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import time
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from pydantic import BaseModel
 from typing import Literal
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.db.user import find_external_user, find_lark_account, create_lark_account
-from src.core.dependencies import GetDatabaseSession, get_db, GetCurrentUserCredentials, GetLarkClient
-from src.core.auth import verify_password, create_access_token, TokenUser
+from src.core.dependencies import GetAsyncDatabaseSession, get_async_db, GetCurrentUserCredentials, GetLarkClient, GetIdentityCache, GetLoginThrottle
+from src.core.auth import verify_password_async, create_access_token, TokenUser
+from src.core.metrics import metrics
 from src.core.dtos import LarkAccountDTO
-from src.core.models import User, LarkAccount
 from src.lark.token_manager import UserInformationDataResponse
 
 
@@ -68,47 +69,69 @@ class GetUserInformation(BaseModel):
 @router.post('/auth', response_model=TokenResponse)
 async def login_user(
     request: LoginRequest,
-    db: GetDatabaseSession
+    http_request: Request,
+    db: GetAsyncDatabaseSession,
+    throttle: GetLoginThrottle
 ):
-    if request.username == "" or request.password == "":
-        return TokenResponse(
-            status='error',
-            msg='The credentials you provide is invalid.'
-        )
-        
-    user = find_external_user(db=db, username=request.username)
+    started = time.perf_counter()
+    outcome = "invalid"
+    client_ip = http_request.client.host if http_request.client else None
 
-    if not user:
-        return TokenResponse(
-            status='error',
-            msg='The credentials you provide is invalid.'
-        )
+    try:
+        if request.username == "" or request.password == "":
+            return TokenResponse(
+                status='error',
+                msg='The credentials you provide is invalid.'
+            )
 
-    if verify_password(
-        request.password,
-        user.hashed_password
-    ):
-        token_user = TokenUser(
-            user_id=user.username,
-            user_type='external'
-        )
-        token = await create_access_token(token_user)
-        return TokenResponse(
-            status='success',
-            msg='Successfully create a bearer token.',
-            data=TokenData(
-                access_token=token,
-                token_type="bearer"
+        retry_after = throttle.retry_after(request.username, client_ip)
+        if retry_after > 0:
+            outcome = "throttled"
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many failed login attempts, try again later.",
+                headers={"Retry-After": str(int(retry_after) + 1)}
             )
+
+        user = await find_external_user(db=db, username=request.username)
+
+        if user and await verify_password_async(
+            request.password,
+            user.hashed_password
+        ):
+            throttle.reset(request.username)
+            outcome = "success"
+            token_user = TokenUser(
+                user_id=user.username,
+                user_type='external'
+            )
+            token = await create_access_token(token_user)
+            return TokenResponse(
+                status='success',
+                msg='Successfully create a bearer token.',
+                data=TokenData(
+                    access_token=token,
+                    token_type="bearer"
+                )
+            )
+
+        throttle.record_failure(request.username, client_ip)
+        return TokenResponse(status='error', msg='The credentials you provide is invalid.')
+    finally:
+        metrics.observe(
+            "login_latency_ms",
+            (time.perf_counter() - started) * 1000,
+            outcome=outcome
         )
-    return TokenResponse(status='error', msg='The credentials you provide is invalid.')
+        metrics.increment("login_attempts_total", outcome=outcome)
 
 
 @router.get('/lark/user', response_model=LarkTokenResponse)
 async def get_lark_user(
     code: str,
     client: GetLarkClient,
-    db: Session = Depends(get_db)
+    identity_cache: GetIdentityCache,
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
         user_access_token = (
@@ -119,7 +142,7 @@ async def get_lark_user(
             await client.token.get_user_information(user_access_token)
         ).data
 
-        lark_account = find_lark_account(
+        lark_account = await find_lark_account(
             union_id=user_information.union_id,
             db=db
         )
@@ -131,11 +154,14 @@ async def get_lark_user(
                 name=user_information.name
             )
 
-            lark_account = create_lark_account(
+            lark_account = await create_lark_account(
                 account_dto=lark_account_dto,
                 db=db
             )
-        
+
+        # a fresh OAuth login is our signal that the account may have changed
+        identity_cache.invalidate("internal", lark_account.union_id)
+
         token = await create_access_token(
             data=TokenUser(
                 user_id=lark_account.union_id,
@@ -157,11 +183,8 @@ async def get_lark_user(
 
 @router.get("/user", response_model=GetUserInformation)
 async def get_user_information(credentials: GetCurrentUserCredentials):
-    user, _ = credentials
-    if isinstance(user, LarkAccount):
-        return GetUserInformation(name=user.name)
-    elif isinstance(user, User):
-        return GetUserInformation(name=user.username)
+    principal, _ = credentials
+    return GetUserInformation(name=principal.name)
 
         
     
\ No newline at end of file
@@ -0,0 +1,83 @@
+import json
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from cachetools import TTLCache
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from src.core.config import settings
+from src.core.dependencies import GetAsyncDatabaseSession, GetPrincipal
+from src.db.heatmap import HEATMAP_ZOOMS, get_heatmap_cells, hour_bucket
+
+
+router = APIRouter(
+    prefix='/api/v4',
+    tags=['Heatmap']
+)
+
+# (zoom, start, end, bbox) -> (etag, body)
+heatmap_cache: TTLCache = TTLCache(maxsize=256, ttl=settings.HEATMAP_CACHE_TTL_SECONDS)
+
+
+@router.get('/heatmap')
+async def get_heatmap(
+    request: Request,
+    _: GetPrincipal,
+    db: GetAsyncDatabaseSession,
+    zoom: int = Query(5, description=f"Geohash precision, one of {HEATMAP_ZOOMS}"),
+    start: Optional[datetime] = Query(None, description="Defaults to 24 hours before end"),
+    end: Optional[datetime] = Query(None, description="Defaults to now"),
+    min_latitude: Optional[float] = Query(None, ge=-90, le=90),
+    min_longitude: Optional[float] = Query(None, ge=-180, le=180),
+    max_latitude: Optional[float] = Query(None, ge=-90, le=90),
+    max_longitude: Optional[float] = Query(None, ge=-180, le=180)
+):
+    if zoom not in HEATMAP_ZOOMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"zoom must be one of {HEATMAP_ZOOMS}"
+        )
+
+    # whole hours, so requests within the same hour share a cache entry
+    end = hour_bucket(end or datetime.now(timezone.utc)) + timedelta(hours=1)
+    start = hour_bucket(start or end - timedelta(hours=24))
+    if not start < end or end - start > timedelta(hours=settings.HEATMAP_MAX_RANGE_HOURS):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"the range must be positive and at most {settings.HEATMAP_MAX_RANGE_HOURS} hours"
+        )
+
+    corners = (min_latitude, min_longitude, max_latitude, max_longitude)
+    if any(corner is None for corner in corners) and any(corner is not None for corner in corners):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="a bounding box needs all four corners"
+        )
+    if min_latitude is not None and (min_latitude > max_latitude or min_longitude > max_longitude):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="the minimum corner must be south-west of the maximum corner"
+        )
+    bbox = corners if min_latitude is not None else None
+
+    key = (zoom, start, end, bbox)
+    cached = heatmap_cache.get(key)
+    if cached is None:
+        cells = await get_heatmap_cells(zoom, start, end, db, bbox=bbox)
+        body = json.dumps({
+            "zoom": zoom,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "columns": ["cell", "scans", "positive_count", "for_confirmation_count"],
+            "cells": cells
+        }, separators=(",", ":")).encode("utf-8")
+        cached = (f'"{hashlib.sha1(body).hexdigest()}"', body)
+        heatmap_cache[key] = cached
+
+    etag, body = cached
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={int(settings.HEATMAP_CACHE_TTL_SECONDS)}"
+    }
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
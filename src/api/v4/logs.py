@@ -0,0 +1,203 @@
+import asyncio
+from datetime import date, datetime
+from typing import List, Optional
+from uuid import UUID
+from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ConfigDict
+from src.core.config import settings
+from src.core.dependencies import GetAsyncDatabaseSession, GetLogArchive, GetPrincipal
+from src.core.dtos import DetectedType, TokenUserType
+from src.db.locations import find_log_records_in_bbox, find_log_records_near
+from src.services.archive import query_archive
+from src.services.exports import (
+    ExportFormat,
+    encode_export,
+    log_records_query,
+    parquet_available,
+    stream_log_records
+)
+
+
+router = APIRouter(
+    prefix='/api/v4',
+    tags=['Logs 4.0']
+)
+
+
+class LocatedLogRecord(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    log_date: date
+    timestamp: datetime
+    last_seen: Optional[datetime]
+    union_id: Optional[str]
+    username: Optional[str]
+    scanned_text: Optional[str]
+    event_type: str
+    detection_type: Optional[str]
+    repeat_count: int
+    latitude: float
+    longitude: float
+    geohash: Optional[str]
+
+
+def _area_filters(
+    start: date,
+    end: Optional[date],
+    event_types: Optional[List[str]],
+    positive_only: bool
+):
+    end = end or start
+    if end < start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end must not be before start"
+        )
+    if positive_only:
+        event_types = [DetectedType.POSITIVE_PLATE_NOTIFICATION.value]
+    return end, event_types
+
+
+@router.get('/logs/export')
+async def export_log_records(
+    _: GetPrincipal,
+    start: date = Query(description="First day of the range"),
+    end: Optional[date] = Query(None, description="Last day of the range, defaults to start"),
+    export_format: ExportFormat = Query(ExportFormat.CSV, alias="format"),
+    agent_type: Optional[TokenUserType] = Query(None),
+    agent_ids: Optional[List[str]] = Query(None, description="union_ids and/or usernames"),
+    event_types: Optional[List[str]] = Query(None),
+    gzip: bool = Query(False, description="gzip csv/ndjson, gzip pages for parquet")
+):
+    end = end or start
+    if end < start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end must not be before start"
+        )
+    if export_format == ExportFormat.PARQUET and not parquet_available():
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="parquet exports need pyarrow installed"
+        )
+
+    query = log_records_query(start, end, agent_type, agent_ids, event_types)
+    body = encode_export(
+        stream_log_records(query, chunk_size=settings.LOG_EXPORT_CHUNK_SIZE),
+        export_format,
+        gzip=gzip
+    )
+
+    filename = f"{start.isoformat()}_{end.isoformat()}-log-records.{export_format.value}"
+    media_type = export_format.media_type
+    if gzip and export_format != ExportFormat.PARQUET:
+        filename += ".gz"
+        media_type = "application/gzip"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+
+@router.get('/logs/archive')
+async def search_log_archive(
+    _: GetPrincipal,
+    archive: GetLogArchive,
+    start: date = Query(description="First archived day to scan"),
+    end: Optional[date] = Query(None, description="Last archived day to scan, defaults to start"),
+    plate: Optional[str] = Query(None),
+    agent_id: Optional[str] = Query(None, description="union_id or username"),
+    event_type: Optional[str] = Query(None),
+    limit: int = Query(1000, ge=1, le=10000)
+):
+    end = end or start
+    if end < start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end must not be before start"
+        )
+
+    # polars scans block, keep them off the event loop
+    records = await asyncio.to_thread(
+        query_archive,
+        archive,
+        start,
+        end,
+        plate=plate,
+        agent_id=agent_id,
+        event_type=event_type,
+        limit=limit
+    )
+    return {"records": records}
+
+
+@router.get('/logs/nearby')
+async def find_scans_nearby(
+    _: GetPrincipal,
+    db: GetAsyncDatabaseSession,
+    latitude: float = Query(ge=-90, le=90),
+    longitude: float = Query(ge=-180, le=180),
+    radius: float = Query(500, gt=0, le=50000, description="Meters"),
+    start: date = Query(description="First day of the range"),
+    end: Optional[date] = Query(None, description="Last day of the range, defaults to start"),
+    plate: Optional[str] = Query(None),
+    event_types: Optional[List[str]] = Query(None),
+    positive_only: bool = Query(False),
+    since: Optional[datetime] = Query(None),
+    until: Optional[datetime] = Query(None),
+    limit: int = Query(1000, ge=1, le=10000)
+) -> List[LocatedLogRecord]:
+    end, event_types = _area_filters(start, end, event_types, positive_only)
+    return await find_log_records_near(
+        latitude,
+        longitude,
+        radius,
+        start,
+        end,
+        db,
+        plate=plate,
+        event_types=event_types,
+        since=since,
+        until=until,
+        limit=limit
+    )
+
+
+@router.get('/logs/within')
+async def find_scans_within(
+    _: GetPrincipal,
+    db: GetAsyncDatabaseSession,
+    min_latitude: float = Query(ge=-90, le=90),
+    min_longitude: float = Query(ge=-180, le=180),
+    max_latitude: float = Query(ge=-90, le=90),
+    max_longitude: float = Query(ge=-180, le=180),
+    start: date = Query(description="First day of the range"),
+    end: Optional[date] = Query(None, description="Last day of the range, defaults to start"),
+    plate: Optional[str] = Query(None),
+    event_types: Optional[List[str]] = Query(None),
+    positive_only: bool = Query(False),
+    since: Optional[datetime] = Query(None),
+    until: Optional[datetime] = Query(None),
+    limit: int = Query(1000, ge=1, le=10000)
+) -> List[LocatedLogRecord]:
+    if min_latitude > max_latitude or min_longitude > max_longitude:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="the minimum corner must be south-west of the maximum corner"
+        )
+    end, event_types = _area_filters(start, end, event_types, positive_only)
+    return await find_log_records_in_bbox(
+        (min_latitude, min_longitude, max_latitude, max_longitude),
+        start,
+        end,
+        db,
+        plate=plate,
+        event_types=event_types,
+        since=since,
+        until=until,
+        limit=limit
+    )
@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+from src.core.metrics import metrics
+
+
+router = APIRouter(
+    prefix='/api/v4',
+    tags=['Metrics']
+)
+
+
+@router.get('/metrics')
+async def get_metrics():
+    return metrics.snapshot()
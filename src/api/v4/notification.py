@@ -1,6 +1,5 @@
 from fastapi import (
     APIRouter,
-    BackgroundTasks,
     Depends,
     Form,
     File,
@@ -9,7 +8,8 @@ from fastapi import (
 from src.core.dependencies import (
     LarkNotificationDepends,
     GetLoggerSession,
-    GetCurrentUserCredentials,
+    GetPrincipal,
+    GetLifecycle,
     AccountStatus,
     get_account_status
 )
@@ -20,7 +20,6 @@ from src.core.dtos import (
     AlertNotifyGroupChat
 )
 from src.core.config import settings
-from src.core.models import LarkAccount, User
 from src.utils.plate_helper import normalize_plate
 from src.utils.rate_limiter import RateLimiter
 from src.utils.file_utils import store_file
@@ -35,10 +34,10 @@ rate_limiter = RateLimiter(80)
 
 @router.post('/notify/group-chat')
 async def notify_group_chat(
-    background_tasks: BackgroundTasks,
+    lifecycle: GetLifecycle,
     lark_notification: LarkNotificationDepends,
     logger: GetLoggerSession,
-    credentials: GetCurrentUserCredentials,
+    principal: GetPrincipal,
     plate: str = Form(...),
     image: UploadFile = File(...),
     detection_type: str = Form(...),
@@ -46,8 +45,6 @@ async def notify_group_chat(
     longitude: float = Form(...),
     account_status: AccountStatus = Depends(get_account_status)
 ):
-    user, user_id = credentials
-
     plate = normalize_plate(plate)
     
     if not rate_limiter.can_proceed(plate):
@@ -59,8 +56,8 @@ async def notify_group_chat(
     if account := account_status.get_account_info_by_plate(plate):
         file_path = store_file(image)
         await logger.request(
+            principal=principal,
             plate_no=plate,
-            user_id=user_id,
             detection_type=detection_type,
             event_type=EventType.POSITIVE_PLATE_NOTIFICATION.value,
             location=[latitude, longitude]
@@ -71,19 +68,18 @@ async def notify_group_chat(
             file_path=file_path,
             accounts=[account],
             status='POSITIVE',
-            union_id=user.union_id if isinstance(user, LarkAccount) else None,
-            user_id=user.user_id if isinstance(user, LarkAccount) else user.username,
             latitude=latitude,
             longitude=longitude,
-            detected_by=user.name if isinstance(user, LarkAccount) else user.username,
             detected_type=detection_type,
-            user_type="internal" if isinstance(user, LarkAccount) else "external"
+            **principal.detection_identity()
         )
 
-        background_tasks.add_task(
-            lark_notification.detection_notify,
-            data=detection,
-            group_chat_id=settings.POSITIVE_GC_ID
+        lifecycle.spawn(
+            lark_notification.detection_notify(
+                data=detection,
+                group_chat_id=settings.POSITIVE_GC_ID
+            ),
+            name="detection_notify"
         )
       
         return ScannerResponse.model_validate({
@@ -94,8 +90,8 @@ async def notify_group_chat(
     elif similar_accounts := account_status.get_similar_accounts_by_plate(plate):
         file_path = store_file(image)
         await logger.request(
+            principal=principal,
             plate_no=plate,
-            user_id=user_id,
             detection_type=detection_type,
             event_type=EventType.FOR_CONFIRMATION_NOTIFICATION.value,
             location=[latitude, longitude]
@@ -106,19 +102,18 @@ async def notify_group_chat(
             file_path=file_path,
             accounts=similar_accounts,
             status='FOR_CONFIRMATION',
-            union_id=user.union_id if isinstance(user, LarkAccount) else None,
-            user_id=user.user_id if isinstance(user, LarkAccount) else user.username,
             latitude=latitude,
             longitude=longitude,
-            detected_by=user.name if isinstance(user, LarkAccount) else user.username,
             detected_type=detection_type,
-            user_type='internal' if isinstance(user, LarkAccount) else "external"
+            **principal.detection_identity()
         )
             
-        background_tasks.add_task(
-            lark_notification.detection_notify,
-            data=detection,
-            group_chat_id=settings.FOR_CONFIRMATION_GC_ID
+        lifecycle.spawn(
+            lark_notification.detection_notify(
+                data=detection,
+                group_chat_id=settings.FOR_CONFIRMATION_GC_ID
+            ),
+            name="detection_notify"
         )
         return ScannerResponse.model_validate({
             "message": "queued notification sent", 
@@ -128,11 +123,11 @@ async def notify_group_chat(
 
 @router.post("/notify/group-chat/manual")
 async def alert_group_chat_manual_search(
-    credentials: GetCurrentUserCredentials,
+    principal: GetPrincipal,
     form: AlertNotifyGroupChat,
     logger: GetLoggerSession,
     lark_notification: LarkNotificationDepends,
-    background_tasks: BackgroundTasks,
+    lifecycle: GetLifecycle,
     account_status: AccountStatus = Depends(get_account_status)
 ):
     if not rate_limiter.can_proceed(form.plate):
@@ -141,11 +136,9 @@ async def alert_group_chat_manual_search(
             "type": "skipped"
         })
 
-    user, user_id = credentials
-
     await logger.request(
+        principal=principal,
         plate_no=form.plate,
-        user_id=user_id,
         detection_type=form.detected_type,
         event_type=EventType.POSITIVE_PLATE_NOTIFICATION.value,
         location=form.location
@@ -157,19 +150,19 @@ async def alert_group_chat_manual_search(
         data=Detection(
             plate_number=form.plate,
             status='POSITIVE',
-            user_id=user.user_id,
             latitude=form.location[0],
             longitude=form.location[1],
-            detected_by=user.name if isinstance(user, LarkAccount) else user.username,
             detected_type=form.detected_type,
             accounts=[accounts],
-            user_type='internal' if isinstance(user, LarkAccount) else 'external'
+            **principal.detection_identity()
         )
 
-        background_tasks.add_task(
-            lark_notification.manual_search_notify,
-            data=data,
-            group_chat_id=settings.POSITIVE_GC_ID
+        lifecycle.spawn(
+            lark_notification.manual_search_notify(
+                data=data,
+                group_chat_id=settings.POSITIVE_GC_ID
+            ),
+            name="manual_search_notify"
         )
     except Exception as err:
         print("notification err:", err)
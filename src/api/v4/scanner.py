@@ -16,7 +16,7 @@ from src.core.dependencies import (
     AccountStatus,
     get_account_status,
     GetLoggerSession,
-    GetCurrentUserCredentials,
+    GetPrincipal,
     LarkNotificationDepends,
 )
 from src.utils.file_utils import store_file
@@ -90,10 +90,9 @@ def convert_account_to_dto(account: Account) -> AccountDTO:
 async def plate_checking(
     body: PlateCheckingRequest,
     logger: GetLoggerSession,
-    credentials: GetCurrentUserCredentials,
+    principal: GetPrincipal,
     account_status: AccountStatus = Depends(get_account_status)
 ):
-    _, user_id = credentials
     plate = normalize_plate(body.plate)
     detected_type = body.detected_type
     (lat, lon) = body.location
@@ -131,11 +130,11 @@ async def plate_checking(
         )
 
     await logger.request(
+        principal=principal,
         detection_type=response.detected_type,
         event_type=EventType.PLATE_CHECKING.value,
         plate_no=response.plate,
-        location=response.location,
-        user_id=user_id
+        location=response.location
     )
 
     return response
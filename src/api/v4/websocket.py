@@ -4,7 +4,7 @@ import asyncio
 from src.core.config import settings
 from fastapi import APIRouter, WebSocketDisconnect, WebSocket
 from src.db.user import find_lark_account
-from src.core.dependencies import GetDatabaseSession, GetTrackingDeviceManager
+from src.core.dependencies import GetAsyncDatabaseSession, GetTrackingDeviceManager
 from src.core.device_tracking_manager import DeviceTrackingData
 
 
@@ -29,7 +29,7 @@ async def get_active_devices(
 @router.websocket('/ping')
 async def device_tracking_connection(
     websocket: WebSocket,
-    db: GetDatabaseSession,
+    db: GetAsyncDatabaseSession,
     tracking_device_manager: GetTrackingDeviceManager
 ):
     try:
@@ -66,7 +66,7 @@ async def device_tracking_connection(
             )
         elif user_type == 'internal':
             location = decoded_data.get('location')
-            account = find_lark_account(db, user_id)
+            account = await find_lark_account(db, user_id)
             current_data = DeviceTrackingData(
                 name=account.name,
                 location=[location[0], location[1]]
@@ -1,9 +1,11 @@
 import jwt
-from src.db.user import find_lark_account, find_external_user
+import asyncio
+import hashlib
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import TTLCache
 from pydantic import BaseModel
 from src.core.config import settings
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
 from datetime import timedelta, datetime, timezone
 from src.core.dtos import TokenUserType
 
@@ -24,15 +26,59 @@ class TokenUser(BaseModel):
     user_type: TokenUserType
 
 
-password_ctx = CryptContext(schemes=['bcrypt'], deprecated="auto")
+@lru_cache
+def get_password_context():
+    # passlib is only needed once someone logs in
+    from passlib.context import CryptContext
+    return CryptContext(schemes=['bcrypt'], deprecated="auto")
+
+# bcrypt is CPU bound, keep it off the event loop on a bounded pool
+password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-verify"
+)
+
+verified_passwords = TTLCache(
+    maxsize=1024,
+    ttl=settings.PASSWORD_VERIFY_CACHE_TTL_SECONDS
+)
 
 
 def verify_password(plain_pwd: str, hashed_pwd: str):
-    return password_ctx.verify(plain_pwd, hashed_pwd)
+    return get_password_context().verify(plain_pwd, hashed_pwd)
+
+
+def _verification_key(plain_pwd: str, hashed_pwd: str) -> str:
+    # the stored hash is salted per user, so this never equals a plain sha256 of the password
+    return hashlib.sha256(f"{hashed_pwd}\0{plain_pwd}".encode("utf-8")).hexdigest()
+
+
+async def verify_password_async(plain_pwd: str, hashed_pwd: str) -> bool:
+    """
+    Verify on `password_executor`, skipping bcrypt entirely for a pair that
+    was verified successfully within the last few seconds (client retries).
+    """
+    key = _verification_key(plain_pwd, hashed_pwd)
+
+    if key in verified_passwords:
+        return True
+
+    loop = asyncio.get_running_loop()
+    is_valid = await loop.run_in_executor(
+        password_executor,
+        verify_password,
+        plain_pwd,
+        hashed_pwd
+    )
+
+    if is_valid:
+        verified_passwords[key] = True
+
+    return is_valid
 
 
 def get_password_hash(pwd: str):
-    return password_ctx.hash(pwd)
+    return get_password_context().hash(pwd)
 
 
 async def create_access_token(
@@ -48,14 +94,3 @@ async def create_access_token(
         algorithm=settings.JWT_ALGORITHM
     )
 
-
-def get_user_type(
-    db: Session,
-    user_id: str
-):
-    if find_external_user(db, user_id):
-        return "external"
-    elif find_lark_account(db, user_id):
-        return "internal"
-    else:
-        return None
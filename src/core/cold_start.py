@@ -0,0 +1,40 @@
+import os
+import time
+import psutil
+from typing import Dict
+from src.core.metrics import metrics
+
+# import this module first in main.py so the import phase is measured from here
+IMPORT_STARTED = time.perf_counter()
+
+
+class ColdStartTimer:
+    """
+    Wall time of each cold-start phase (imports, warm-up) plus the total since
+    the process was spawned, published as `cold_start_seconds` gauges.
+    """
+    def __init__(self, started: float = IMPORT_STARTED):
+        self._last = started
+        self.phases: Dict[str, float] = {}
+
+    def mark(self, phase: str) -> float:
+        now = time.perf_counter()
+        elapsed = now - self._last
+        self._last = now
+        self.phases[phase] = elapsed
+        metrics.set_gauge("cold_start_seconds", elapsed, phase=phase)
+        return elapsed
+
+    def since_process_start(self) -> float:
+        """
+        Seconds since the OS created this process, interpreter boot included.
+        """
+        elapsed = time.time() - psutil.Process(os.getpid()).create_time()
+        metrics.set_gauge("cold_start_seconds", elapsed, phase="total")
+        return elapsed
+
+    def snapshot(self) -> dict:
+        return {"phases": self.phases}
+
+
+cold_start = ColdStartTimer()
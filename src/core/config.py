@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 
@@ -8,6 +9,26 @@ class Settings(BaseSettings):
     CHOPPER_APP_ID: str
     CHOPPER_APP_SECRET: str
     BASE_LOGS_APP_TOKEN: str
+    LARK_TOKEN_REFRESH_MARGIN_SECONDS: int = 300
+    # optional file so restarts/sibling workers reuse still valid Lark tokens
+    LARK_TOKEN_CACHE_PATH: Optional[str] = None
+    # shared outbound http pool for every Lark subsystem
+    LARK_HTTP_TIMEOUT_SECONDS: float = 10.0
+    LARK_HTTP_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    LARK_HTTP_MAX_CONNECTIONS: int = 100
+    LARK_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    LARK_HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 60.0
+    LARK_HTTP2: bool = False
+    # records per Lark Base batch call (Lark's limit is 500) and chunks in flight at once
+    LARK_BASE_BATCH_SIZE: int = 500
+    LARK_BASE_BATCH_CONCURRENCY: int = 2
+    # retries with jittered exponential backoff on transient Lark failures
+    LARK_RETRY_ATTEMPTS: int = 4
+    LARK_BACKOFF_BASE_SECONDS: float = 0.5
+    LARK_BACKOFF_MAX_SECONDS: float = 10.0
+    # consecutive failures before an endpoint fails fast, and for how long
+    LARK_CIRCUIT_FAILURE_THRESHOLD: int = 5
+    LARK_CIRCUIT_RESET_SECONDS: float = 30.0
     MAIN_GC_ID: str
     LOGS_TABLE_ID: str
     NOTIFY_WEB_APP_URL: str
@@ -31,6 +52,77 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 480
     JWT_ALGORITHM: str = 'HS256'
 
+    # Identity cache
+    IDENTITY_CACHE_MAX_SIZE: int = 10000
+    IDENTITY_CACHE_TTL_SECONDS: int = 300
+    TOKEN_CACHE_TTL_SECONDS: int = 60
+
+    # Login
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_VERIFY_CACHE_TTL_SECONDS: int = 60
+    LOGIN_MAX_FAILURES_PER_USERNAME: int = 5
+    # per client IP as uvicorn sees it; behind a proxy that is the proxy itself
+    # unless FORWARDED_ALLOW_IPS trusts it, so this is opt-in
+    LOGIN_MAX_FAILURES_PER_IP: Optional[int] = None
+    LOGIN_THROTTLE_WINDOW_SECONDS: int = 300
+
+    # Lifespan
+    DB_POOL_WARM_CONNECTIONS: int = 10
+    # how long shutdown waits for in-flight notifications and sync runs
+    SHUTDOWN_DRAIN_TIMEOUT_SECONDS: float = 20.0
+    # process spawn -> ready; restarts and autoscaled pods should stay under it
+    COLD_START_TARGET_SECONDS: float = 5.0
+
+    # Batched log writer
+    LOG_WRITER_BATCH_SIZE: int = 500
+    LOG_WRITER_FLUSH_INTERVAL_MS: int = 200
+    LOG_WRITER_QUEUE_SIZE: int = 10000
+    LOG_WRITER_ENQUEUE_TIMEOUT_SECONDS: float = 2.0
+    # a flush slower than this is spooled locally and the DB skipped for a while
+    LOG_WRITER_FLUSH_TIMEOUT_MS: int = 2000
+    LOG_WRITER_DB_COOLDOWN_SECONDS: float = 10.0
+    LOG_SPOOL_DIR: str = "spool/log_records"
+    LOG_SPOOL_SEGMENT_MAX_BYTES: int = 8 * 1024 * 1024
+    LOG_SPOOL_REPLAY_INTERVAL_SECONDS: float = 5.0
+    # rescans of one plate by one agent closer than this are counted on one row, off when unset
+    LOG_DEDUP_WINDOW_SECONDS: Optional[float] = None
+
+    # log_records partitions
+    LOG_PARTITION_MONTHS_AHEAD: int = 3
+    # detach monthly partitions older than this once archived, never when unset
+    LOG_PARTITION_RETENTION_MONTHS: Optional[int] = None
+
+    # Log exports
+    # rows fetched per server-side cursor round trip and written per output chunk
+    LOG_EXPORT_CHUNK_SIZE: int = 5000
+
+    # Log archive
+    LOG_ARCHIVE_DIR: str = "archive/log_records"
+    # days older than this are moved out of log_records by archive_logs.py
+    LOG_ARCHIVE_AFTER_DAYS: int = 60
+
+    # Lark Base synchronizer
+    # run the synchronizer inside the API process, woken by the log writer
+    SYNC_EMBEDDED: bool = False
+    # how long a burst of changes is collected before one sync pass
+    SYNC_DEBOUNCE_SECONDS: float = 2.0
+    # sync totals recounted from log_records (exact unique plates) instead of daily_agent_stats
+    SYNC_EXACT_COUNTS: bool = False
+    # unsynced references older than this are left to backfill_sync.py
+    SYNC_CATCH_UP_DAYS: int = 31
+    # the woken synchronizer also looks for changes logged by the other replicas
+    # this often; unset it only with a single replica, to run no idle queries
+    SYNC_CATCH_UP_INTERVAL_SECONDS: Optional[float] = 300.0
+    # Postgres advisory lock held by the one synchronizer allowed to run
+    SYNC_LEADER_LOCK_KEY: int = 4107001
+    # how often a standby synchronizer tries to take over
+    SYNC_LEADER_RETRY_SECONDS: float = 5.0
+
+    # Heatmap
+    # grid payloads are reused for this long before the rollup is read again
+    HEATMAP_CACHE_TTL_SECONDS: float = 15.0
+    HEATMAP_MAX_RANGE_HOURS: int = 24 * 31
+
     # Sentry
     SENTRY_DSN: str
 
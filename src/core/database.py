@@ -1,6 +1,8 @@
 import os
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from dotenv import load_dotenv
 from src.core.config import settings
 
@@ -8,6 +10,19 @@ load_dotenv()
 
 MAX_POOL_SIZE = 100
 
+
+def to_async_database_url(database_url: str) -> str:
+    """
+    Rewrite a libpq style url (postgresql://, postgres://, postgresql+psycopg2://)
+    to the asyncpg driver used by the async engine.
+    """
+    scheme, separator, rest = database_url.partition("://")
+    if scheme in ("postgres", "postgresql") or scheme.startswith("postgresql+"):
+        return f"postgresql+asyncpg{separator}{rest}"
+    return database_url
+
+
+# synchronous engine, kept for standalone scripts and the legacy `logs` exports
 engine = create_engine(
     settings.DATABASE_URL,
     pool_size=MAX_POOL_SIZE,        # Adjust based on active queries
@@ -19,3 +34,24 @@ engine = create_engine(
 SessionLocal = sessionmaker(
     bind=engine
 )
+
+# asyncio engine used by every request handler
+async_engine = create_async_engine(
+    to_async_database_url(settings.DATABASE_URL),
+    pool_size=MAX_POOL_SIZE,
+    max_overflow=50,
+    pool_timeout=30,
+    pool_recycle=1800,
+)
+
+# unpooled, for session level advisory locks that must end with their connection
+lock_engine = create_async_engine(
+    to_async_database_url(settings.DATABASE_URL),
+    poolclass=NullPool
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    # rows are read after commit (e.g. cached principals), never lazy load them
+    expire_on_commit=False
+)
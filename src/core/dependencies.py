@@ -1,68 +1,169 @@
 import jwt
+from functools import lru_cache
 from sentry_sdk import set_user
 from src.core.status_manager import StatusManager
 from src.lark.token_manager import TokenManager
 from src.core.logger import Logger
+from src.core.log_writer import LogWriter
+from src.core.log_spool import LogSpool
 from src.lark.lark import Lark
+from src.lark.http_client import LarkHttpClient
+from src.lark.policy import OutboundPolicy
 from src.core.account_status import AccountStatus
-from src.core.database import SessionLocal
-from src.core.models import LarkAccount, User
+from src.core.lifecycle import AppLifecycle
+from src.core.sync_signal import SyncSignal
+from src.core.leader import LeaderElection
+from src.core.database import SessionLocal, AsyncSessionLocal, lock_engine
 from .websocket_manager import WebsocketManager
 from src.core.config import settings
 from src.core.lark_notification import LarkNotification
 from sqlalchemy.orm import Session
-from typing import Annotated, Tuple, Union
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Annotated, Tuple
 from fastapi import Depends, status, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from src.core.dtos import TokenUserType
 from src.db.user import find_external_user, find_lark_account
 from src.services.synchronize import LarkSynchronizer
 from src.services.analytics import LarkUsersAnalytics
+from src.services.archive import LogArchive
 from src.core.device_tracking_manager import DeviceTrackingManager
+from src.core.identity_cache import IdentityCache, identity_cache
+from src.core.principal import Principal
+from src.utils.rate_limiter import LoginThrottle
 
 
-print("loaded environment settings.", settings)
+websocket_manager = WebsocketManager()
 
-lark = Lark(
-    settings.CHOPPER_APP_ID,
-    settings.CHOPPER_APP_SECRET
-)
+lifecycle = AppLifecycle()
 
-websocket_manager = WebsocketManager()
+# the account index is loaded once by the lifespan warm-up (or lazily on first use)
+account_status: AccountStatus | None = None
 
-lark_notification = LarkNotification(lark=lark)
+@lru_cache
+def get_lark_client() -> Lark:
+    # built on first use rather than at import time
+    return Lark(
+        settings.CHOPPER_APP_ID,
+        settings.CHOPPER_APP_SECRET,
+        token_refresh_margin=settings.LARK_TOKEN_REFRESH_MARGIN_SECONDS,
+        token_cache_path=settings.LARK_TOKEN_CACHE_PATH,
+        http=LarkHttpClient(
+            timeout=settings.LARK_HTTP_TIMEOUT_SECONDS,
+            connect_timeout=settings.LARK_HTTP_CONNECT_TIMEOUT_SECONDS,
+            max_connections=settings.LARK_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LARK_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.LARK_HTTP_KEEPALIVE_EXPIRY_SECONDS,
+            http2=settings.LARK_HTTP2,
+            policy=OutboundPolicy(
+                max_attempts=settings.LARK_RETRY_ATTEMPTS,
+                backoff_base=settings.LARK_BACKOFF_BASE_SECONDS,
+                backoff_max=settings.LARK_BACKOFF_MAX_SECONDS,
+                failure_threshold=settings.LARK_CIRCUIT_FAILURE_THRESHOLD,
+                reset_timeout=settings.LARK_CIRCUIT_RESET_SECONDS
+            )
+        ),
+        base_batch_size=settings.LARK_BASE_BATCH_SIZE,
+        base_batch_concurrency=settings.LARK_BASE_BATCH_CONCURRENCY
+    )
 
-def get_token_manager():
-    return TokenManager(settings.CHOPPER_APP_ID, settings.CHOPPER_APP_SECRET)
+def get_token_manager() -> TokenManager:
+    # share the facade's manager so its token cache survives across requests
+    return get_lark_client().token
 
 def get_base_manager() -> Lark:
-    return lark
+    return get_lark_client()
 
+@lru_cache
 def get_lark_notification() -> LarkNotification:
-    return lark_notification
+    return LarkNotification(lark=get_lark_client())
 
-def get_lark_client() -> Lark:
-    return lark
+@lru_cache
+def get_log_archive() -> LogArchive:
+    return LogArchive(
+        directory=settings.LOG_ARCHIVE_DIR,
+        chunk_size=settings.LOG_EXPORT_CHUNK_SIZE
+    )
+
+def get_lifecycle() -> AppLifecycle:
+    return lifecycle
 
 def get_websocket_manager() -> WebsocketManager:
     return websocket_manager
 
-def get_account_status() -> AccountStatus:
-    return AccountStatus(
+def get_identity_cache() -> IdentityCache:
+    return identity_cache
+
+login_throttle = LoginThrottle(
+    max_failures_per_username=settings.LOGIN_MAX_FAILURES_PER_USERNAME,
+    max_failures_per_ip=settings.LOGIN_MAX_FAILURES_PER_IP,
+    window=settings.LOGIN_THROTTLE_WINDOW_SECONDS
+)
+
+def get_login_throttle() -> LoginThrottle:
+    return login_throttle
+
+def load_account_status() -> AccountStatus:
+    global account_status
+    account_status = AccountStatus(
         path=settings.ENDORSEMENT_FILE_PATH
     )
+    return account_status
+
+def get_account_status() -> AccountStatus:
+    if account_status is None:
+        return load_account_status()
+    return account_status
 
 def get_db():
+    # synchronous session, only for code that must stay blocking
     db = SessionLocal()
 
     try:
         yield db
     finally:
         db.close()
-        
-    
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# the log writer publishes changed references, the embedded synchronizer waits on them
+sync_signal = SyncSignal()
+
+# only the replica holding the lease syncs, embedded or standalone
+sync_leader = LeaderElection(
+    engine=lock_engine,
+    name="lark_synchronizer",
+    lock_key=settings.SYNC_LEADER_LOCK_KEY,
+    retry_interval=settings.SYNC_LEADER_RETRY_SECONDS,
+    check_interval=settings.SYNC_LEADER_RETRY_SECONDS
+)
+
+log_writer = LogWriter(
+    session_factory=AsyncSessionLocal,
+    max_batch_size=settings.LOG_WRITER_BATCH_SIZE,
+    flush_interval_ms=settings.LOG_WRITER_FLUSH_INTERVAL_MS,
+    max_queue_size=settings.LOG_WRITER_QUEUE_SIZE,
+    enqueue_timeout=settings.LOG_WRITER_ENQUEUE_TIMEOUT_SECONDS,
+    flush_timeout_ms=settings.LOG_WRITER_FLUSH_TIMEOUT_MS,
+    spool=LogSpool(
+        directory=settings.LOG_SPOOL_DIR,
+        segment_max_bytes=settings.LOG_SPOOL_SEGMENT_MAX_BYTES
+    ),
+    db_cooldown=settings.LOG_WRITER_DB_COOLDOWN_SECONDS,
+    replay_interval=settings.LOG_SPOOL_REPLAY_INTERVAL_SECONDS,
+    dedup_window=settings.LOG_DEDUP_WINDOW_SECONDS,
+    sync_signal=sync_signal
+)
+
+def get_log_writer() -> LogWriter:
+    return log_writer
+
 status_manager = StatusManager(
-    db=next(get_db())
+    session_factory=AsyncSessionLocal
 )
 
 def get_status_manager() -> StatusManager:
@@ -81,68 +182,97 @@ GetBearerTokenFromHeaders = Annotated[HTTPAuthorizationCredentials, Depends(get_
 GetStatusManager = Annotated[StatusManager, Depends(get_status_manager)]
 LarkNotificationDepends = Annotated[LarkNotification, Depends(get_lark_notification)]
 GetDatabaseSession = Annotated[Session, Depends(get_db)]
+GetAsyncDatabaseSession = Annotated[AsyncSession, Depends(get_async_db)]
 GetLarkClient = Annotated[Lark, Depends(get_lark_client)]
 GetTrackingDeviceManager = Annotated[DeviceTrackingManager, Depends(get_tracking_device_manager)]
+GetIdentityCache = Annotated[IdentityCache, Depends(get_identity_cache)]
+GetLoginThrottle = Annotated[LoginThrottle, Depends(get_login_throttle)]
+GetLifecycle = Annotated[AppLifecycle, Depends(get_lifecycle)]
+GetLogWriter = Annotated[LogWriter, Depends(get_log_writer)]
+GetLogArchive = Annotated[LogArchive, Depends(get_log_archive)]
 
 
 def get_synchronizer(
-    db: GetDatabaseSession,
+    db: GetAsyncDatabaseSession,
     lark: GetLarkClient,
 ):
     return LarkSynchronizer(
         db=db,
         lark=lark,
-        analytics=LarkUsersAnalytics(db)
+        analytics=LarkUsersAnalytics(db),
+        exact=settings.SYNC_EXACT_COUNTS,
+        catch_up_days=settings.SYNC_CATCH_UP_DAYS
     )
 
 
 def get_logger(
-    db: GetDatabaseSession,
-    synchronizer: LarkSynchronizer = Depends(get_synchronizer)
+    writer: GetLogWriter
 ) -> Logger:
-    return Logger(db, synchronizer)
+    return Logger(writer)
 
 GetLoggerSession = Annotated[Logger, Depends(get_logger)]
 
 async def get_current_user(
-    db: GetDatabaseSession,
-    token: GetBearerTokenFromHeaders
-) -> Tuple[Union[LarkAccount | User | None], str]:
+    db: GetAsyncDatabaseSession,
+    token: GetBearerTokenFromHeaders,
+    cache: GetIdentityCache
+) -> Tuple[Principal, str]:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate":"Bearer"}
     )
-    try:
-        payload = jwt.decode(
-            token,
-            settings.JWT_SECRET_KEY,
-            algorithms=[settings.JWT_ALGORITHM]
-        )
-        user_type: TokenUserType = payload.get('user_type')
-        user_id = payload.get('user_id')
-    except jwt.exceptions.InvalidTokenError:
-        raise credentials_exception
-
-    if user_type == 'internal':
-        user = find_lark_account(
-            union_id=user_id,
-            db=db
-        )
-        set_user({
-            "id": user_id,
-            "username": user.name
-        })
-    elif user_type == 'external':
-        user = find_external_user(
-            db=db,
-            username=user_id
-        )
-        set_user({
-            "id": user.username,
-            "username": user.username
-        })
-
-    return user, user_id
+    payload = cache.get_token_payload(token)
+
+    if payload is None:
+        try:
+            payload = jwt.decode(
+                token,
+                settings.JWT_SECRET_KEY,
+                algorithms=[settings.JWT_ALGORITHM]
+            )
+        except jwt.exceptions.InvalidTokenError:
+            raise credentials_exception
+        cache.set_token_payload(token, payload)
+
+    user_type: TokenUserType = payload.get('user_type')
+    user_id = payload.get('user_id')
+
+    principal = cache.get_principal(user_type, user_id)
+
+    if principal is None:
+        if user_type == 'internal':
+            user = await find_lark_account(
+                union_id=user_id,
+                db=db
+            )
+        elif user_type == 'external':
+            user = await find_external_user(
+                db=db,
+                username=user_id
+            )
+        else:
+            raise credentials_exception
+
+        if user is None:
+            raise credentials_exception
+
+        # an immutable copy, the row stays with this request's session
+        principal = Principal.from_user(user)
+        cache.set_principal(user_type, user_id, principal)
+
+    set_user({
+        "id": principal.user_id,
+        "username": principal.name
+    })
+
+    return principal, user_id
  
-GetCurrentUserCredentials = Annotated[Tuple[Union[LarkAccount | User | None], str], Depends(get_current_user)]
+GetCurrentUserCredentials = Annotated[Tuple[Principal, str], Depends(get_current_user)]
+
+
+def get_principal(credentials: GetCurrentUserCredentials) -> Principal:
+    principal, _ = credentials
+    return principal
+
+GetPrincipal = Annotated[Principal, Depends(get_principal)]
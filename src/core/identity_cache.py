@@ -0,0 +1,87 @@
+import time
+from cachetools import TTLCache
+from typing import Optional, Tuple
+from src.core.config import settings
+from src.core.dtos import TokenUserType
+from src.core.principal import Principal
+
+
+class IdentityCache:
+    """
+    Bounded TTL cache of the principals resolved by `get_current_user`,
+    keyed by the token subject, plus a short-lived cache of verified token
+    payloads so that a cache hit needs neither a JWT decode nor a DB query.
+
+    Entries are immutable `Principal` values, never ORM rows, so they are
+    safe to share across requests. Writes to users or accounts invalidate
+    their entry (see `src.db.user`); other workers see the change once
+    their own entry expires.
+    """
+    def __init__(
+        self,
+        maxsize: int = 10000,
+        ttl: int = 300,
+        token_ttl: int = 60
+    ):
+        self._principals: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._token_payloads: TTLCache = TTLCache(maxsize=maxsize, ttl=token_ttl)
+
+    def _key(
+        self,
+        user_type: TokenUserType,
+        user_id: str
+    ) -> Tuple[str, str]:
+        return (user_type, user_id)
+
+    def get_principal(
+        self,
+        user_type: TokenUserType,
+        user_id: str
+    ) -> Optional[Principal]:
+        return self._principals.get(self._key(user_type, user_id))
+
+    def set_principal(
+        self,
+        user_type: TokenUserType,
+        user_id: str,
+        principal: Principal
+    ):
+        self._principals[self._key(user_type, user_id)] = principal
+
+    def invalidate(
+        self,
+        user_type: TokenUserType,
+        user_id: str
+    ):
+        """
+        Drop the cached principal, e.g. after the underlying account row changed.
+        """
+        self._principals.pop(self._key(user_type, user_id), None)
+
+    def get_token_payload(self, token: str) -> Optional[dict]:
+        payload = self._token_payloads.get(token)
+
+        if payload is None:
+            return None
+
+        # never serve a payload past the token's own expiry
+        expires_at = payload.get('exp')
+        if expires_at is not None and expires_at <= time.time():
+            self._token_payloads.pop(token, None)
+            return None
+
+        return payload
+
+    def set_token_payload(self, token: str, payload: dict):
+        self._token_payloads[token] = payload
+
+    def clear(self):
+        self._principals.clear()
+        self._token_payloads.clear()
+
+
+identity_cache = IdentityCache(
+    maxsize=settings.IDENTITY_CACHE_MAX_SIZE,
+    ttl=settings.IDENTITY_CACHE_TTL_SECONDS,
+    token_ttl=settings.TOKEN_CACHE_TTL_SECONDS
+)
@@ -8,12 +8,30 @@ from src.lark.messenger import SendMessagePayload
 from src.core.dtos import Detection
 from src.notifications import manual_search_message_builder, detection_message_builder
 from src.core.config import settings
+from src.core.metrics import metrics
+from src.lark.exceptions import LarkBaseHTTPException
+from src.utils.loggers import logging
 from more_itertools import chunked
 from cachetools import TTLCache
 
+logger = logging.getLogger(__name__)
 
 cache = TTLCache(maxsize=100, ttl=1800)
 
+
+def _log_failure(kind: str, group_chat_id: str, err: Exception):
+    # retries already happened in the Lark client, this notification is lost
+    if isinstance(err, LarkBaseHTTPException):
+        code, retryable = err.code, err.retryable
+    else:
+        code, retryable = None, isinstance(err, httpx.TransportError)
+    metrics.increment("lark_notification_failures_total", kind=kind, code=code)
+    logger.error(
+        "%s notification to %s failed (code %s, %s): %r",
+        kind, group_chat_id, code, "retryable" if retryable else "permanent", err
+    )
+
+
 class LarkNotification:
     def __init__(
         self,
@@ -39,8 +57,9 @@ class LarkNotification:
             message_response = await self._client.messenger.send_message(send_message_obj)
             try:
                 await self._notify_web_app(data)
-            except Exception:
-                pass
+            except Exception as err:
+                metrics.increment("web_app_notification_failures_total")
+                logger.warning("Web app notification failed: %r", err)
             # if data.status == "POSITIVE":
             #     for members_id_chunk in members_id_chunks:
             #         await self._client.messenger.buzz_message(
@@ -48,7 +67,7 @@ class LarkNotification:
             #             group_members_union_id=members_id_chunk
             #         )
         except Exception as err:
-            print(f"NotifyError: {str(err)}")
+            _log_failure("manual_search", group_chat_id, err)
             
 
     async def detection_notify(
@@ -79,8 +98,9 @@ class LarkNotification:
             )
             try:
                 await self._notify_web_app(data)
-            except Exception:
-                pass
+            except Exception as err:
+                metrics.increment("web_app_notification_failures_total")
+                logger.warning("Web app notification failed: %r", err)
             # if data.status == "POSITIVE":
             #     for members_id_chunk in members_id_chunks:
             #         await self._client.messenger.buzz_message(
@@ -88,7 +108,7 @@ class LarkNotification:
             #             group_members_union_id=members_id_chunk
             #         )
         except Exception as err:
-            print(f"NotifyError: {str(err)}")
+            _log_failure("detection", group_chat_id, err)
 
     async def _notify_web_app(
         self,
@@ -115,11 +135,10 @@ class LarkNotification:
                 image_data = base64.b64encode(await file.read()).decode('utf-8')
                 _data['image'] = image_data
 
-        async with httpx.AsyncClient() as client:
-            await client.post(
-                url=settings.NOTIFY_WEB_APP_URL,
-                json=_data
-            )
+        await self._client.http.client.post(
+            url=settings.NOTIFY_WEB_APP_URL,
+            json=_data
+        )
             
     async def _get_gc_members_id(self, group_chat_id: str) -> list[str]:
         if group_chat_id in cache:
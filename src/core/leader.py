@@ -0,0 +1,121 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Optional
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from src.core.metrics import metrics
+from src.utils.loggers import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderElection:
+    """
+    At most one holder of `lock_key` across every process sharing the
+    database, via a session level Postgres advisory lock.
+
+    The lock lives as long as the connection that took it, so a leader that
+    crashes, is killed or loses its network releases it without any expiry
+    to wait for, and the next candidate takes over on its following try.
+    `engine` should not pool connections (NullPool): a connection handed
+    back to a pool would keep holding the lock.
+    Candidates that do not hold the lock only retry every `retry_interval`
+    seconds and otherwise stay idle.
+    """
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        name: str,
+        lock_key: int,
+        retry_interval: float = 5.0,
+        check_interval: float = 5.0
+    ):
+        self.engine = engine
+        self.name = name
+        self.lock_key = lock_key
+        self.retry_interval = retry_interval
+        # how often the leader checks its connection, i.e. that it still holds the lock
+        self.check_interval = check_interval
+        self.leader_since: Optional[float] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self.leader_since is not None
+
+    @property
+    def lease_age(self) -> Optional[float]:
+        if self.leader_since is None:
+            return None
+        return time.monotonic() - self.leader_since
+
+    async def run(self, work: Callable[[], Awaitable[None]]):
+        """
+        Run `work` whenever this process holds the lock, forever. `work` is
+        cancelled as soon as the lock may have been lost, and started again
+        once it is held again.
+        """
+        self._report()
+        while True:
+            try:
+                await self._lead(work)
+            except asyncio.CancelledError:
+                raise
+            except Exception as err:
+                logger.warning("Leadership of %s lost: %r", self.name, err)
+            finally:
+                self._step_down()
+            await asyncio.sleep(self.retry_interval)
+
+    async def _lead(self, work: Callable[[], Awaitable[None]]):
+        # autocommit: a lease held for days must not keep a transaction open
+        async with self.engine.connect() as connection:
+            connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+            acquired = await connection.scalar(select(func.pg_try_advisory_lock(self.lock_key)))
+            if not acquired:
+                return
+
+            self.leader_since = time.monotonic()
+            metrics.increment("leader_elections_total", lease=self.name)
+            logger.info("Became leader of %s", self.name)
+            self._report()
+
+            task = asyncio.create_task(work(), name=self.name)
+            try:
+                while True:
+                    done, _ = await asyncio.wait({task}, timeout=self.check_interval)
+                    if done:
+                        # surfaces the error, a clean return just releases the lease
+                        await task
+                        return
+                    # a dead or hung connection means the lock is gone, or soon
+                    # will be: better no leader for a while than two of them
+                    await asyncio.wait_for(connection.scalar(select(1)), timeout=self.check_interval)
+                    self._report()
+            finally:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                await self._release(connection)
+
+    async def _release(self, connection: AsyncConnection):
+        released = False
+        try:
+            if not connection.closed:
+                released = await asyncio.wait_for(
+                    connection.scalar(select(func.pg_advisory_unlock(self.lock_key))),
+                    timeout=self.check_interval
+                )
+        except Exception as err:
+            logger.warning("Could not release the %s lock: %r", self.name, err)
+        if not released and not connection.invalidated:
+            # dropping the connection is the only sure way to drop the lock
+            await connection.invalidate()
+
+    def _step_down(self):
+        if self.leader_since is not None:
+            logger.info("Stepped down as leader of %s after %.0fs", self.name, self.lease_age)
+        self.leader_since = None
+        self._report()
+
+    def _report(self):
+        metrics.set_gauge("leader", 1 if self.is_leader else 0, lease=self.name)
+        metrics.set_gauge("leader_lease_age_seconds", self.lease_age or 0, lease=self.name)
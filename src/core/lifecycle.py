@@ -0,0 +1,80 @@
+import asyncio
+import time
+from typing import Coroutine, Dict, Optional, Set
+from src.utils.loggers import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AppLifecycle:
+    """
+    Readiness and draining state of the process, plus the registry of
+    fire-and-forget work (notifications, sync runs) spawned by requests so
+    shutdown can wait for it instead of dropping it.
+    """
+    def __init__(self):
+        self.ready = False
+        self.draining = False
+        self.started_at = time.time()
+        # warm-up step -> error message, None when the step succeeded
+        self.warmup: Dict[str, Optional[str]] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def accepting(self) -> bool:
+        return not self.draining
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    def spawn(self, coro: Coroutine, name: Optional[str] = None) -> asyncio.Task:
+        """
+        Run `coro` in the background, tracked until it finishes.
+        """
+        task = asyncio.create_task(coro, name=name)
+        self._tasks.add(task)
+        task.add_done_callback(self._on_task_done)
+        return task
+
+    def _on_task_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(
+                "Background task %s failed: %s", task.get_name(), task.exception()
+            )
+
+    async def drain(self, timeout: float) -> int:
+        """
+        Stop accepting work and wait up to `timeout` seconds for in-flight
+        tasks. Whatever is still running afterwards is cancelled.
+
+        :return: Number of tasks that had to be cancelled.
+        """
+        self.draining = True
+        self.ready = False
+
+        if not self._tasks:
+            return 0
+
+        logger.info("Draining %s background task(s)...", len(self._tasks))
+        _, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+            logger.warning(
+                "Cancelled %s background task(s) after %ss drain deadline",
+                len(pending),
+                timeout
+            )
+        return len(pending)
+
+    def readiness(self) -> dict:
+        return {
+            "ready": self.ready,
+            "draining": self.draining,
+            "in_flight": self.in_flight,
+            "warmup": self.warmup
+        }
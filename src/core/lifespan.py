@@ -0,0 +1,149 @@
+import asyncio
+import time
+from typing import Optional
+from contextlib import asynccontextmanager, AsyncExitStack
+from fastapi import FastAPI
+from sqlalchemy import text
+from src.core.config import settings
+from src.core.cold_start import cold_start
+from src.core.metrics import metrics
+from src.services.partitions import create_future_partitions
+from src.core.database import async_engine, AsyncSessionLocal
+from src.core.dependencies import get_lark_client, load_account_status, lifecycle, log_writer, sync_leader, sync_signal
+from src.services.analytics import LarkUsersAnalytics
+from src.services.synchronize import LarkSynchronizer
+from src.utils.loggers import logging
+
+logger = logging.getLogger(__name__)
+
+
+async def _load_account_index():
+    # polars parses the endorsement csv synchronously, keep it off the loop
+    await asyncio.to_thread(load_account_status)
+
+
+async def _fetch_lark_tokens():
+    lark = get_lark_client()
+    await lark.http.open()
+    await lark.token.get_tenant_access_token()
+    await lark.token.get_app_access_token()
+
+
+async def _prefill_db_pool():
+    """
+    Open DB_POOL_WARM_CONNECTIONS pooled connections at once so the first
+    requests after a deploy do not pay for the asyncpg handshake.
+    """
+    async with AsyncExitStack() as stack:
+        connections = await asyncio.gather(*(
+            stack.enter_async_context(async_engine.connect())
+            for _ in range(settings.DB_POOL_WARM_CONNECTIONS)
+        ))
+        await asyncio.gather(*(
+            connection.execute(text("SELECT 1"))
+            for connection in connections
+        ))
+
+
+async def _ensure_partitions():
+    # detaching is left to maintain_partitions.py, startup only adds
+    async with AsyncSessionLocal() as db:
+        await create_future_partitions(db, months_ahead=settings.LOG_PARTITION_MONTHS_AHEAD)
+
+
+async def _run_step(name: str, step):
+    started = time.perf_counter()
+    try:
+        await step()
+        lifecycle.warmup[name] = None
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        metrics.observe("warm_up_step_ms", elapsed_ms, step=name)
+        logger.info("Warm-up %s done in %.0fms", name, elapsed_ms)
+    except Exception as err:
+        lifecycle.warmup[name] = str(err)
+        logger.error("Warm-up %s failed: %s", name, err)
+
+
+async def warm_up():
+    await asyncio.gather(
+        _run_step("account_index", _load_account_index),
+        _run_step("lark_tokens", _fetch_lark_tokens),
+        _run_step("db_pool", _prefill_db_pool),
+        _run_step("log_partitions", _ensure_partitions)
+    )
+    # Lark tokens are fetched lazily again on first use, a Lark outage
+    # must not keep plate checks out of rotation
+    lifecycle.ready = (
+        lifecycle.warmup["account_index"] is None
+        and lifecycle.warmup["db_pool"] is None
+    )
+
+
+async def _run_synchronizer():
+    async with AsyncSessionLocal() as db:
+        synchronizer = LarkSynchronizer(
+            db=db,
+            lark=get_lark_client(),
+            analytics=LarkUsersAnalytics(db),
+            signal=sync_signal,
+            debounce=settings.SYNC_DEBOUNCE_SECONDS,
+            exact=settings.SYNC_EXACT_COUNTS,
+            catch_up_days=settings.SYNC_CATCH_UP_DAYS,
+            catch_up_interval=settings.SYNC_CATCH_UP_INTERVAL_SECONDS
+        )
+        await synchronizer.start_watching()
+
+
+def start_synchronizer() -> Optional[asyncio.Task]:
+    """
+    Run the Lark Base synchronizer inside this process when SYNC_EMBEDDED is
+    set, woken by the log writer instead of polling. Across replicas only
+    the holder of the leader lease syncs, the others stand by.
+    """
+    if not settings.SYNC_EMBEDDED:
+        return None
+    task = asyncio.create_task(sync_leader.run(_run_synchronizer), name="lark_synchronizer_leader")
+    task.add_done_callback(_log_synchronizer_exit)
+    return task
+
+
+def _log_synchronizer_exit(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Synchronizer stopped: %r", task.exception())
+
+
+async def shutdown(synchronizer: Optional[asyncio.Task] = None):
+    if synchronizer is not None:
+        # it waits for changes forever, a pass cut short is redone on the next start
+        synchronizer.cancel()
+        await asyncio.gather(synchronizer, return_exceptions=True)
+    await lifecycle.drain(settings.SHUTDOWN_DRAIN_TIMEOUT_SECONDS)
+    # after the drain, so rows logged by the last requests are flushed too
+    await log_writer.stop()
+    await get_lark_client().aclose()
+    await async_engine.dispose()
+
+
+def _report_cold_start():
+    cold_start.mark("warm_up")
+    total = cold_start.since_process_start()
+    phases = ", ".join(f"{phase}={elapsed:.2f}s" for phase, elapsed in cold_start.phases.items())
+    if total > settings.COLD_START_TARGET_SECONDS:
+        logger.warning(
+            "Cold start took %.2fs, over the %ss target (%s)",
+            total, settings.COLD_START_TARGET_SECONDS, phases
+        )
+    else:
+        logger.info("Cold start took %.2fs (%s)", total, phases)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await warm_up()
+    log_writer.start()
+    synchronizer = start_synchronizer()
+    _report_cold_start()
+    try:
+        yield
+    finally:
+        await shutdown(synchronizer)
@@ -0,0 +1,150 @@
+import os
+import json
+import time
+import uuid
+import fcntl
+import threading
+from datetime import date, datetime
+from typing import IO, List, Optional
+from src.utils.loggers import logging
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".jsonl"
+
+
+def _encode_value(value):
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not spoolable")
+
+
+def _decode_row(row: dict) -> dict:
+    row["id"] = uuid.UUID(row["id"])
+    row["log_date"] = date.fromisoformat(row["log_date"])
+    # repeat entries only carry last_seen
+    for key in ("timestamp", "last_seen"):
+        if row.get(key) is not None:
+            row[key] = datetime.fromisoformat(row[key])
+    return row
+
+
+class LogSpool:
+    """
+    Append-only local spool for `log_records` rows the database could not
+    take. Rows are JSON lines in numbered segment files. Each `append` is one
+    write + fsync however many rows it carries, and the active segment is
+    rotated once it grows past `segment_max_bytes`. Only closed segments are
+    handed out for replay, and a segment is deleted once it was replayed.
+
+    Workers may share the directory: the active segment is created under a
+    hidden name, flock()ed and only then renamed into place, so a segment
+    without a lock is closed for good (or its writer is dead) and safe for
+    any worker to replay and delete.
+    """
+    def __init__(
+        self,
+        directory: str,
+        segment_max_bytes: int = 8 * 1024 * 1024
+    ):
+        self._directory = directory
+        self._segment_max_bytes = segment_max_bytes
+        self._lock = threading.Lock()
+        self._active: Optional[IO[str]] = None
+        self._active_path: Optional[str] = None
+
+    def append(self, rows: List[dict]):
+        """
+        Durably append `rows`. Blocking, call it from a worker thread.
+        """
+        if not rows:
+            return
+        payload = "".join(
+            json.dumps(row, default=_encode_value) + "\n" for row in rows
+        )
+        with self._lock:
+            segment = self._open_active()
+            segment.write(payload)
+            segment.flush()
+            os.fsync(segment.fileno())
+            if segment.tell() >= self._segment_max_bytes:
+                self._close_active()
+
+    def rotate(self):
+        """
+        Close the active segment so everything spooled so far is replayable.
+        """
+        with self._lock:
+            self._close_active()
+
+    def closed_segments(self) -> List[str]:
+        if not os.path.isdir(self._directory):
+            return []
+        with self._lock:
+            names = sorted(
+                name for name in os.listdir(self._directory)
+                if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)
+            )
+            paths = [
+                os.path.join(self._directory, name) for name in names
+                if os.path.join(self._directory, name) != self._active_path
+            ]
+        return [path for path in paths if not self._in_use(path)]
+
+    def _in_use(self, path: str) -> bool:
+        """
+        Whether another process still holds `path` as its active segment.
+        """
+        try:
+            with open(path, "rb") as segment:
+                try:
+                    fcntl.flock(segment.fileno(), fcntl.LOCK_SH | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return True
+                fcntl.flock(segment.fileno(), fcntl.LOCK_UN)
+                return False
+        except FileNotFoundError:
+            # replayed by another worker in the meantime
+            return True
+
+    def read_segment(self, path: str) -> List[dict]:
+        rows = []
+        with open(path, "r", encoding="utf-8") as segment:
+            for line_no, line in enumerate(segment, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    rows.append(_decode_row(json.loads(line)))
+                except (ValueError, KeyError) as err:
+                    # a torn last line from a crash mid-append
+                    logger.warning("Skipping unreadable spool line %s:%s: %s", path, line_no, err)
+        return rows
+
+    def remove_segment(self, path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            # replayed and removed by another worker, same outcome
+            pass
+
+    def _open_active(self) -> IO[str]:
+        if self._active is None:
+            os.makedirs(self._directory, exist_ok=True)
+            name = f"{SEGMENT_PREFIX}{time.time_ns()}-{os.getpid()}{SEGMENT_SUFFIX}"
+            hidden_path = os.path.join(self._directory, f".{name}")
+            active = open(hidden_path, "a", encoding="utf-8")
+            # held until the segment is closed (or the process dies)
+            fcntl.flock(active.fileno(), fcntl.LOCK_EX)
+            self._active_path = os.path.join(self._directory, name)
+            os.rename(hidden_path, self._active_path)
+            self._active = active
+        return self._active
+
+    def _close_active(self):
+        if self._active is not None:
+            self._active.close()
+        self._active = None
+        self._active_path = None
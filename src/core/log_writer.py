@@ -0,0 +1,334 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+from cachetools import TTLCache
+from more_itertools import chunked
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from src.core.log_spool import LogSpool
+from src.core.metrics import metrics
+from src.core.sync_signal import SyncSignal
+from src.db.logger import insert_log_records, apply_log_repeats, touch_log_history_references
+from src.db.agent_stats import agent_of, apply_log_rows_to_daily_stats
+from src.db.heatmap import apply_log_rows_to_heatmap
+from src.utils.loggers import logging
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class LogBufferFullError(Exception):
+    """
+    Raised when the write buffer stayed full for the whole enqueue timeout
+    and there is no spool to fall back to.
+    """
+
+
+class LogWriter:
+    """
+    In-process write buffer for `log_records`.
+
+    Requests only enqueue a fully built row (id, log_date and timestamp are
+    set by the caller) and a single background task flushes the buffer as
+    one multi-row insert every `flush_interval_ms` or `max_batch_size` rows,
+    whichever comes first. The queue is bounded: when the database falls
+    behind, `write` waits for room instead of growing memory.
+
+    With a `spool`, a batch the database rejects or does not commit within
+    `flush_timeout_ms` goes to the local spool instead, the database is
+    skipped for `db_cooldown` seconds, and a replayer drains the spool back
+    once the database answers again.
+
+    With a `dedup_window`, a rescan of the plate an agent already logged
+    with the same event type that day, less than `dedup_window` seconds after
+    the previous scan, becomes a repeat entry that raises `repeat_count` and
+    `last_seen` of the first row instead of inserting a new one.
+    """
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        max_batch_size: int = 500,
+        flush_interval_ms: int = 200,
+        max_queue_size: int = 10000,
+        enqueue_timeout: float = 2.0,
+        flush_timeout_ms: int = 2000,
+        spool: Optional[LogSpool] = None,
+        db_cooldown: float = 10.0,
+        replay_interval: float = 5.0,
+        dedup_window: Optional[float] = None,
+        dedup_max_keys: int = 100000,
+        sync_signal: Optional[SyncSignal] = None
+    ):
+        self._session_factory = session_factory
+        self._max_batch_size = max_batch_size
+        self._flush_interval = flush_interval_ms / 1000
+        self._max_queue_size = max_queue_size
+        self._enqueue_timeout = enqueue_timeout
+        self._flush_timeout = flush_timeout_ms / 1000
+        self._spool = spool
+        self._db_cooldown = db_cooldown
+        self._replay_interval = replay_interval
+        self._db_unavailable_until = 0.0
+        self._dedup_window = dedup_window
+        # (log_date, agent_type, agent_id, plate, event_type) -> the row repeats fold into
+        self._recent: Optional[TTLCache] = (
+            TTLCache(maxsize=dedup_max_keys, ttl=dedup_window) if dedup_window else None
+        )
+        self._sync_signal = sync_signal
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._replay_task: Optional[asyncio.Task] = None
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    @property
+    def db_available(self) -> bool:
+        return time.monotonic() >= self._db_unavailable_until
+
+    def start(self):
+        if self._task is not None and not self._task.done():
+            return
+        self._queue = asyncio.Queue(maxsize=self._max_queue_size)
+        self._task = asyncio.create_task(self._run(), name="log-writer")
+        if self._spool is not None:
+            self._replay_task = asyncio.create_task(self._replay_loop(), name="log-spool-replay")
+        logger.info("Log writer started")
+
+    async def write(self, row: dict):
+        """
+        Enqueue one `log_records` row, waiting while the buffer is full.
+        """
+        # scripts and tests may log without going through the lifespan
+        self.start()
+        row = self._deduplicate(row)
+        try:
+            await asyncio.wait_for(self._queue.put(row), self._enqueue_timeout)
+        except asyncio.TimeoutError:
+            metrics.increment("log_writer_rejected_rows_total")
+            if self._spool is None:
+                raise LogBufferFullError(
+                    f"log buffer stayed full for {self._enqueue_timeout}s"
+                )
+            await self._spool_rows([row])
+        metrics.set_gauge("log_writer_queue_depth", self._queue.qsize())
+
+    def _deduplicate(self, row: dict) -> dict:
+        if self._recent is None:
+            return row
+        agent = agent_of(row)
+        if agent is None or row.get("scanned_text") is None:
+            return row
+
+        key = (row["log_date"], *agent, row["scanned_text"], row["event_type"])
+        first = self._recent.get(key)
+
+        if first is None or (row["timestamp"] - first["last_seen"]).total_seconds() > self._dedup_window:
+            self._recent[key] = {
+                "id": row["id"],
+                "log_date": row["log_date"],
+                "repeat_count": row["repeat_count"],
+                "last_seen": row["last_seen"]
+            }
+            return row
+
+        first["repeat_count"] += 1
+        first["last_seen"] = row["timestamp"]
+        # re-set so the window slides with every rescan
+        self._recent[key] = first
+        metrics.increment("log_writer_deduplicated_rows_total")
+        # absolute values, applying the same repeat twice changes nothing
+        return {"repeat": True, **first}
+
+    async def stop(self, timeout: float = 10.0):
+        """
+        Flush everything buffered so far and stop the background tasks.
+        Rows that cannot reach the database in time stay in the spool.
+        """
+        if self._replay_task is not None:
+            self._replay_task.cancel()
+            await asyncio.gather(self._replay_task, return_exceptions=True)
+            self._replay_task = None
+
+        if self._task is None or self._task.done():
+            return
+        await self._queue.put(_STOP)
+        try:
+            await asyncio.wait_for(self._task, timeout)
+        except asyncio.TimeoutError:
+            logger.error(
+                "Log writer did not flush within %ss, %s row(s) lost",
+                timeout,
+                self._queue.qsize()
+            )
+        self._task = None
+        if self._spool is not None:
+            await asyncio.to_thread(self._spool.rotate)
+        logger.info("Log writer stopped")
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+
+        while not stopping:
+            row = await self._queue.get()
+            if row is _STOP:
+                break
+
+            batch = [row]
+            deadline = loop.time() + self._flush_interval
+
+            while len(batch) < self._max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    row = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if row is _STOP:
+                    stopping = True
+                    break
+                batch.append(row)
+
+            await self._flush(batch)
+            metrics.set_gauge("log_writer_queue_depth", self._queue.qsize())
+
+    async def _flush(self, batch: List[dict]):
+        if self._spool is not None and not self.db_available:
+            await self._spool_rows(batch)
+            return
+
+        started = time.perf_counter()
+        try:
+            _, orphan_repeats = await asyncio.wait_for(
+                self.write_batch(batch),
+                self._flush_timeout
+            )
+        except Exception as err:
+            metrics.increment("log_writer_failed_flushes_total")
+            logger.warning("Log flush of %s row(s) failed: %r", len(batch), err)
+            self._mark_db_unavailable()
+            await self._spool_rows(batch)
+            return
+
+        if orphan_repeats:
+            # their row is still in the spool, replay applies them after it
+            await self._spool_rows(orphan_repeats)
+
+        metrics.observe("log_writer_flush_rows", len(batch))
+        metrics.observe("log_writer_flush_ms", (time.perf_counter() - started) * 1000)
+        metrics.increment("log_writer_flushed_rows_total", len(batch))
+
+    async def write_batch(self, batch: List[dict]) -> Tuple[List[dict], List[dict]]:
+        """
+        Insert the new rows of `batch` and apply its repeat entries, then fold
+        what actually changed into the daily agent stats and the heatmap and
+        mark the references. Safe to call again with entries that may already be stored.
+
+        :return: The rows that were inserted, and the repeat entries whose row
+                 does not exist (yet).
+        """
+        rows = [row for row in batch if not row.get("repeat")]
+        repeats = {}
+        for repeat in batch:
+            if repeat.get("repeat"):
+                latest = repeats.get(repeat["id"])
+                if latest is None or repeat["repeat_count"] > latest["repeat_count"]:
+                    repeats[repeat["id"]] = repeat
+
+        async with self._session_factory() as db:
+            inserted = await insert_log_records(rows, db)
+            repeated = await apply_log_repeats(list(repeats.values()), db)
+            changed = inserted + [{**row, "repeat": True} for row in repeated]
+
+            updated_at = datetime.now()
+            await apply_log_rows_to_daily_stats(changed, updated_at, db)
+            await apply_log_rows_to_heatmap(changed, updated_at, db)
+            # sorted so concurrent workers lock references in the same order
+            refs = sorted({
+                (row["union_id"], row["log_date"])
+                for row in changed
+                if row.get("union_id") is not None and row["repeat_count"] > 0
+            })
+            await touch_log_history_references(refs, updated_at, db)
+            await db.commit()
+
+        if self._sync_signal is not None:
+            self._sync_signal.publish(refs)
+
+        repeated_ids = {row["id"] for row in repeated}
+        orphans = [
+            repeat for repeat in repeats.values()
+            if repeat["id"] not in repeated_ids
+        ]
+        return inserted, orphans
+
+    def _mark_db_unavailable(self):
+        if self._spool is not None:
+            self._db_unavailable_until = time.monotonic() + self._db_cooldown
+            metrics.set_gauge("log_writer_db_available", 0)
+
+    async def _spool_rows(self, rows: List[dict]):
+        if self._spool is None:
+            metrics.increment("log_writer_dropped_rows_total", len(rows))
+            logger.error("Dropped %s log row(s), no spool configured", len(rows))
+            return
+        try:
+            await asyncio.to_thread(self._spool.append, rows)
+            metrics.increment("log_spool_rows_total", len(rows))
+        except Exception as err:
+            metrics.increment("log_writer_dropped_rows_total", len(rows))
+            logger.error("Dropped %s log row(s), spool append failed: %r", len(rows), err)
+
+    async def _replay_loop(self):
+        while True:
+            await asyncio.sleep(self._replay_interval)
+            try:
+                await self.replay_spool()
+            except asyncio.CancelledError:
+                raise
+            except (SQLAlchemyError, ConnectionError, asyncio.TimeoutError) as err:
+                self._mark_db_unavailable()
+                logger.warning("Spool replay failed, retrying later: %r", err)
+            except Exception as err:
+                # e.g. the spool directory itself, no reason to stop writing to the database
+                logger.warning("Spool replay failed, retrying later: %r", err)
+
+    async def replay_spool(self) -> int:
+        """
+        Move every spooled row into `log_records`. A segment is only deleted
+        once all of it was committed, replaying it twice inserts nothing new.
+
+        :return: Number of rows that were actually inserted.
+        """
+        await asyncio.to_thread(self._spool.rotate)
+        segments = await asyncio.to_thread(self._spool.closed_segments)
+        metrics.set_gauge("log_spool_pending_segments", len(segments))
+
+        replayed = 0
+        for segment in segments:
+            try:
+                rows = await asyncio.to_thread(self._spool.read_segment, segment)
+            except FileNotFoundError:
+                # replayed by another worker since it was listed
+                continue
+            for chunk in chunked(rows, self._max_batch_size):
+                inserted, orphans = await self.write_batch(list(chunk))
+                replayed += len(inserted)
+                if orphans:
+                    # the row they belong to never made it anywhere
+                    metrics.increment("log_writer_dropped_rows_total", len(orphans))
+                    logger.warning("Dropped %s repeat(s) of unknown log rows", len(orphans))
+            await asyncio.to_thread(self._spool.remove_segment, segment)
+            logger.info("Replayed spool segment %s (%s row(s))", segment, len(rows))
+
+        if segments:
+            self._db_unavailable_until = 0.0
+            metrics.set_gauge("log_writer_db_available", 1)
+            metrics.increment("log_spool_replayed_rows_total", replayed)
+            metrics.set_gauge("log_spool_pending_segments", 0)
+        return replayed
@@ -1,9 +1,10 @@
-from sqlalchemy.orm import Session
+import uuid
 from typing import Tuple, Literal
-from src.core.auth import get_user_type
-from src.core.models import LogRecord
-from src.services.synchronize import LarkSynchronizer
-from datetime import date
+from src.core.log_writer import LogWriter
+from src.core.principal import Principal
+from src.utils.loggers import logging
+from src.utils import geohash
+from datetime import date, datetime, timezone
 
 
 EventType = Literal[
@@ -12,6 +13,8 @@ EventType = Literal[
     'FOR_CONFIRMATION_NOTIFICATION'
 ]
 
+logger = logging.getLogger(__name__)
+
 
 class Logger:
     """
@@ -19,48 +22,41 @@ class Logger:
     """
     def __init__(
         self,
-        db: Session,
-        synchronizer: LarkSynchronizer
+        writer: LogWriter
     ):
-        self.db = db
-        self.synchronizer = synchronizer
+        self.writer = writer
 
     async def request(
         self,
+        principal: Principal,
         plate_no: str,
-        user_id: str,
         location: Tuple[float, float],
         event_type: EventType,
         detection_type: str
     ):
-        user_type = get_user_type(self.db, user_id)
-
-        if user_type is None:
-            return
-
-        lat, lon = location 
-
-        if user_type == 'external':
-            log_record = LogRecord(
-                username=user_id,
-                scanned_text=plate_no,
-                event_type=event_type,
-                latitude=lat,
-                longitude=lon,
-                detection_type=detection_type
-            )
-        elif user_type == 'internal':
-            await self.synchronizer.sync_required(
-                union_id=user_id,
-                target_date=date.today()
-            )
-            log_record = LogRecord(
-                union_id=user_id,
-                scanned_text=plate_no,
-                event_type=event_type,
-                latitude=lat,
-                longitude=lon,
-                detection_type=detection_type
-            )
-        self.db.add(log_record)
-        self.db.commit()
\ No newline at end of file
+        lat, lon = location
+
+        # the row is written by the batched writer, everything the table
+        # would default is fixed here, at the time of the request
+        timestamp = datetime.now(timezone.utc)
+        row = {
+            "id": uuid.uuid4(),
+            "scanned_text": plate_no,
+            "latitude": lat,
+            "longitude": lon,
+            "union_id": principal.union_id if principal.is_internal else None,
+            "username": None if principal.is_internal else principal.user_id,
+            "event_type": event_type,
+            "detection_type": detection_type,
+            "log_date": date.today(),
+            "timestamp": timestamp,
+            "repeat_count": 1,
+            "last_seen": timestamp,
+            "geohash": geohash.encode(lat, lon) if lat is not None and lon is not None else None
+        }
+
+        try:
+            await self.writer.write(row)
+        except Exception as err:
+            # logging must never fail the plate check itself
+            logger.error("Could not log request %s: %r", row["id"], err)
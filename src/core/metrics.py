@@ -0,0 +1,104 @@
+import time
+from contextlib import contextmanager
+from threading import Lock
+from typing import Dict, Tuple
+
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class Summary:
+    """
+    Running count/sum/min/max of an observed value (e.g. a latency in ms).
+    """
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.last = None
+
+    def observe(self, value: float):
+        self.count += 1
+        self.total += value
+        self.last = value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "avg": self.total / self.count if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            "last": self.last
+        }
+
+
+class MetricsRegistry:
+    """
+    Minimal in-process registry of counters, gauges and summaries, exposed
+    as JSON by the metrics endpoint.
+    """
+    def __init__(self):
+        self._lock = Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._summaries: Dict[str, Dict[LabelKey, Summary]] = {}
+
+    def _labels(self, labels: dict) -> LabelKey:
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def increment(self, name: str, value: float = 1, **labels):
+        key = self._labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        with self._lock:
+            self._gauges.setdefault(name, {})[self._labels(labels)] = value
+
+    def observe(self, name: str, value: float, **labels):
+        key = self._labels(labels)
+        with self._lock:
+            series = self._summaries.setdefault(name, {})
+            series.setdefault(key, Summary()).observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """
+        Observe the elapsed wall time of the block in milliseconds.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - started) * 1000, **labels)
+
+    def _series(self, series: dict, render) -> list:
+        return [
+            {"labels": dict(key), "value": render(value)}
+            for key, value in series.items()
+        ]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "counters": {
+                    name: self._series(series, lambda value: value)
+                    for name, series in self._counters.items()
+                },
+                "gauges": {
+                    name: self._series(series, lambda value: value)
+                    for name, series in self._gauges.items()
+                },
+                "summaries": {
+                    name: self._series(series, lambda value: value.snapshot())
+                    for name, series in self._summaries.items()
+                }
+            }
+
+
+metrics = MetricsRegistry()
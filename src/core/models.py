@@ -1,11 +1,12 @@
 import uuid
-from sqlalchemy import TIMESTAMP, text, Date, func, JSON, DateTime
+from sqlalchemy import TIMESTAMP, text, Date, func, JSON, DateTime, LargeBinary, String
 from sqlalchemy.orm import DeclarativeBase, mapped_column, Mapped
 from sqlalchemy.schema import PrimaryKeyConstraint
 from datetime import date, datetime
 from sqlalchemy.dialects.postgresql import UUID
 from typing import Literal, Optional, Union
 from dataclasses import dataclass
+from src.utils import geohash
 
 class Base(DeclarativeBase):
     pass
@@ -63,6 +64,12 @@ class LarkHistoryReference(Base):
         DateTime,
         nullable=True
     )
+    # first change not yet in Lark Base, unlike updated_at it is not moved
+    # by later changes; cleared once synced
+    first_pending_at: Mapped[Union[datetime, None]] = mapped_column(
+        DateTime,
+        nullable=True
+    )
     lark_record_id: Mapped[Union[str, None]] = mapped_column(nullable=True)
     def __init__(
         self, 
@@ -83,10 +90,10 @@ class LarkHistoryReference(Base):
 class LogRecord(Base):
     __tablename__ = 'log_records'
 
+    # partitioned by month on log_date, so the key has to include it
     id: Mapped[str] = mapped_column(
         UUID(as_uuid=True), 
         primary_key=True,
-        unique=True,
         default=uuid.uuid4
     )
     scanned_text: Mapped[Union[str, None]] = mapped_column(nullable=True)
@@ -98,6 +105,7 @@ class LogRecord(Base):
     detection_type: Mapped[Union[str, None]]
     log_date: Mapped[date] = mapped_column(
         Date,
+        primary_key=True,
         nullable=False, 
         default=date.today
     )
@@ -106,6 +114,20 @@ class LogRecord(Base):
         server_default=text('CURRENT_TIMESTAMP'), 
         nullable=False
     )
+    # rescans of the same plate inside the dedup window are folded into the row
+    repeat_count: Mapped[int] = mapped_column(
+        server_default=text('1'),
+        nullable=False
+    )
+    last_seen: Mapped[Optional[datetime]] = mapped_column(
+        TIMESTAMP(timezone=True),
+        nullable=True
+    )
+    # geohash of latitude/longitude, indexed with log_date for area queries
+    geohash: Mapped[Optional[str]] = mapped_column(
+        String(12),
+        nullable=True
+    )
 
     def __init__(
         self, 
@@ -124,6 +146,8 @@ class LogRecord(Base):
         self.event_type = event_type
         self.detection_type = detection_type
         self.username = username
+        if latitude is not None and longitude is not None:
+            self.geohash = geohash.encode(latitude, longitude)
 
 
 class LarkAccount(Base):
@@ -228,4 +252,39 @@ class User(Base):
         hashed_pwd: str
     ):
         self.username = username
-        self.hashed_password = hashed_pwd
\ No newline at end of file
+        self.hashed_password = hashed_pwd
+
+class DailyAgentStats(Base):
+    """
+    Per agent, per day counters kept up to date by the log writer's flush.
+    `agent_id` is the union_id of internal agents, the username otherwise.
+    """
+    __tablename__ = 'daily_agent_stats'
+
+    log_date: Mapped[date] = mapped_column(Date, primary_key=True)
+    agent_type: Mapped[str] = mapped_column(primary_key=True)
+    agent_id: Mapped[str] = mapped_column(primary_key=True)
+    total_requests: Mapped[int] = mapped_column(default=0, nullable=False)
+    positive_count: Mapped[int] = mapped_column(default=0, nullable=False)
+    for_confirmation_count: Mapped[int] = mapped_column(default=0, nullable=False)
+    # estimate of `plate_sketch`, kept next to it for plain reads
+    unique_scanned_count: Mapped[int] = mapped_column(default=0, nullable=False)
+    # HyperLogLog of the plates scanned that day, see src.utils.hyperloglog
+    plate_sketch: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now, nullable=False)
+
+
+class ScanHeatmapCell(Base):
+    """
+    Scans per geohash cell and hour, one row per zoom level (geohash
+    precision). Kept up to date by the log writer's flush.
+    """
+    __tablename__ = 'scan_heatmap_cells'
+
+    bucket_start: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), primary_key=True)
+    zoom: Mapped[int] = mapped_column(primary_key=True)
+    cell: Mapped[str] = mapped_column(String(12), primary_key=True)
+    scans: Mapped[int] = mapped_column(default=0, nullable=False)
+    positive_count: Mapped[int] = mapped_column(default=0, nullable=False)
+    for_confirmation_count: Mapped[int] = mapped_column(default=0, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now, nullable=False)
@@ -0,0 +1,59 @@
+from typing import Optional, Union
+from pydantic import BaseModel, ConfigDict
+from src.core.dtos import TokenUserType
+from src.core.models import LarkAccount, User
+
+
+class Principal(BaseModel):
+    """
+    The caller of a request, resolved once from the bearer token (or the
+    v3 union id) and handed to logging, sync bookkeeping and notifications.
+    """
+    user_type: TokenUserType
+    # token subject: union_id for internal users, username for external ones
+    user_id: str
+    name: str
+    union_id: Optional[str] = None
+    lark_user_id: Optional[str] = None
+
+    # shared across requests by the identity cache
+    model_config = ConfigDict(frozen=True)
+
+    @property
+    def is_internal(self) -> bool:
+        return self.user_type == 'internal'
+
+    @classmethod
+    def from_lark_account(cls, account: LarkAccount) -> "Principal":
+        return cls(
+            user_type='internal',
+            user_id=account.union_id,
+            name=account.name,
+            union_id=account.union_id,
+            lark_user_id=account.user_id
+        )
+
+    @classmethod
+    def from_external_user(cls, user: User) -> "Principal":
+        return cls(
+            user_type='external',
+            user_id=user.username,
+            name=user.username
+        )
+
+    @classmethod
+    def from_user(cls, user: Union[LarkAccount, User]) -> "Principal":
+        if isinstance(user, LarkAccount):
+            return cls.from_lark_account(user)
+        return cls.from_external_user(user)
+
+    def detection_identity(self) -> dict:
+        """
+        Identity fields of a `Detection` sent by this principal.
+        """
+        return {
+            "union_id": self.union_id,
+            "user_id": self.lark_user_id if self.is_internal else self.user_id,
+            "detected_by": self.name,
+            "user_type": self.user_type
+        }
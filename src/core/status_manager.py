@@ -1,26 +1,27 @@
 from src.db.user import LarkAccount, find_lark_account
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from typing import Dict, List
 from src.core.dtos import StatusManagerDTO
 
 
 class StatusManager:
-    def __init__(self, db: Session):
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession]):
         self._active_users: Dict[str, LarkAccount] = {}
-        self._db = db
+        self._session_factory = session_factory
     
-    def add_user(
+    async def add_user(
         self,
         union_id: str,
     ):
-        account = find_lark_account(
-            union_id=union_id,
-            db=self._db
-        )
+        async with self._session_factory() as db:
+            account = await find_lark_account(
+                union_id=union_id,
+                db=db
+            )
         self._active_users[union_id] = account
 
     def remove_user(self, union_id: str):
         self._active_users.pop(union_id)
 
     def get_users_status(self) -> List[StatusManagerDTO]:
-        return [StatusManagerDTO(name=account.name, union_id=account.union_id) for (account) in self._active_users.values()]
+        return [StatusManagerDTO(name=account.name, union_id=account.union_id) for (account) in self._active_users.values()]
\ No newline at end of file
@@ -0,0 +1,58 @@
+import asyncio
+from datetime import date
+from typing import Iterable, Set, Tuple
+
+DirtyRef = Tuple[str, date]
+
+
+class SyncSignal:
+    """
+    In-process set of (union_id, log_date) references changed since the
+    synchronizer last ran. The log writer publishes after each commit; the
+    synchronizer sleeps until something is published, so an idle app runs
+    no sync queries at all.
+
+    Publishes are only kept while a synchronizer is subscribed: a replica
+    that is not the sync leader drops them instead of collecting them
+    forever, the leader finds those changes by catching up.
+    """
+    def __init__(self):
+        self._dirty: Set[DirtyRef] = set()
+        self._event = asyncio.Event()
+        self._subscribed = False
+
+    def subscribe(self):
+        self._subscribed = True
+
+    def unsubscribe(self):
+        self._subscribed = False
+        self._dirty = set()
+        self._event.clear()
+
+    def publish(self, refs: Iterable[DirtyRef]):
+        if not self._subscribed:
+            return
+        before = len(self._dirty)
+        self._dirty.update(refs)
+        if len(self._dirty) > before:
+            self._event.set()
+
+    @property
+    def pending(self) -> int:
+        return len(self._dirty)
+
+    async def wait(self, debounce: float = 0.0) -> Set[DirtyRef]:
+        """
+        Wait for at least one dirty reference, then keep collecting for
+        `debounce` seconds so a burst of scans becomes one sync pass.
+
+        :return: Every reference published since the last call.
+        """
+        while not self._dirty:
+            self._event.clear()
+            await self._event.wait()
+        if debounce > 0:
+            await asyncio.sleep(debounce)
+        dirty, self._dirty = self._dirty, set()
+        self._event.clear()
+        return dirty
@@ -0,0 +1,265 @@
+from collections import Counter
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import select, text, update, bindparam
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.core.dtos import DetectedType, TokenUserType
+from src.core.models import DailyAgentStats
+from src.utils.hyperloglog import HyperLogLog
+
+AgentKey = Tuple[date, str, str]
+
+
+def agent_of(row: dict) -> Optional[Tuple[TokenUserType, str]]:
+    if row.get("union_id") is not None:
+        return "internal", row["union_id"]
+    if row.get("username") is not None:
+        return "external", row["username"]
+    return None
+
+
+async def apply_log_rows_to_daily_stats(
+    rows: List[dict],
+    updated_at: datetime,
+    db: AsyncSession
+):
+    """
+    Fold newly inserted `log_records` rows into `daily_agent_stats`. Only
+    pass rows that were actually inserted, counters are incremented. A row
+    weighs `repeat_count`; rows flagged `repeat` carry the growth of an
+    existing row and never add a plate.
+    """
+    counters: Dict[AgentKey, Counter] = {}
+    sketches: Dict[AgentKey, HyperLogLog] = {}
+
+    for row in rows:
+        agent = agent_of(row)
+        if agent is None:
+            continue
+        weight = row.get("repeat_count", 1)
+        if weight <= 0:
+            continue
+        key = (row["log_date"], *agent)
+        counter = counters.setdefault(key, Counter())
+        counter["total_requests"] += weight
+        if row["event_type"] == DetectedType.POSITIVE_PLATE_NOTIFICATION.value:
+            counter["positive_count"] += weight
+        elif row["event_type"] == DetectedType.FOR_CONFIRMATION_NOTIFICATION.value:
+            counter["for_confirmation_count"] += weight
+        if row.get("scanned_text") is not None and not row.get("repeat"):
+            sketches.setdefault(key, HyperLogLog()).add(row["scanned_text"])
+
+    if not counters:
+        return
+
+    statement = insert(DailyAgentStats).values([
+        {
+            "log_date": log_date,
+            "agent_type": agent_type,
+            "agent_id": agent_id,
+            "total_requests": counter["total_requests"],
+            "positive_count": counter["positive_count"],
+            "for_confirmation_count": counter["for_confirmation_count"],
+            "unique_scanned_count": sketches[key].count() if key in sketches else 0,
+            "plate_sketch": sketches[key].to_bytes() if key in sketches else None,
+            "updated_at": updated_at
+        }
+        # sorted so concurrent flushes lock rows in the same order
+        for key, counter in sorted(counters.items())
+        for log_date, agent_type, agent_id in [key]
+    ])
+    # the upsert leaves an existing sketch alone but locks the row, so the
+    # register-wise merge below cannot race with another worker's flush
+    result = await db.execute(
+        statement.on_conflict_do_update(
+            index_elements=["log_date", "agent_type", "agent_id"],
+            set_={
+                "total_requests": DailyAgentStats.total_requests + statement.excluded.total_requests,
+                "positive_count": DailyAgentStats.positive_count + statement.excluded.positive_count,
+                "for_confirmation_count": DailyAgentStats.for_confirmation_count + statement.excluded.for_confirmation_count,
+                "updated_at": statement.excluded.updated_at
+            }
+        ).returning(
+            DailyAgentStats.log_date,
+            DailyAgentStats.agent_type,
+            DailyAgentStats.agent_id,
+            DailyAgentStats.plate_sketch
+        )
+    )
+
+    merged_sketches = []
+    for log_date, agent_type, agent_id, stored in result.fetchall():
+        key = (log_date, agent_type, agent_id)
+        if key not in sketches:
+            continue
+        if stored is None:
+            merged = sketches[key]
+        else:
+            existing = HyperLogLog.from_bytes(stored)
+            merged = HyperLogLog.from_bytes(stored).merge(sketches[key])
+            if merged == existing:
+                continue
+        merged_sketches.append({
+            "log_date": log_date,
+            "agent_type": agent_type,
+            "agent_id": agent_id,
+            "plate_sketch": merged.to_bytes(),
+            "unique_scanned_count": merged.count()
+        })
+
+    if merged_sketches:
+        # ORM bulk UPDATE by primary key
+        await db.execute(update(DailyAgentStats), merged_sketches)
+
+
+async def get_daily_agent_stats(
+    log_date: date,
+    db: AsyncSession,
+    agent_type: Optional[TokenUserType] = None,
+    agent_ids: Optional[List[str]] = None
+) -> List[DailyAgentStats]:
+    query = select(DailyAgentStats).where(DailyAgentStats.log_date == log_date)
+    if agent_type is not None:
+        query = query.where(DailyAgentStats.agent_type == agent_type)
+    if agent_ids is not None:
+        query = query.where(DailyAgentStats.agent_id.in_(agent_ids))
+    result = await db.execute(query)
+    return list(result.scalars().all())
+
+
+async def get_plate_sketch(
+    start: date,
+    end: date,
+    db: AsyncSession,
+    agent_type: Optional[TokenUserType] = None,
+    agent_ids: Optional[List[str]] = None
+) -> HyperLogLog:
+    """
+    Union of the daily plate sketches of `agent_ids` (every agent when None)
+    between `start` and `end`, both inclusive.
+    """
+    query = select(DailyAgentStats.plate_sketch).where(
+        DailyAgentStats.log_date.between(start, end),
+        DailyAgentStats.plate_sketch != None
+    )
+    if agent_type is not None:
+        query = query.where(DailyAgentStats.agent_type == agent_type)
+    if agent_ids is not None:
+        query = query.where(DailyAgentStats.agent_id.in_(agent_ids))
+    result = await db.execute(query)
+    return HyperLogLog.union(
+        HyperLogLog.from_bytes(sketch) for sketch in result.scalars().all()
+    )
+
+
+AGENT_COLUMNS = """
+    CASE WHEN union_id IS NOT NULL THEN 'internal' ELSE 'external' END AS agent_type,
+    COALESCE(union_id, username) AS agent_id
+"""
+
+
+async def count_distinct_plates(
+    start: date,
+    end: date,
+    db: AsyncSession,
+    agent_type: Optional[TokenUserType] = None,
+    agent_ids: Optional[List[str]] = None
+) -> int:
+    """
+    Exact distinct plate count straight from `log_records`. Scans every row
+    of the range, for audits rather than dashboards.
+    """
+    query = f"""
+        SELECT count(DISTINCT scanned_text)
+        FROM (
+            SELECT scanned_text, {AGENT_COLUMNS}
+            FROM log_records
+            WHERE log_date BETWEEN :start AND :end
+        ) AS logs
+        WHERE agent_id IS NOT NULL
+    """
+    params = {"start": start, "end": end}
+    if agent_type is not None:
+        query += " AND agent_type = :agent_type"
+        params["agent_type"] = agent_type
+    statement = text(query)
+    if agent_ids is not None:
+        statement = text(query + " AND agent_id IN :agent_ids").bindparams(
+            bindparam("agent_ids", expanding=True)
+        )
+        params["agent_ids"] = list(agent_ids)
+    result = await db.execute(statement, params)
+    return result.scalar_one()
+
+
+async def rebuild_daily_agent_stats(
+    start: date,
+    end: date,
+    db: AsyncSession
+) -> int:
+    """
+    Recompute `daily_agent_stats` from raw `log_records` for every day in
+    [start, end], replacing what is there. Flushes touching those days wait
+    until the rebuild commits.
+
+    :return: Number of stats rows written.
+    """
+    params = {"start": start, "end": end}
+
+    await db.execute(text("LOCK TABLE daily_agent_stats IN SHARE ROW EXCLUSIVE MODE"))
+    await db.execute(
+        text("DELETE FROM daily_agent_stats WHERE log_date BETWEEN :start AND :end"),
+        params
+    )
+
+    plates = await db.execute(
+        text(f"""
+            SELECT DISTINCT log_date, agent_type, agent_id, scanned_text
+            FROM (
+                SELECT log_date, scanned_text, {AGENT_COLUMNS}
+                FROM log_records
+                WHERE log_date BETWEEN :start AND :end
+            ) AS logs
+            WHERE agent_id IS NOT NULL AND scanned_text IS NOT NULL
+        """),
+        params
+    )
+    sketches: Dict[AgentKey, HyperLogLog] = {}
+    for log_date, agent_type, agent_id, scanned_text in plates.fetchall():
+        sketches.setdefault((log_date, agent_type, agent_id), HyperLogLog()).add(scanned_text)
+
+    totals = await db.execute(
+        text(f"""
+            SELECT
+                log_date,
+                agent_type,
+                agent_id,
+                sum(repeat_count) AS total_requests,
+                coalesce(sum(repeat_count) FILTER (WHERE event_type = 'POSITIVE_PLATE_NOTIFICATION'), 0) AS positive_count,
+                coalesce(sum(repeat_count) FILTER (WHERE event_type = 'FOR_CONFIRMATION_NOTIFICATION'), 0) AS for_confirmation_count
+            FROM (
+                SELECT log_date, event_type, repeat_count, {AGENT_COLUMNS}
+                FROM log_records
+                WHERE log_date BETWEEN :start AND :end
+            ) AS logs
+            WHERE agent_id IS NOT NULL
+            GROUP BY log_date, agent_type, agent_id
+        """),
+        params
+    )
+    now = datetime.now()
+    rows = []
+    for total in totals.mappings().fetchall():
+        sketch = sketches.get((total["log_date"], total["agent_type"], total["agent_id"]))
+        rows.append({
+            **total,
+            "unique_scanned_count": sketch.count() if sketch else 0,
+            "plate_sketch": sketch.to_bytes() if sketch else None,
+            "updated_at": now
+        })
+
+    if rows:
+        await db.execute(insert(DailyAgentStats), rows)
+    await db.commit()
+    return len(rows)
@@ -0,0 +1,114 @@
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func, or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.core.dtos import DetectedType
+from src.core.models import ScanHeatmapCell
+from src.utils import geohash
+from src.utils.geohash import BoundingBox
+
+# geohash precision per zoom level: ~39km, ~5km and ~1.2km wide cells
+HEATMAP_ZOOMS = (4, 5, 6)
+
+CellKey = Tuple[datetime, int, str]
+
+
+def hour_bucket(timestamp: datetime) -> datetime:
+    return timestamp.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+async def apply_log_rows_to_heatmap(
+    rows: List[dict],
+    updated_at: datetime,
+    db: AsyncSession
+):
+    """
+    Add newly stored `log_records` rows to `scan_heatmap_cells`, same
+    contract as `apply_log_rows_to_daily_stats`: only rows that were
+    actually inserted, or repeats carrying their growth. A repeat counts in
+    the hour of the row it was folded into.
+    """
+    counters: Dict[CellKey, Counter] = {}
+
+    for row in rows:
+        weight = row.get("repeat_count", 1)
+        if not row.get("geohash") or row.get("timestamp") is None or weight <= 0:
+            continue
+        bucket = hour_bucket(row["timestamp"])
+        for zoom in HEATMAP_ZOOMS:
+            counter = counters.setdefault((bucket, zoom, row["geohash"][:zoom]), Counter())
+            counter["scans"] += weight
+            if row["event_type"] == DetectedType.POSITIVE_PLATE_NOTIFICATION.value:
+                counter["positive_count"] += weight
+            elif row["event_type"] == DetectedType.FOR_CONFIRMATION_NOTIFICATION.value:
+                counter["for_confirmation_count"] += weight
+
+    if not counters:
+        return
+
+    statement = insert(ScanHeatmapCell).values([
+        {
+            "bucket_start": bucket_start,
+            "zoom": zoom,
+            "cell": cell,
+            "scans": counter["scans"],
+            "positive_count": counter["positive_count"],
+            "for_confirmation_count": counter["for_confirmation_count"],
+            "updated_at": updated_at
+        }
+        # sorted so concurrent flushes lock rows in the same order
+        for (bucket_start, zoom, cell), counter in sorted(counters.items())
+    ])
+    await db.execute(
+        statement.on_conflict_do_update(
+            index_elements=["bucket_start", "zoom", "cell"],
+            set_={
+                "scans": ScanHeatmapCell.scans + statement.excluded.scans,
+                "positive_count": ScanHeatmapCell.positive_count + statement.excluded.positive_count,
+                "for_confirmation_count": ScanHeatmapCell.for_confirmation_count + statement.excluded.for_confirmation_count,
+                "updated_at": statement.excluded.updated_at
+            }
+        )
+    )
+
+
+async def get_heatmap_cells(
+    zoom: int,
+    start: datetime,
+    end: datetime,
+    db: AsyncSession,
+    bbox: Optional[BoundingBox] = None
+) -> List[Tuple[str, int, int, int]]:
+    """
+    (cell, scans, positives, for confirmations) per cell for the hours
+    starting in [start, end), busiest first.
+    """
+    query = (
+        select(
+            ScanHeatmapCell.cell,
+            func.sum(ScanHeatmapCell.scans).label("scans"),
+            func.sum(ScanHeatmapCell.positive_count),
+            func.sum(ScanHeatmapCell.for_confirmation_count)
+        )
+        .where(
+            ScanHeatmapCell.zoom == zoom,
+            ScanHeatmapCell.bucket_start >= hour_bucket(start),
+            ScanHeatmapCell.bucket_start < end
+        )
+        .group_by(ScanHeatmapCell.cell)
+        .order_by(func.sum(ScanHeatmapCell.scans).desc(), ScanHeatmapCell.cell)
+    )
+    if bbox is not None:
+        prefixes = geohash.cover(bbox, max_precision=zoom)
+        if not prefixes:
+            # an empty or_() would not filter anything
+            return []
+        # cells never contain LIKE wildcards
+        query = query.where(or_(*[
+            ScanHeatmapCell.cell.like(f"{prefix}%")
+            for prefix in prefixes
+        ]))
+    result = await db.execute(query)
+    return [tuple(row) for row in result.fetchall()]
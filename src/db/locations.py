@@ -0,0 +1,102 @@
+from datetime import date, datetime
+from typing import List, Optional
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.core.models import LogRecord
+from src.utils import geohash
+from src.utils.geohash import BoundingBox, EARTH_RADIUS_METERS
+
+
+def _distance_meters(latitude: float, longitude: float):
+    """
+    Haversine distance from the point to each row, as a SQL expression.
+    """
+    d_lat = func.radians(LogRecord.latitude - latitude) / 2
+    d_lon = func.radians(LogRecord.longitude - longitude) / 2
+    a = (
+        func.power(func.sin(d_lat), 2)
+        + func.cos(func.radians(latitude))
+        * func.cos(func.radians(LogRecord.latitude))
+        * func.power(func.sin(d_lon), 2)
+    )
+    return 2 * EARTH_RADIUS_METERS * func.asin(func.sqrt(a))
+
+
+def _area_query(
+    bbox: BoundingBox,
+    start: date,
+    end: date,
+    plate: Optional[str] = None,
+    event_types: Optional[List[str]] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+):
+    min_lat, min_lon, max_lat, max_lon = bbox
+    cells = geohash.cover(bbox)
+    query = select(LogRecord).where(
+        LogRecord.log_date.between(start, end),
+        # prefix matches are range scans on (log_date, geohash varchar_pattern_ops),
+        # geohash cells never contain LIKE wildcards
+        or_(*[LogRecord.geohash.like(f"{cell}%") for cell in cells]),
+        LogRecord.latitude.between(min_lat, max_lat),
+        LogRecord.longitude.between(min_lon, max_lon)
+    )
+    if plate is not None:
+        query = query.where(LogRecord.scanned_text == plate)
+    if event_types is not None:
+        query = query.where(LogRecord.event_type.in_(event_types))
+    if since is not None:
+        query = query.where(LogRecord.timestamp >= since)
+    if until is not None:
+        query = query.where(LogRecord.timestamp <= until)
+    return query
+
+
+async def find_log_records_in_bbox(
+    bbox: BoundingBox,
+    start: date,
+    end: date,
+    db: AsyncSession,
+    plate: Optional[str] = None,
+    event_types: Optional[List[str]] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = 1000
+) -> List[LogRecord]:
+    query = (
+        _area_query(bbox, start, end, plate, event_types, since, until)
+        .order_by(LogRecord.timestamp.desc())
+        .limit(limit)
+    )
+    result = await db.execute(query)
+    return list(result.scalars().all())
+
+
+async def find_log_records_near(
+    latitude: float,
+    longitude: float,
+    radius_meters: float,
+    start: date,
+    end: date,
+    db: AsyncSession,
+    plate: Optional[str] = None,
+    event_types: Optional[List[str]] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = 1000
+) -> List[LogRecord]:
+    """
+    Scans within `radius_meters` of the point, nearest first. The geohash
+    cells covering the circle's bounding box narrow the index scan and the
+    exact distance is only computed for the rows inside them.
+    """
+    bbox = geohash.bbox_around(latitude, longitude, radius_meters)
+    distance = _distance_meters(latitude, longitude)
+    query = (
+        _area_query(bbox, start, end, plate, event_types, since, until)
+        .where(distance <= radius_meters)
+        .order_by(distance)
+        .limit(limit)
+    )
+    result = await db.execute(query)
+    return list(result.scalars().all())
@@ -1,21 +1,23 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text, select, bindparam, func
+from sqlalchemy.dialects.postgresql import insert
 from src.core.models import LogRecord, LarkHistoryReference
 # from src.models.dtos import CounterPayload, CounterCreateLarkPayload, PersonField
 # from lark.base_manager import BaseManager
-from datetime import date
+from datetime import date, datetime
 from pydantic import BaseModel
-from typing import Literal, List, Tuple
+from typing import Literal, List, Tuple, Iterable
+from src.utils import geohash
 
 EventType = Literal['PLATE_CHECKING', 'POSITIVE_PLATE_NOTIFICATION', 'FOR_CONFIRMATION_NOTIFICATION']
 
-def persist_log_entry(
+async def persist_log_entry(
     scanned_text: str,
     union_id: str,
     latitude: float,
     longitude: float,
     event_type: EventType,
-    db: Session
+    db: AsyncSession
 ):
     
     log_record = LogRecord(
@@ -26,18 +28,136 @@ def persist_log_entry(
         longitude=longitude
     )
     db.add(log_record)
-    db.commit()
+    await db.commit()
 
 
-def get_log_ref_for(
+def _geohash_of(row: dict):
+    if row.get("latitude") is None or row.get("longitude") is None:
+        return None
+    return geohash.encode(row["latitude"], row["longitude"])
+
+
+async def insert_log_records(
+    rows: List[dict],
+    db: AsyncSession
+) -> List[dict]:
+    """
+    Insert a batch of log rows as one multi-row INSERT. Rows carry their own
+    `id`, so replaying a batch cannot duplicate them.
+
+    :return: The rows that were actually inserted, anything derived from the
+             batch (references, stats) must only count these.
+    """
+    if not rows:
+        return []
+    # rows spooled before the geohash column existed
+    rows = [
+        row if "geohash" in row else {**row, "geohash": _geohash_of(row)}
+        for row in rows
+    ]
+    result = await db.execute(
+        insert(LogRecord)
+            .on_conflict_do_nothing(index_elements=["id", "log_date"])
+            .returning(LogRecord.id),
+        rows
+    )
+    inserted_ids = set(result.scalars().all())
+    return [row for row in rows if row["id"] in inserted_ids]
+
+
+async def apply_log_repeats(
+    repeats: List[dict],
+    db: AsyncSession
+) -> List[dict]:
+    """
+    Raise `repeat_count`/`last_seen` of already logged rows to the absolute
+    values tracked by the writer. GREATEST keeps a replayed or reordered
+    update from lowering them.
+
+    :return: One row per updated log with the columns the rollups need and
+             `repeat_count` set to how much it actually grew.
+    """
+    if not repeats:
+        return []
+    result = await db.execute(
+        text("""
+            UPDATE log_records AS current
+            SET repeat_count = GREATEST(current.repeat_count, repeat.repeat_count),
+                last_seen = GREATEST(current.last_seen, repeat.last_seen)
+            FROM unnest(
+                CAST(:ids AS uuid[]),
+                CAST(:log_dates AS date[]),
+                CAST(:repeat_counts AS integer[]),
+                CAST(:last_seens AS timestamptz[])
+            ) AS repeat(id, log_date, repeat_count, last_seen),
+            log_records AS previous
+            WHERE current.id = repeat.id
+            AND current.log_date = repeat.log_date
+            AND previous.id = current.id
+            AND previous.log_date = current.log_date
+            RETURNING current.id, current.log_date, current.union_id,
+                current.username, current.scanned_text, current.event_type,
+                current.geohash, current.timestamp,
+                current.repeat_count - previous.repeat_count AS repeat_count
+        """),
+        {
+            "ids": [repeat["id"] for repeat in repeats],
+            "log_dates": [repeat["log_date"] for repeat in repeats],
+            "repeat_counts": [repeat["repeat_count"] for repeat in repeats],
+            "last_seens": [repeat["last_seen"] for repeat in repeats]
+        }
+    )
+    return [dict(row) for row in result.mappings().fetchall()]
+
+
+async def touch_log_history_references(
+    refs: Iterable[Tuple[str, date]],
+    updated_at: datetime,
+    db: AsyncSession
+):
+    """
+    Mark (union_id, log_date) references as changed so the synchronizer
+    picks them up, creating the missing ones in the same statement.
+    """
+    rows = [
+        {
+            "union_id": union_id,
+            "log_date": log_date,
+            "updated_at": updated_at,
+            "first_pending_at": updated_at
+        }
+        for union_id, log_date in refs
+    ]
+    if not rows:
+        return
+    statement = insert(LarkHistoryReference).values(rows)
+    await db.execute(
+        statement.on_conflict_do_update(
+            index_elements=["union_id", "log_date"],
+            set_={
+                "updated_at": statement.excluded.updated_at,
+                # keeps the oldest unsynced change, for the sync lag
+                "first_pending_at": func.coalesce(
+                    LarkHistoryReference.first_pending_at,
+                    statement.excluded.first_pending_at
+                )
+            }
+        )
+    )
+
+
+async def get_log_ref_for(
     union_id: str,
     log_date: date,
-    db: Session
+    db: AsyncSession
 ) -> LarkHistoryReference | None:
-    reference = db.query(
-        LarkHistoryReference.union_id == union_id,
-        LarkHistoryReference.log_date == log_date
-    ).first()
+    result = await db.execute(
+        select(LarkHistoryReference).where(
+            LarkHistoryReference.union_id == union_id,
+            LarkHistoryReference.log_date == log_date
+        )
+    )
+    reference = result.scalars().first()
 
     if not reference:
         return None
@@ -45,26 +165,26 @@ def get_log_ref_for(
     return reference
 
 
-def init_log_ref_for(
+async def init_log_ref_for(
     union_id: str,
     log_date: date,
     lark_record_id: str,
-    db: Session
+    db: AsyncSession
 ) -> LarkHistoryReference:
     reference = LarkHistoryReference(
         union_id=union_id,
-        log_date=log_date,
-        lark_record_id=lark_record_id
+        log_date=log_date
     )
+    reference.lark_record_id = lark_record_id
     db.add(reference)
-    db.commit()
-    db.refresh(reference)
+    await db.commit()
+    await db.refresh(reference)
 
     return reference
 
 
-def get_ids_without_lark_ref_for_today(
-    session: Session, 
+async def get_ids_without_lark_ref_for_today(
+    session: AsyncSession, 
     log_date: date
 ) -> List[str]:
     # Get all ids that dont have assigned record in lark base
@@ -78,22 +198,23 @@ def get_ids_without_lark_ref_for_today(
         ) and log_date = :log_date
     """)
 
-    result = session.execute(query, {'log_date': log_date})
+    result = await session.execute(query, {'log_date': log_date})
 
     rows = result.fetchall()
 
     return [row[0] for row in rows]
 
 
-def get_references_by_target_date(
+async def get_references_by_target_date(
     target_date: date,
-    db: Session
+    db: AsyncSession
 ) -> List[Tuple[str, str]]:
-    references = db.query(
-        LarkHistoryReference
-    ).filter(
-        LarkHistoryReference.log_date == target_date
-    ).all()
+    result = await db.execute(
+        select(LarkHistoryReference).where(
+            LarkHistoryReference.log_date == target_date
+        )
+    )
+    references = result.scalars().all()
 
     return [
         (reference.union_id, reference.lark_record_id) for reference in references
@@ -110,17 +231,17 @@ class StatisticsQueryResult(BaseModel):
 
     
 
-def get_stats_for_union_ids(
+async def get_stats_for_union_ids(
     union_ids: List[str],
     target_date: date,
-    db: Session
+    db: AsyncSession
 ) -> List[StatisticsQueryResult]:
     query = text(
         """
-        SELECT count(union_id) AS total_requests, 
+        SELECT SUM(repeat_count) AS total_requests, 
         COUNT (DISTINCT scanned_text) as unique_scanned_plate,
-        COUNT (DISTINCT CASE WHEN log_records.event_type = 'POSITIVE_PLATE_NOTIFICATION' THEN log_records.id END) AS positive_count,
-        COUNT (DISTINCT CASE WHEN log_records.event_type = 'FOR_CONFIRMATION_NOTIFICATION' THEN log_records.id END) AS for_confirmation_count,
+        COALESCE(SUM(repeat_count) FILTER (WHERE log_records.event_type = 'POSITIVE_PLATE_NOTIFICATION'), 0) AS positive_count,
+        COALESCE(SUM(repeat_count) FILTER (WHERE log_records.event_type = 'FOR_CONFIRMATION_NOTIFICATION'), 0) AS for_confirmation_count,
         union_id, 
         log_records.log_date
         FROM log_records
@@ -128,13 +249,13 @@ def get_stats_for_union_ids(
         AND union_id IN :union_ids
         GROUP BY union_id, log_records.log_date;
         """
-    )
+    ).bindparams(bindparam("union_ids", expanding=True))
 
-    result = db.execute(
+    result = await db.execute(
         query, 
         {
             "target_date": target_date, 
-            "union_ids": tuple(union_ids)
+            "union_ids": list(union_ids)
         }
     )
 
@@ -1,9 +1,9 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.core.models import SystemUsageLog
 from src.core.monitoring import get_system_usage
 
 
-def store_system_usage(db: Session):
+async def store_system_usage(db: AsyncSession):
     system_usage = get_system_usage()
 
     log = SystemUsageLog(
@@ -11,6 +11,6 @@ def store_system_usage(db: Session):
     )
 
     db.add(log)
-    db.commit()
+    await db.commit()
 
     return system_usage
\ No newline at end of file
@@ -1,25 +1,28 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.core.models import LarkAccount, User
 from src.core.dtos import LarkAccountDTO
+from src.core.identity_cache import identity_cache
 
 
-def find_lark_account(
-    db: Session,
+async def find_lark_account(
+    db: AsyncSession,
     union_id: str,
 ) -> LarkAccount | None:
-    lark_account = (
-        db.query(LarkAccount)
-        .filter(LarkAccount.union_id == union_id)
-        .first()
+    result = await db.execute(
+        select(LarkAccount)
+        .where(LarkAccount.union_id == union_id)
+        .limit(1)
     )
+    lark_account = result.scalars().first()
     if not lark_account:
-        return None 
+        return None
     return lark_account
 
 
-def create_lark_account(
+async def create_lark_account(
     account_dto: LarkAccountDTO,
-    db: Session   
+    db: AsyncSession
 ) -> LarkAccount:
     account = LarkAccount(
         union_id=account_dto.union_id,
@@ -28,13 +31,14 @@ def create_lark_account(
         current_device=account_dto.current_device
     )
     db.add(account)
-    db.commit()
-    db.refresh(account)
+    await db.commit()
+    identity_cache.invalidate("internal", account.union_id)
+    await db.refresh(account)
     return account
-    
 
-def create_external_user(
-    db: Session,
+
+async def create_external_user(
+    db: AsyncSession,
     username: str,
     hashed_password: str
 ) -> User:
@@ -43,20 +47,21 @@ def create_external_user(
         hashed_pwd=hashed_password
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    identity_cache.invalidate("external", user.username)
+    await db.refresh(user)
     return user
 
 
-def find_external_user(
-    db: Session,
+async def find_external_user(
+    db: AsyncSession,
     username: str
 ) -> User:
-    user = db.query(User) \
+    result = await db.execute(
+        select(User)
         .where(
             User.username == username
-        ) \
-        .first()
-    return user
-
-
+        )
+        .limit(1)
+    )
+    return result.scalars().first()
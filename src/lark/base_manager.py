@@ -1,9 +1,13 @@
-import httpx
+import uuid
+import asyncio
+import logging
 from typing import List, Dict, Optional, TypeVar, Generic
+from more_itertools import chunked
 from pydantic import BaseModel, ConfigDict
 from .token_manager import TokenManager
 from typing import Literal, Type, Any
 from .exceptions import LarkBaseHTTPException
+from .http_client import LarkHttpClient
 
 GET_RECORDS_URL = "https://open.larksuite.com/open-apis/bitable/v1/apps/{app_token}/tables/{app_table}/records/{record_id}"
 LIST_RECORDS_URL = "https://open.larksuite.com/open-apis/bitable/v1/apps/{app_token}/tables/{app_table}/records"
@@ -15,6 +19,11 @@ DELETE_RECORD_URL = "https://open.larksuite.com/open-apis/bitable/v1/apps/{app_t
 UPDATE_RECORD_URL = "https://open.larksuite.com/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records/{record_id}"
 
 
+# Lark Base accepts at most 500 records per batch_create / batch_update call
+MAX_BATCH_RECORDS = 500
+
+logger = logging.getLogger(__name__)
+
 T = TypeVar("T")
 
 UserIdType = Literal["union_id", "user_id", "open_id"]
@@ -51,20 +60,42 @@ class ListRecordBodyResponse(BaseModel, Generic[T]):
     data: DataField[T] | None = None
 
 
-class BatchUpdateRecordResponse(BaseModel):
+class BatchRecordsDataResponse(BaseModel):
+    records: List[dict]
+
+
+class BatchRecordsBodyResponse(BaseModel):
     code: int
     msg: str
-    data: Optional[Dict] = None
+    data: Optional[BatchRecordsDataResponse] = None
 
 
-class CreateRecordsDataResponse(BaseModel):
+class BatchChunkFailure(BaseModel):
+    index: int
     records: List[dict]
+    code: Optional[int] = None
+    msg: str
 
 
-class CreateRecordsBodyResponse(BaseModel):
-    code: int
-    msg: str
-    data: Optional[CreateRecordsDataResponse] = None
+class BatchWriteResult(BaseModel):
+    """
+    Outcome of a chunked batch write. `records` holds what Lark returned for
+    every chunk that went through, `failures` the payload of every chunk
+    that did not, so callers can commit the first and retry the second.
+    """
+    chunks: int = 0
+    # records sent per call, in chunk order
+    chunk_sizes: List[int] = []
+    records: List[dict] = []
+    failures: List[BatchChunkFailure] = []
+
+    @property
+    def ok(self) -> bool:
+        return not self.failures
+
+    @property
+    def failed_records(self) -> List[dict]:
+        return [record for failure in self.failures for record in failure.records]
 
 
 class CreateRecordFieldsField(BaseModel):
@@ -109,9 +140,17 @@ class UpdateRecordResponse(BaseModel):
 
 
 class BaseManager:
-    def __init__(self, token_manager: TokenManager) -> None:
+    def __init__(
+        self,
+        token_manager: TokenManager,
+        http: Optional[LarkHttpClient] = None,
+        batch_size: int = MAX_BATCH_RECORDS,
+        batch_concurrency: int = 2
+    ) -> None:
         self._token_manager = token_manager
-        self._async_client = httpx.AsyncClient()
+        self._http = http or LarkHttpClient()
+        self._batch_size = min(batch_size, MAX_BATCH_RECORDS)
+        self._batch_concurrency = batch_concurrency
 
     async def create_record(
         self,
@@ -129,10 +168,13 @@ class BaseManager:
 
         payload = {"fields": fields}
 
-        params = {"user_id_type": user_id_type}
+        # lets Lark drop the duplicate when a retry follows a lost response
+        params = {"user_id_type": user_id_type, "client_token": str(uuid.uuid4())}
 
-        response = await self._async_client.post(
+        response = await self._http.send(
+            "POST",
             formatted_url,
+            endpoint="base.create_record",
             headers={"Authorization": f"Bearer {tenant_token}"},
             json=payload,
             params=params,
@@ -151,30 +193,11 @@ class BaseManager:
         table_id: str,
         data: List[dict],
         user_id_type: UserIdType = "union_id",
-    ):
-        tenant_token = (
-            await self._token_manager.get_tenant_access_token()
-        ).tenant_access_token
-
+    ) -> BatchWriteResult:
         formatted_url = CREATE_RECORDS_URL.format(
             app_token=app_token, table_id=table_id
         )
-
-        payload = {"records": data}
-
-        response = await self._async_client.post(
-            formatted_url,
-            headers={"Authorization": f"Bearer {tenant_token}"},
-            json=payload,
-            params={"user_id_type": user_id_type},
-        )
-
-        response = CreateRecordsBodyResponse(**response.json())
-
-        if response.code != 0:
-            raise LarkBaseHTTPException(response.code, response.msg)
-
-        return response
+        return await self._write_in_chunks(formatted_url, data, user_id_type, client_token=True)
 
     async def search_records(
         self,
@@ -194,8 +217,9 @@ class BaseManager:
 
         params = {"user_id_type": user_id_type, "page_size": page_size}
 
-        response = await self._async_client.post(
-            formatted_url, params=params, headers=headers, json=filter
+        response = await self._http.send(
+            "POST", formatted_url, endpoint="base.search",
+            params=params, headers=headers, json=filter
         )
 
         return SearchResultResponse(**response.json())
@@ -230,8 +254,9 @@ class BaseManager:
         if page_token:
             params["page_token"] = page_token
 
-        response = await self._async_client.get(
-            formatted_url, headers=headers, params=params
+        response = await self._http.send(
+            "GET", formatted_url, endpoint="base.list",
+            headers=headers, params=params
         )
 
         response = ListRecordBodyResponse[record_model](**response.json())
@@ -261,9 +286,9 @@ class BaseManager:
 
         params = {"user_id_type": user_id_type}
 
-        response = await self._async_client.put(
-            url=formatted_url, headers=headers, params=params, json={
-                "fields": data}
+        response = await self._http.send(
+            "PUT", formatted_url, endpoint="base.update_record",
+            headers=headers, params=params, json={"fields": data}
         )
 
         response = UpdateRecordResponse(**response.json())
@@ -277,30 +302,75 @@ class BaseManager:
         self,
         app_token: str,
         table_id: str,
-        records: dict,
+        records: List[dict],
         user_id_type: UserIdType = "union_id",
-    ):
+    ) -> BatchWriteResult:
         formatted_url = BATCH_UPDATE_URL.format(
             app_token=app_token, table_id=table_id)
+        return await self._write_in_chunks(formatted_url, records, user_id_type)
 
-        tenant_token = (
-            await self._token_manager.get_tenant_access_token()
-        ).tenant_access_token
-
-        headers = {"Authorization": f"Bearer {tenant_token}"}
-
-        params = {"user_id_type": user_id_type}
-
-        response = await self._async_client.post(
-            formatted_url, headers=headers, json=records, params=params
-        )
-
-        data = BatchUpdateRecordResponse(**response.json())
-
-        if data.code != 0:
-            raise LarkBaseHTTPException(data.code, data.msg)
-
-        return data
+    async def _write_in_chunks(
+        self,
+        url: str,
+        records: List[dict],
+        user_id_type: UserIdType,
+        client_token: bool = False
+    ) -> BatchWriteResult:
+        """
+        POST `records` in chunks of at most `batch_size`, `batch_concurrency`
+        chunks at a time. A failing chunk is reported, not raised, so the
+        others still land. With `client_token` each chunk carries its own
+        idempotency token, so a retried batch_create cannot create twice.
+        """
+        chunks = list(chunked(records, self._batch_size))
+        semaphore = asyncio.Semaphore(self._batch_concurrency)
+
+        async def send(index: int, chunk: List[dict]):
+            async with semaphore:
+                try:
+                    tenant_token = (
+                        await self._token_manager.get_tenant_access_token()
+                    ).tenant_access_token
+
+                    params = {"user_id_type": user_id_type}
+                    if client_token:
+                        params["client_token"] = str(uuid.uuid4())
+
+                    response = await self._http.send(
+                        "POST",
+                        url,
+                        endpoint="base.batch_write",
+                        headers={"Authorization": f"Bearer {tenant_token}"},
+                        json={"records": chunk},
+                        params=params,
+                    )
+
+                    data = BatchRecordsBodyResponse(**response.json())
+
+                    if data.code != 0:
+                        raise LarkBaseHTTPException(data.code, data.msg)
+
+                    return data.data.records if data.data else []
+                except LarkBaseHTTPException as err:
+                    return BatchChunkFailure(index=index, records=chunk, code=err.code, msg=err.msg)
+                except Exception as err:
+                    return BatchChunkFailure(index=index, records=chunk, msg=repr(err))
+
+        outcomes = await asyncio.gather(*(
+            send(index, chunk) for index, chunk in enumerate(chunks)
+        ))
+
+        result = BatchWriteResult(chunks=len(chunks), chunk_sizes=[len(chunk) for chunk in chunks])
+        for outcome in outcomes:
+            if isinstance(outcome, BatchChunkFailure):
+                logger.warning(
+                    "Lark Base batch chunk %s/%s (%s records) failed: %s %s",
+                    outcome.index + 1, len(chunks), len(outcome.records), outcome.code, outcome.msg
+                )
+                result.failures.append(outcome)
+            else:
+                result.records.extend(outcome)
+        return result
 
     async def delete_record(self, app_token: str, table_id: str, record_id: str):
         formatted_url = DELETE_RECORD_URL.format(
@@ -313,7 +383,9 @@ class BaseManager:
 
         headers = {"Authorization": f"Bearer {tenant_token}"}
 
-        response = await self._async_client.put(formatted_url, headers=headers)
+        response = await self._http.send(
+            "PUT", formatted_url, endpoint="base.delete_record", headers=headers
+        )
 
         data = DeletedRecordResponse(**response.json())
 
@@ -1,6 +1,38 @@
+# Lark answers these when a call was throttled
+RATE_LIMIT_CODES = frozenset({
+    99991400,   # request frequency limit
+    1254290,    # Base: too many requests
+})
+
+# transient failures, worth retrying with backoff
+RETRYABLE_CODES = RATE_LIMIT_CODES | frozenset({
+    1254291,    # Base: write conflict
+    1255040,    # Base: request timed out
+})
+
+
 class LarkBaseHTTPException(Exception):
     def __init__(self, code: int, msg: str) -> None:
         self.code = code
         self.msg = msg
 
         super().__init__(f"LarkBaseHTTPError {code}: {msg}")
+
+    @property
+    def retryable(self) -> bool:
+        # HTTP status codes stand in for the Lark code when there was none
+        return self.code in RETRYABLE_CODES or self.code == 429 or 500 <= self.code < 600
+
+
+class LarkCircuitOpenError(LarkBaseHTTPException):
+    """
+    Raised without calling Lark while the endpoint's circuit breaker is open.
+    """
+    def __init__(self, endpoint: str, retry_in: float) -> None:
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+        super().__init__(-1, f"circuit open for {endpoint}, retry in {retry_in:.0f}s")
+
+    @property
+    def retryable(self) -> bool:
+        return True
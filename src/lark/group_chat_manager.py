@@ -1,8 +1,8 @@
-import httpx
 from pydantic import BaseModel
 from typing import List, Literal, Optional
 from .token_manager import TokenManager
 from .exceptions import LarkBaseHTTPException
+from .http_client import LarkHttpClient
 
 
 class MemberItem(BaseModel):
@@ -26,8 +26,13 @@ class GetGroupMemberListResponse(BaseModel):
 
 
 class GroupChatManager:
-    def __init__(self, token_manager: TokenManager):
+    def __init__(
+        self,
+        token_manager: TokenManager,
+        http: Optional[LarkHttpClient] = None
+    ):
         self._token_manager = token_manager
+        self._http = http or LarkHttpClient()
 
     async def get_members(
         self,
@@ -48,12 +53,14 @@ class GroupChatManager:
 
         params = {"member_id_type": member_id_type}
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(formatted_url, headers=headers, params=params)
+        response = await self._http.send(
+            "GET", formatted_url, endpoint="group_chat.members",
+            headers=headers, params=params
+        )
 
-            response = GetGroupMemberListResponse(**response.json())
+        response = GetGroupMemberListResponse(**response.json())
 
-            if response.code != 0:
-                raise LarkBaseHTTPException(response.code, response.msg)
+        if response.code != 0:
+            raise LarkBaseHTTPException(response.code, response.msg)
 
-            return response
+        return response
@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import httpx
+from typing import Optional
+from .policy import OutboundPolicy, lark_code, retry_after_seconds
+
+logger = logging.getLogger(__name__)
+
+
+class LarkHttpClient:
+    """
+    One pooled `httpx.AsyncClient` shared by every Lark subsystem, so calls
+    reuse keep-alive connections to open.larksuite.com instead of paying a
+    TCP+TLS handshake each time.
+
+    The client is opened lazily on first use, or explicitly from the app
+    lifespan with `open()`, and must be released with `aclose()`. Calls go
+    through `send()`, which applies the shared `OutboundPolicy`.
+    """
+    def __init__(
+        self,
+        timeout: float = 10.0,
+        connect_timeout: float = 5.0,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 60.0,
+        http2: bool = False,
+        policy: Optional[OutboundPolicy] = None
+    ):
+        self._timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self._http2 = http2 and self._http2_available()
+        self._client: Optional[httpx.AsyncClient] = None
+        self.policy = policy or OutboundPolicy()
+
+    def _http2_available(self) -> bool:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("HTTP/2 requested for Lark but 'h2' is not installed, using HTTP/1.1")
+            return False
+        return True
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self._timeout,
+                limits=self._limits,
+                http2=self._http2
+            )
+        return self._client
+
+    async def send(
+        self,
+        method: str,
+        url: str,
+        endpoint: str,
+        idempotent: bool = True,
+        **kwargs
+    ) -> httpx.Response:
+        """
+        Send one Lark API request under the outbound policy: the endpoint's
+        timeout, fail fast while its circuit is open, and backoff retries of
+        retryable failures. Requests that are not `idempotent` are only
+        resent when Lark cannot have acted on them: connection failures and
+        rate limited answers.
+
+        :return: The first non retryable response, or the last one when it
+            still carries a Lark error code for the caller to raise.
+        :raise LarkCircuitOpenError: The endpoint's circuit is open.
+        :raise LarkBaseHTTPException: Retries exhausted on a response
+            without a Lark error code (e.g. a gateway's 502 page).
+        :raise httpx.TransportError: Retries exhausted on transport errors.
+        """
+        timeout = self.policy.timeout(endpoint)
+        if timeout is not None and "timeout" not in kwargs:
+            kwargs["timeout"] = httpx.Timeout(timeout, connect=self._timeout.connect)
+        breaker = self.policy.breaker(endpoint)
+
+        attempt = 0
+        while True:
+            attempt += 1
+            self.policy.check(endpoint)
+            try:
+                response = await self.client.request(method, url, **kwargs)
+            except httpx.TransportError as err:
+                breaker.record_failure()
+                # anything past connecting may have reached Lark
+                delivered = not isinstance(err, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+                if attempt >= self.policy.max_attempts or (delivered and not idempotent):
+                    raise
+                delay = self.policy.backoff(attempt)
+                logger.warning(
+                    "Lark %s attempt %s/%s failed: %r, retrying in %.1fs",
+                    endpoint, attempt, self.policy.max_attempts, err, delay
+                )
+                await asyncio.sleep(delay)
+                continue
+
+            code = lark_code(response)
+            if not self.policy.is_retryable_response(response, code):
+                breaker.record_success()
+                return response
+
+            rate_limited = self.policy.is_rate_limited(response, code)
+            if rate_limited:
+                # Lark is up, only throttling us
+                breaker.record_success()
+            else:
+                breaker.record_failure()
+
+            if attempt >= self.policy.max_attempts or (not rate_limited and not idempotent):
+                if code is not None:
+                    return response
+                raise self.policy.as_exception(response, code)
+
+            delay = self.policy.backoff(
+                attempt,
+                retry_after_seconds(response) if rate_limited else None
+            )
+            logger.warning(
+                "Lark %s attempt %s/%s got HTTP %s code %s, retrying in %.1fs",
+                endpoint, attempt, self.policy.max_attempts, response.status_code, code, delay
+            )
+            await asyncio.sleep(delay)
+
+    async def open(self) -> httpx.AsyncClient:
+        return self.client
+
+    async def aclose(self):
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+            logger.info("Lark http client closed!")
+        self._client = None
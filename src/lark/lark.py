@@ -1,20 +1,47 @@
 import logging
+from typing import Optional
 from .group_chat_manager import GroupChatManager
 from .token_manager import TokenManager
 from .base_manager import BaseManager
 from .messenger import LarkMessenger
 from .lark_drive import LarkDrive
+from .http_client import LarkHttpClient
 
 logger = logging.getLogger(__name__)
 
 
 class Lark:
-    def __init__(self, app_id: str, app_secret: str):
+    def __init__(
+        self,
+        app_id: str,
+        app_secret: str,
+        token_refresh_margin: int = 300,
+        token_cache_path: Optional[str] = None,
+        http: Optional[LarkHttpClient] = None,
+        base_batch_size: int = 500,
+        base_batch_concurrency: int = 2
+    ):
         logger.info("Lark client initialization...")
-        self.token = TokenManager(app_id=app_id, app_secret=app_secret)
-        self.group_chat = GroupChatManager(token_manager=self.token)
-        self.base = BaseManager(token_manager=self.token)
-        self.messenger = LarkMessenger(token_manager=self.token)
-        self.drive = LarkDrive(token_manager=self.token)
+        # one connection pool for every subsystem below
+        self.http = http or LarkHttpClient()
+        self.token = TokenManager(
+            app_id=app_id,
+            app_secret=app_secret,
+            refresh_margin=token_refresh_margin,
+            cache_path=token_cache_path,
+            http=self.http
+        )
+        self.group_chat = GroupChatManager(token_manager=self.token, http=self.http)
+        self.base = BaseManager(
+            token_manager=self.token,
+            http=self.http,
+            batch_size=base_batch_size,
+            batch_concurrency=base_batch_concurrency
+        )
+        self.messenger = LarkMessenger(token_manager=self.token, http=self.http)
+        self.drive = LarkDrive(token_manager=self.token, http=self.http)
 
         logger.info("Lark client initialized!")
+
+    async def aclose(self):
+        await self.http.aclose()
@@ -1,10 +1,11 @@
 import os
 import aiofiles
 import logging
-import httpx
 from pydantic import BaseModel
 from .exceptions import LarkBaseHTTPException
+from typing import Optional
 from .token_manager import TokenManager
+from .http_client import LarkHttpClient
 
 PUT_MEDIA_ATTACHMENT_URL = (
     "https://open.larksuite.com/open-apis/drive/v1/medias/upload_all"
@@ -23,10 +24,15 @@ class PutMediaAttachmentResponse(BaseModel):
 
 
 class LarkDrive:
-    def __init__(self, token_manager: TokenManager, max_size_mb: int = 20):
+    def __init__(
+        self,
+        token_manager: TokenManager,
+        max_size_mb: int = 20,
+        http: Optional[LarkHttpClient] = None
+    ):
         self._token_manager = token_manager
         self._MAX_SIZE_MB: int = max_size_mb * 1024 * 1024
-        self._async_client = httpx.AsyncClient()
+        self._http = http or LarkHttpClient()
         logger.info("LarkDrive client initialized...")
 
     async def put_attachment(
@@ -45,11 +51,15 @@ class LarkDrive:
             await self._token_manager.get_tenant_access_token()
         ).tenant_access_token
 
-        response = await self._async_client.post(
-            PUT_MEDIA_ATTACHMENT_URL,
-            headers={"Authorization": f"Bearer {tenant_token}"},
-            files={"file": open(file_path, "rb")},
-        )
+        with open(file_path, "rb") as file:
+            # a retried upload at worst leaves an unused file behind
+            response = await self._http.send(
+                "POST",
+                PUT_MEDIA_ATTACHMENT_URL,
+                endpoint="drive.upload",
+                headers={"Authorization": f"Bearer {tenant_token}"},
+                files={"file": file},
+            )
 
         response = PutMediaAttachmentResponse(**response.json())
 
@@ -67,7 +77,9 @@ class LarkDrive:
             await self._token_manager.get_tenant_access_token()
         ).tenant_access_token
         headers = {"Authorization": f"Bearer {tenant_token}"}
-        response = await self._async_client.get(url=media_url, headers=headers)
+        response = await self._http.send(
+            "GET", media_url, endpoint="drive.download", headers=headers
+        )
         if response.status_code != 200:
             return False
         async with aiofiles.open(
@@ -77,7 +89,3 @@ class LarkDrive:
             content = await response.aread()
             await media_file.write(content)
         return True
-
-    async def close(self):
-        await self._async_client.aclose()
-        logger.info("LarkDrive client closed!")
@@ -1,9 +1,10 @@
-import httpx
 import os
+import uuid
 from .exceptions import LarkBaseHTTPException
 from pydantic import BaseModel
 from typing import Optional, Literal
 from .token_manager import TokenManager
+from .http_client import LarkHttpClient
 
 
 class SendMessageDataBodyField(BaseModel):
@@ -38,6 +39,8 @@ class SendMessagePayload(BaseModel):
     receive_id: str
     msg_type: str
     content: str
+    # Lark sends one message per uuid within an hour, which makes retries safe
+    uuid: Optional[str] = None
 
 
 class PutAttachmentMessageDataField(BaseModel):
@@ -56,8 +59,13 @@ class BuzzMessageResponse(BaseModel):
     data: Optional[dict] = None
 
 class LarkMessenger:
-    def __init__(self, token_manager: TokenManager):
+    def __init__(
+        self,
+        token_manager: TokenManager,
+        http: Optional[LarkHttpClient] = None
+    ):
         self._token_manager = token_manager
+        self._http = http or LarkHttpClient()
         self.MAX_SIZE_MB: int = 10
 
     async def send_message(
@@ -75,17 +83,20 @@ class LarkMessenger:
 
         headers = {"Authorization": f"Bearer {tenant_token}"}
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                url=url, json=payload.model_dump(), headers=headers, params=params
-            )
+        body = payload.model_dump(exclude_none=True)
+        body.setdefault("uuid", str(uuid.uuid4()))
+
+        response = await self._http.send(
+            "POST", url, endpoint="messenger.send",
+            json=body, headers=headers, params=params
+        )
 
-            response = SendMessageResponse(**response.json())
+        response = SendMessageResponse(**response.json())
 
-            if response.code != 0:
-                raise LarkBaseHTTPException(response.code, response.msg)
+        if response.code != 0:
+            raise LarkBaseHTTPException(response.code, response.msg)
 
-            return response
+        return response
 
     async def put_attachment(
         self,
@@ -125,16 +136,16 @@ class LarkMessenger:
 
             data = {"image_type": image_type}
 
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    url, headers=headers, files=files, data=data
-                )
+            response = await self._http.send(
+                "POST", url, endpoint="messenger.upload_image",
+                headers=headers, files=files, data=data
+            )
 
-                response = PutAttachmentResponse(**response.json())
+            response = PutAttachmentResponse(**response.json())
 
-                if response.code != 0:
-                    raise LarkBaseHTTPException(response.code, response.msg)
-                return response
+            if response.code != 0:
+                raise LarkBaseHTTPException(response.code, response.msg)
+            return response
 
     async def buzz_message(self, message_id: str, group_members_union_id: list[str]):
         tenant_token = (
@@ -151,14 +162,15 @@ class LarkMessenger:
 
         body = {"user_id_list": group_members_union_id}
 
-        async with httpx.AsyncClient() as client:
-            response = await client.patch(
-                url=formatted_url, json=body, headers=headers, params=params
-            )
+        # a resent buzz would ring everyone twice
+        response = await self._http.send(
+            "PATCH", formatted_url, endpoint="messenger.buzz", idempotent=False,
+            json=body, headers=headers, params=params
+        )
 
-            response = BuzzMessageResponse(**response.json())
+        response = BuzzMessageResponse(**response.json())
 
-            if response.code != 0:
-                raise LarkBaseHTTPException(response.code, response)
+        if response.code != 0:
+            raise LarkBaseHTTPException(response.code, response)
             
         return response
@@ -0,0 +1,154 @@
+import time
+import random
+import httpx
+from typing import Dict, Optional
+from .exceptions import LarkBaseHTTPException, LarkCircuitOpenError, RATE_LIMIT_CODES, RETRYABLE_CODES
+
+# seconds, per endpoint; anything not listed uses the client's default timeout
+ENDPOINT_TIMEOUTS: Dict[str, float] = {
+    "base.batch_write": 30.0,
+    "base.search": 15.0,
+    "drive.upload": 60.0,
+    "messenger.upload_image": 30.0,
+}
+
+
+def retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """
+    How long Lark asked us to wait, from `Retry-After` or its own
+    `x-ogw-ratelimit-reset` header.
+    """
+    for header in ("retry-after", "x-ogw-ratelimit-reset"):
+        value = response.headers.get(header)
+        if value is None:
+            continue
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            continue
+    return None
+
+
+def lark_code(response: httpx.Response) -> Optional[int]:
+    try:
+        body = response.json()
+    except ValueError:
+        return None
+    code = body.get("code") if isinstance(body, dict) else None
+    return code if isinstance(code, int) else None
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive retryable failures, fails
+    fast for `reset_timeout` seconds, then lets one trial call through:
+    success closes it again, failure reopens it. A trial that never reports
+    back (e.g. cancelled) is replaced by another after `reset_timeout`.
+    """
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_started: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def retry_in(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(self.reset_timeout - (time.monotonic() - self.opened_at), 0.0)
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        now = time.monotonic()
+        if state == "half_open" and (
+            self._trial_started is None or now - self._trial_started >= self.reset_timeout
+        ):
+            self._trial_started = now
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_started = None
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_started = None
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+class OutboundPolicy:
+    """
+    Shared retry policy of every Lark call, applied by `LarkHttpClient.send`.
+
+    Failures are either retryable (transport errors, timeouts, HTTP 429 and
+    5xx, rate limit and transient Lark codes) or permanent (anything else,
+    returned to the caller at once). Retryable ones are retried up to
+    `max_attempts` times with full jitter exponential backoff, never sooner
+    than a rate limit response asked for. Each endpoint has its own circuit
+    breaker, so a degraded Base does not stop messages from going out.
+    """
+    def __init__(
+        self,
+        max_attempts: int = 4,
+        backoff_base: float = 0.5,
+        backoff_max: float = 10.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        timeouts: Optional[Dict[str, float]] = None
+    ):
+        self.max_attempts = max(max_attempts, 1)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.timeouts = ENDPOINT_TIMEOUTS if timeouts is None else timeouts
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        if endpoint not in self._breakers:
+            self._breakers[endpoint] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+        return self._breakers[endpoint]
+
+    def timeout(self, endpoint: str) -> Optional[float]:
+        return self.timeouts.get(endpoint)
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Delay before retry number `attempt` (1 based).
+        """
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def check(self, endpoint: str):
+        breaker = self.breaker(endpoint)
+        if not breaker.allow():
+            raise LarkCircuitOpenError(endpoint, breaker.retry_in())
+
+    def is_retryable_response(self, response: httpx.Response, code: Optional[int]) -> bool:
+        if response.status_code == 429 or response.status_code >= 500:
+            return True
+        return code in RETRYABLE_CODES
+
+    def is_rate_limited(self, response: httpx.Response, code: Optional[int]) -> bool:
+        return response.status_code == 429 or code in RATE_LIMIT_CODES
+
+    def as_exception(self, response: httpx.Response, code: Optional[int]) -> LarkBaseHTTPException:
+        return LarkBaseHTTPException(
+            code if code is not None else response.status_code,
+            response.reason_phrase or response.text[:200]
+        )
@@ -1,9 +1,15 @@
-import httpx
+import os
+import json
 import time
-from typing import Union
+import asyncio
+import logging
+import tempfile
+import httpx
+from typing import Union, Dict, Type, TypeVar, Callable, Awaitable
 from typing import Optional
 from pydantic import BaseModel
 from .exceptions import LarkBaseHTTPException
+from .http_client import LarkHttpClient
 
 # Authentication, Access tokens
 GET_TENANT_ACCESS_TOKEN_INTERNAL_URL: str = (
@@ -20,6 +26,9 @@ GET_USER_INFORMATION_URL: str = (
 )
 
 
+logger = logging.getLogger(__name__)
+
+
 class LarkBaseTokenResponse(BaseModel):
     code: int
     msg: str
@@ -34,6 +43,9 @@ class TenantTokenResponse(LarkBaseTokenResponse):
     tenant_access_token: str
 
 
+TokenResponseT = TypeVar("TokenResponseT", bound=LarkBaseTokenResponse)
+
+
 class UserTokenDataResponse(BaseModel):
     access_token: str
     refresh_token: str
@@ -66,10 +78,24 @@ class UserInformationResponse(BaseModel):
 
 
 class TokenManager:
-    def __init__(self, app_id: str, app_secret: str) -> None:
+    def __init__(
+        self,
+        app_id: str,
+        app_secret: str,
+        refresh_margin: int = 300,
+        cache_path: Optional[str] = None,
+        http: Optional[LarkHttpClient] = None
+    ) -> None:
         self.app_id = app_id
         self.app_secret = app_secret
+        self._http = http or LarkHttpClient()
         self._cache = {}
+        # seconds before `expire` at which a token is refreshed in the background
+        self._refresh_margin = refresh_margin
+        # optional json file shared by restarts and sibling workers
+        self._cache_path = cache_path
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._background_refreshes: Dict[str, asyncio.Task] = {}
 
     async def get_user_access_token(
         self, code: str, grant_type: str = "authorization_code"
@@ -77,44 +103,40 @@ class TokenManager:
         app_token_response = await self.get_app_access_token()
         headers = {"Authorization": f"Bearer {app_token_response.app_access_token}"}
         payload = {"grant_type": grant_type, "code": code}
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                GET_USER_ACCESS_TOKEN_URL, headers=headers, data=payload
+        # the authorization code is single use, never resend it
+        response = await self._http.send(
+            "POST", GET_USER_ACCESS_TOKEN_URL, endpoint="auth.user_token",
+            idempotent=False, headers=headers, data=payload
+        )
+        response_model = UserTokenResponse(**response.json())
+        if response_model.code != 0:
+            raise LarkBaseHTTPException(
+                code=response_model.code, msg=response_model.message
             )
-            response_model = UserTokenResponse(**response.json())
-            if response_model.code != 0:
-                raise LarkBaseHTTPException(
-                    code=response_model.code, msg=response_model.message
-                )
-            return response_model
+        return response_model
 
-    async def get_tenant_access_token(self):
-        KEY = "tenant_access_token"
-
-        if self._is_token_still_valid(KEY):
-            cached_response_model, _ = self._cache[KEY]
-            return cached_response_model
+    async def get_tenant_access_token(self) -> TenantTokenResponse:
+        return await self._get_token(
+            "tenant_access_token",
+            TenantTokenResponse,
+            self._fetch_tenant_access_token
+        )
 
+    async def _fetch_tenant_access_token(self) -> TenantTokenResponse:
         payload = self._common_auth_payload()
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                GET_APP_ACCESS_TOKEN_INTERNAL_URL, data=payload
-            )
+        response = await self._http.send(
+            "POST", GET_APP_ACCESS_TOKEN_INTERNAL_URL, endpoint="auth.token", data=payload
+        )
 
-            response_model = TenantTokenResponse(**response.json())
-
-            if response_model.code != 0:
-                raise LarkBaseHTTPException(
-                    code=response_model.code, msg=response_model.msg
-                )
+        response_model = TenantTokenResponse(**response.json())
 
-            self._cache[KEY] = (
-                response_model,
-                int(time.time()) + response_model.expire,
+        if response_model.code != 0:
+            raise LarkBaseHTTPException(
+                code=response_model.code, msg=response_model.msg
             )
 
-            return response_model
+        return response_model
 
     def get_tenant_access_token_sync(self):
         payload = self._common_auth_payload()
@@ -132,34 +154,170 @@ class TokenManager:
             return response_model
 
     async def get_app_access_token(self) -> AppTokenResponse:
+        return await self._get_token(
+            "app_access_token",
+            AppTokenResponse,
+            self._fetch_app_access_token
+        )
+
+    async def _fetch_app_access_token(self) -> AppTokenResponse:
         payload = self._common_auth_payload()
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                GET_APP_ACCESS_TOKEN_INTERNAL_URL, json=payload
-            )
+        response = await self._http.send(
+            "POST", GET_APP_ACCESS_TOKEN_INTERNAL_URL, endpoint="auth.token", json=payload
+        )
 
-            response_model = AppTokenResponse(**response.json())
+        response_model = AppTokenResponse(**response.json())
 
-            if response_model.code != 0:
-                raise LarkBaseHTTPException(response_model.code, response_model.msg)
+        if response_model.code != 0:
+            raise LarkBaseHTTPException(response_model.code, response_model.msg)
 
-            return response_model
+        return response_model
 
     async def get_user_information(self, user_access_token: str):
         headers = {"Authorization": f"Bearer {user_access_token}"}
-        async with httpx.AsyncClient() as client:
-            response = await client.get(GET_USER_INFORMATION_URL, headers=headers)
-            response_model = UserInformationResponse(**response.json())
-            if response_model.code != 0:
-                raise LarkBaseHTTPException(response_model.code, response_model.msg)
+        response = await self._http.send(
+            "GET", GET_USER_INFORMATION_URL, endpoint="auth.user_info", headers=headers
+        )
+        response_model = UserInformationResponse(**response.json())
+        if response_model.code != 0:
+            raise LarkBaseHTTPException(response_model.code, response_model.msg)
+        return response_model
+
+    async def _get_token(
+        self,
+        key: str,
+        model: Type[TokenResponseT],
+        fetch: Callable[[], Awaitable[TokenResponseT]]
+    ) -> TokenResponseT:
+        """
+        Serve `key` from the cache. Inside the refresh margin the cached token
+        is still returned while a single background task renews it; once it
+        is expired every caller waits on the same in-flight fetch.
+        """
+        if self._is_token_fresh(key):
+            cached_response_model, _ = self._cache[key]
+            return cached_response_model
+
+        if self._is_token_still_valid(key):
+            self._schedule_refresh(key, model, fetch)
+            cached_response_model, _ = self._cache[key]
+            return cached_response_model
+
+        return await self._refresh(key, model, fetch)
+
+    async def _refresh(
+        self,
+        key: str,
+        model: Type[TokenResponseT],
+        fetch: Callable[[], Awaitable[TokenResponseT]],
+        force: bool = False
+    ) -> TokenResponseT:
+        lock = self._locks.setdefault(key, asyncio.Lock())
+
+        async with lock:
+            # whoever held the lock before us may already have refreshed it
+            if not force and self._is_token_fresh(key):
+                cached_response_model, _ = self._cache[key]
+                return cached_response_model
+
+            if self._load_persisted_token(key, model):
+                cached_response_model, _ = self._cache[key]
+                return cached_response_model
+
+            response_model = await fetch()
+
+            self._cache[key] = (
+                response_model,
+                int(time.time()) + response_model.expire,
+            )
+            self._persist_tokens()
+
             return response_model
 
+    def _schedule_refresh(
+        self,
+        key: str,
+        model: Type[TokenResponseT],
+        fetch: Callable[[], Awaitable[TokenResponseT]]
+    ):
+        task = self._background_refreshes.get(key)
+        if task is not None and not task.done():
+            return
+
+        task = asyncio.create_task(self._refresh(key, model, fetch, force=True))
+        task.add_done_callback(self._on_background_refresh_done)
+        self._background_refreshes[key] = task
+
+    def _on_background_refresh_done(self, task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            # the cached token is still valid, the next caller retries
+            logger.warning("Lark token refresh failed: %s", task.exception())
+
+    def _is_token_fresh(self, key: str):
+        if key in self._cache:
+            _, expires_in = self._cache[key]
+            return expires_in - self._refresh_margin > time.time()
+        return False
+
     def _is_token_still_valid(self, key: str):
         if key in self._cache:
             _, expires_in = self._cache[key]
             return expires_in > time.time()
         return False
 
+    def _load_persisted_token(
+        self,
+        key: str,
+        model: Type[TokenResponseT]
+    ) -> bool:
+        if not self._cache_path or not os.path.exists(self._cache_path):
+            return False
+
+        try:
+            with open(self._cache_path, "r") as cache_file:
+                entry = json.load(cache_file).get(self.app_id, {}).get(key)
+            if entry is None:
+                return False
+            response_model = model(**entry["response"])
+            expires_at = int(entry["expires_at"])
+        except (OSError, ValueError, KeyError, TypeError) as err:
+            logger.warning("Ignoring unreadable Lark token cache %s: %s", self._cache_path, err)
+            return False
+
+        if expires_at - self._refresh_margin <= time.time():
+            return False
+
+        self._cache[key] = (response_model, expires_at)
+        return True
+
+    def _persist_tokens(self):
+        if not self._cache_path:
+            return
+
+        try:
+            persisted = {}
+            if os.path.exists(self._cache_path):
+                with open(self._cache_path, "r") as cache_file:
+                    persisted = json.load(cache_file)
+
+            persisted[self.app_id] = {
+                key: {
+                    "response": response_model.model_dump(),
+                    "expires_at": expires_at
+                }
+                for key, (response_model, expires_at) in self._cache.items()
+            }
+
+            # write-then-rename so concurrent readers never see a partial file
+            directory = os.path.dirname(os.path.abspath(self._cache_path))
+            os.makedirs(directory, exist_ok=True)
+            with tempfile.NamedTemporaryFile("w", dir=directory, delete=False) as tmp_file:
+                json.dump(persisted, tmp_file)
+            os.chmod(tmp_file.name, 0o600)
+            os.replace(tmp_file.name, self._cache_path)
+        except (OSError, ValueError) as err:
+            logger.warning("Could not persist Lark tokens to %s: %s", self._cache_path, err)
+
     def _common_auth_payload(self):
         return {"app_id": self.app_id, "app_secret": self.app_secret}
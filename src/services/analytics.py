@@ -1,124 +1,129 @@
-import pandas as pd
-from src.core.models import LogRecord, LarkHistoryReference
-from typing import List, Tuple
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, Row
+from src.core.models import DailyAgentStats, LarkHistoryReference, LogRecord
+from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, func, select
 from datetime import date
 from pydantic import BaseModel
-from uuid import UUID
 from src.core.dtos import DetectedType
 
-class Log(BaseModel):
-    id: UUID
+
+class AgentSummary(BaseModel):
     union_id: str
-    scanned_text: str
-    event_type: str
-    detection_type: str | None
-    log_date: date
-    record_id: str
+    record_id: str | None
+    total_detected_count: int
+    positive_plate_count: int
+    for_confirmation_count: int
+    unique_plate_count: int
 
 
 class LarkUsersAnalytics:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def get_logs_by_union_id(
+    async def summary(
+        self,
+        union_ids: List[str],
+        target_date: date,
+        exact: bool = False
+    ) -> List[dict]:
+        """
+        Per agent totals of `target_date` with the agent's Lark record id,
+        busiest agent first. One row per agent comes back from the database.
+
+        By default the counters are read from `daily_agent_stats`, so the
+        cost does not grow with the number of scans. `exact` recomputes them
+        from `log_records` instead, with an exact distinct plate count
+        rather than the HyperLogLog estimate. Agents without a stats row
+        (e.g. logs from before the table existed) fall back to the exact
+        totals, zeros would overwrite what Lark already has.
+        """
+        if not union_ids:
+            return []
+        if exact:
+            return self._summaries(await self._fetch(self._exact_query(union_ids, target_date)))
+
+        rows = await self._fetch(self._stats_query(union_ids, target_date))
+        missing = [row["union_id"] for row in rows if not row["has_stats"]]
+        if missing:
+            rows = [row for row in rows if row["has_stats"]]
+            rows += await self._fetch(self._exact_query(missing, target_date))
+            rows.sort(key=lambda row: (-row["total_detected_count"], row["union_id"]))
+        return self._summaries(rows)
+
+    async def _fetch(self, query) -> list:
+        result = await self.db.execute(query)
+        return list(result.mappings().fetchall())
+
+    def _summaries(self, rows: list) -> List[dict]:
+        return [AgentSummary.model_validate(row).model_dump() for row in rows]
+
+    def _stats_query(
         self,
         union_ids: List[str],
         target_date: date
-    ) -> list:
-        result = (
-            self.db.query(
-                LogRecord,
-                LarkHistoryReference.lark_record_id
+    ):
+        total = func.coalesce(DailyAgentStats.total_requests, 0)
+        return (
+            select(
+                LarkHistoryReference.union_id,
+                LarkHistoryReference.lark_record_id.label("record_id"),
+                total.label("total_detected_count"),
+                func.coalesce(DailyAgentStats.positive_count, 0).label("positive_plate_count"),
+                func.coalesce(DailyAgentStats.for_confirmation_count, 0).label("for_confirmation_count"),
+                func.coalesce(DailyAgentStats.unique_scanned_count, 0).label("unique_plate_count"),
+                DailyAgentStats.agent_id.is_not(None).label("has_stats")
             )
-            .join(
-                LarkHistoryReference,
+            .outerjoin(
+                DailyAgentStats,
                 and_(
-                    LogRecord.union_id == LarkHistoryReference.union_id,
-                    LogRecord.log_date == LarkHistoryReference.log_date
+                    DailyAgentStats.log_date == LarkHistoryReference.log_date,
+                    DailyAgentStats.agent_type == "internal",
+                    DailyAgentStats.agent_id == LarkHistoryReference.union_id
                 )
             )
-            .filter(
-                LogRecord.union_id.in_(union_ids),
-                LogRecord.log_date == target_date
-            ).all()
+            .where(
+                LarkHistoryReference.union_id.in_(union_ids),
+                LarkHistoryReference.log_date == target_date
+            )
+            .order_by(total.desc(), LarkHistoryReference.union_id)
         )
-        return self._format_logs_to_base_model(result)
 
-    def _format_logs_to_base_model(
-        self,
-        logs: List[Row[Tuple[LogRecord, str]]]
-    ):
-        collections = []
-        for row in logs:
-            log, record_id = row
-            log = Log(
-                id=log.id,
-                scanned_text=log.scanned_text,
-                log_date=log.log_date,
-                union_id=log.union_id,
-                detection_type=log.detection_type,
-                event_type=log.event_type,
-                record_id=record_id
-            ).model_dump()
-            collections.append(log)
-        return collections
-    
-    def summary(
+    def _exact_query(
         self,
-        result: List[Tuple]
+        union_ids: List[str],
+        target_date: date
     ):
-        df = pd.DataFrame(
-            result,
-            columns=[
-                "id",
-                "union_id",
-                "scanned_text",
-                "event_type",
-                "log_date", 
-                "record_id"
-            ]
-        )
-        grouped_df = df.groupby("union_id")
-
-        # Count unique scanned texts per group
-        unique_plate_df = grouped_df["scanned_text"].apply(
-            lambda x: len(list(x.unique()))
-        )
-        
-        # Count positive plate notifications per group
-        positive_plate_count = grouped_df["event_type"].apply(
-            lambda event: (event == DetectedType.POSITIVE_PLATE_NOTIFICATION.value).sum()
-        )
-        
-        for_confirmation_count = grouped_df["event_type"].apply(
-            lambda event: (event == DetectedType.FOR_CONFIRMATION_NOTIFICATION.value).sum()
-        )
-        
-        # Total detected count per group
-        total_detected_count = grouped_df["scanned_text"].count()
-        record_id = grouped_df["record_id"].first()
-        
-        # Create the aggregated result DataFrame
-        aggregated_result_df = pd.DataFrame({
-            "union_id": unique_plate_df.index,
-            "unique_plate_count": unique_plate_df,
-            "total_detected_count": total_detected_count,
-            "for_confirmation_count": for_confirmation_count,
-            "positive_plate_count": positive_plate_count,
-            "record_id": record_id
-        }).reset_index(drop=True)
-        
-        # Sort the DataFrame by total_detected_count in descending order and convert it to a list of dicts
+        total = func.coalesce(func.sum(LogRecord.repeat_count), 0)
         return (
-            aggregated_result_df
-                .sort_values(
-                    'total_detected_count',
-                    ascending=False
+            select(
+                LarkHistoryReference.union_id,
+                LarkHistoryReference.lark_record_id.label("record_id"),
+                total.label("total_detected_count"),
+                func.coalesce(
+                    func.sum(LogRecord.repeat_count).filter(
+                        LogRecord.event_type == DetectedType.POSITIVE_PLATE_NOTIFICATION.value
+                    ),
+                    0
+                ).label("positive_plate_count"),
+                func.coalesce(
+                    func.sum(LogRecord.repeat_count).filter(
+                        LogRecord.event_type == DetectedType.FOR_CONFIRMATION_NOTIFICATION.value
+                    ),
+                    0
+                ).label("for_confirmation_count"),
+                func.count(LogRecord.scanned_text.distinct()).label("unique_plate_count")
+            )
+            .outerjoin(
+                LogRecord,
+                and_(
+                    LogRecord.log_date == LarkHistoryReference.log_date,
+                    LogRecord.union_id == LarkHistoryReference.union_id
                 )
-                .to_dict(orient="records")
+            )
+            .where(
+                LarkHistoryReference.union_id.in_(union_ids),
+                LarkHistoryReference.log_date == target_date
+            )
+            .group_by(LarkHistoryReference.union_id, LarkHistoryReference.lark_record_id)
+            .order_by(total.desc(), LarkHistoryReference.union_id)
         )
-        
-        
-    
\ No newline at end of file
@@ -0,0 +1,199 @@
+import os
+import time
+from datetime import date, timedelta
+from typing import List, Optional
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.core.models import LogRecord
+from src.services.exports import EXPORT_COLUMNS, ParquetEncoder, log_records_query
+from src.utils.loggers import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ArchiveVerificationError(Exception):
+    pass
+
+
+class LogArchive:
+    """
+    Cold storage for `log_records` days, as parquet files under
+    `<directory>/YYYY/MM/DD/part-<time_ns>.parquet`. A day is written,
+    checked against the database and only then deleted from it. A day can
+    hold several parts when late rows were archived after the first run.
+    """
+    def __init__(
+        self,
+        directory: str,
+        chunk_size: int = 5000
+    ):
+        self.directory = directory
+        self.chunk_size = chunk_size
+
+    def day_directory(self, log_date: date) -> str:
+        return os.path.join(
+            self.directory,
+            f"{log_date.year:04d}",
+            f"{log_date.month:02d}",
+            f"{log_date.day:02d}"
+        )
+
+    def day_files(self, log_date: date) -> List[str]:
+        directory = self.day_directory(log_date)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(
+            os.path.join(directory, name) for name in os.listdir(directory)
+            if name.endswith(".parquet")
+        )
+
+    def files_between(self, start: date, end: date) -> List[str]:
+        files = []
+        current = start
+        while current <= end:
+            files.extend(self.day_files(current))
+            current += timedelta(days=1)
+        return files
+
+    def has_day(self, log_date: date) -> bool:
+        return bool(self.day_files(log_date))
+
+    async def archivable_days(
+        self,
+        before: date,
+        db: AsyncSession
+    ) -> List[date]:
+        result = await db.execute(
+            select(LogRecord.log_date)
+            .where(LogRecord.log_date < before)
+            .distinct()
+            .order_by(LogRecord.log_date)
+        )
+        return list(result.scalars().all())
+
+    async def archive_day(
+        self,
+        log_date: date,
+        db: AsyncSession
+    ) -> int:
+        """
+        Move one day of `log_records` into a parquet part and delete it from
+        the table. Runs in one REPEATABLE READ transaction, so the count, the
+        rows written and the rows deleted all come from the same snapshot;
+        rows arriving meanwhile stay in the table for the next run.
+
+        :return: Number of archived rows.
+        """
+        await db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+
+        expected = (await db.execute(
+            select(func.count()).select_from(LogRecord).where(LogRecord.log_date == log_date)
+        )).scalar_one()
+        if expected == 0:
+            await db.rollback()
+            return 0
+
+        directory = self.day_directory(log_date)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"part-{time.time_ns()}.parquet")
+        temporary_path = path + ".tmp"
+
+        try:
+            written = await self._write_day(log_date, temporary_path, db)
+            self._verify(temporary_path, expected, written)
+            os.replace(temporary_path, path)
+
+            deleted = (await db.execute(
+                delete(LogRecord).where(LogRecord.log_date == log_date)
+            )).rowcount
+            if deleted != expected:
+                raise ArchiveVerificationError(
+                    f"{log_date}: deleted {deleted} rows but archived {expected}"
+                )
+            await db.commit()
+        except BaseException:
+            await db.rollback()
+            for leftover in (temporary_path, path):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+            raise
+
+        logger.info("Archived %s log rows of %s to %s", expected, log_date, path)
+        return expected
+
+    async def _write_day(
+        self,
+        log_date: date,
+        path: str,
+        db: AsyncSession
+    ) -> int:
+        # sorted by plate so row group statistics let plate lookups skip groups
+        query = (
+            log_records_query(log_date, log_date)
+            .order_by(None)
+            .order_by(LogRecord.scanned_text, LogRecord.timestamp)
+            .execution_options(yield_per=self.chunk_size)
+        )
+        encoder = ParquetEncoder(compression="zstd")
+        written = 0
+
+        with open(path, "wb") as archive_file:
+            result = await db.stream(query)
+            async for partition in result.mappings().partitions():
+                rows = [dict(row) for row in partition]
+                archive_file.write(encoder.encode(rows))
+                written += len(rows)
+            archive_file.write(encoder.finish())
+            archive_file.flush()
+            os.fsync(archive_file.fileno())
+
+        return written
+
+    def _verify(self, path: str, expected: int, written: int):
+        import pyarrow.parquet as pq
+
+        stored = pq.read_metadata(path).num_rows
+        if not expected == written == stored:
+            raise ArchiveVerificationError(
+                f"{path}: expected {expected} rows, wrote {written}, file holds {stored}"
+            )
+
+
+def query_archive(
+    archive: LogArchive,
+    start: date,
+    end: date,
+    plate: Optional[str] = None,
+    agent_id: Optional[str] = None,
+    event_type: Optional[str] = None,
+    limit: int = 1000
+) -> List[dict]:
+    """
+    Lazily scan the archived days in [start, end]. Only the files of those
+    days are opened and the filters are pushed down into the parquet reader.
+    Blocking, run it in a worker thread.
+    """
+    import polars as pl
+
+    files = archive.files_between(start, end)
+    if not files:
+        return []
+
+    frame = pl.scan_parquet(files)
+    if plate is not None:
+        frame = frame.filter(pl.col("scanned_text") == plate)
+    if agent_id is not None:
+        frame = frame.filter(
+            (pl.col("union_id") == agent_id) | (pl.col("username") == agent_id)
+        )
+    if event_type is not None:
+        frame = frame.filter(pl.col("event_type") == event_type)
+
+    return (
+        frame
+        .select(EXPORT_COLUMNS)
+        .sort(["log_date", "timestamp"])
+        .head(limit)
+        .collect()
+        .to_dicts()
+    )
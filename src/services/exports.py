@@ -0,0 +1,254 @@
+import io
+import csv
+import importlib.util
+import json
+import zlib
+from datetime import date, datetime
+from enum import Enum
+from typing import AsyncIterator, Iterator, List, Optional
+from uuid import UUID
+from sqlalchemy import select
+from src.core.database import AsyncSessionLocal
+from src.core.dtos import TokenUserType
+from src.core.models import LogRecord
+from src.utils.loggers import logging
+
+logger = logging.getLogger(__name__)
+
+EXPORT_COLUMNS = [
+    "id",
+    "log_date",
+    "timestamp",
+    "last_seen",
+    "union_id",
+    "username",
+    "scanned_text",
+    "event_type",
+    "detection_type",
+    "repeat_count",
+    "latitude",
+    "longitude"
+]
+
+
+class ExportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+    PARQUET = "parquet"
+
+    @property
+    def media_type(self) -> str:
+        return {
+            ExportFormat.CSV: "text/csv",
+            ExportFormat.NDJSON: "application/x-ndjson",
+            ExportFormat.PARQUET: "application/vnd.apache.parquet"
+        }[self]
+
+
+def log_records_query(
+    start: date,
+    end: date,
+    agent_type: Optional[TokenUserType] = None,
+    agent_ids: Optional[List[str]] = None,
+    event_types: Optional[List[str]] = None
+):
+    columns = [getattr(LogRecord, column) for column in EXPORT_COLUMNS]
+    # log_date first so the planner only touches the partitions of the range
+    query = select(*columns).where(LogRecord.log_date.between(start, end))
+    if agent_type == "internal":
+        query = query.where(LogRecord.union_id != None)
+    elif agent_type == "external":
+        query = query.where(LogRecord.union_id == None)
+    if agent_ids is not None:
+        if agent_type == "internal":
+            query = query.where(LogRecord.union_id.in_(agent_ids))
+        elif agent_type == "external":
+            query = query.where(LogRecord.username.in_(agent_ids))
+        else:
+            query = query.where(
+                LogRecord.union_id.in_(agent_ids) | LogRecord.username.in_(agent_ids)
+            )
+    if event_types is not None:
+        query = query.where(LogRecord.event_type.in_(event_types))
+    return query.order_by(LogRecord.log_date, LogRecord.timestamp)
+
+
+async def stream_log_records(
+    query,
+    chunk_size: int = 5000
+) -> AsyncIterator[List[dict]]:
+    """
+    Yield the rows of `query` in chunks of at most `chunk_size`, fetched
+    through a server-side cursor so only one chunk is ever held in memory.
+    The session is owned here since the response outlives the request's
+    dependencies.
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=chunk_size))
+        async for partition in result.mappings().partitions():
+            yield [dict(row) for row in partition]
+
+
+def _json_value(value):
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not exportable")
+
+
+class CsvEncoder:
+    def __init__(self):
+        self._header_written = False
+
+    def encode(self, rows: List[dict]) -> bytes:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+        if not self._header_written:
+            writer.writeheader()
+            self._header_written = True
+        writer.writerows(rows)
+        return buffer.getvalue().encode("utf-8")
+
+    def finish(self) -> bytes:
+        # an empty export still gets its header
+        return self.encode([]) if not self._header_written else b""
+
+
+class NdjsonEncoder:
+    def encode(self, rows: List[dict]) -> bytes:
+        return "".join(
+            json.dumps(row, default=_json_value) + "\n" for row in rows
+        ).encode("utf-8")
+
+    def finish(self) -> bytes:
+        return b""
+
+
+class _DrainableSink(io.RawIOBase):
+    """
+    Write-only file handed to the parquet writer, emptied after every row group.
+    """
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ParquetEncoder:
+    """
+    Writes each chunk as one parquet row group. Needs pyarrow.
+    """
+    def __init__(self, compression: str = "snappy"):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._schema = pa.schema([
+            ("id", pa.string()),
+            ("log_date", pa.date32()),
+            ("timestamp", pa.timestamp("us", tz="UTC")),
+            ("last_seen", pa.timestamp("us", tz="UTC")),
+            ("union_id", pa.string()),
+            ("username", pa.string()),
+            ("scanned_text", pa.string()),
+            ("event_type", pa.string()),
+            ("detection_type", pa.string()),
+            ("repeat_count", pa.int32()),
+            ("latitude", pa.float64()),
+            ("longitude", pa.float64())
+        ])
+        self._sink = _DrainableSink()
+        self._writer = pq.ParquetWriter(self._sink, self._schema, compression=compression)
+
+    def encode(self, rows: List[dict]) -> bytes:
+        for row in rows:
+            row["id"] = str(row["id"])
+        self._writer.write_table(
+            self._pa.Table.from_pylist(rows, schema=self._schema)
+        )
+        return self._sink.drain()
+
+    def finish(self) -> bytes:
+        self._writer.close()
+        return self._sink.drain()
+
+
+def parquet_available() -> bool:
+    # the dotted lookup imports pyarrow itself, so check for it first
+    return (
+        importlib.util.find_spec("pyarrow") is not None
+        and importlib.util.find_spec("pyarrow.parquet") is not None
+    )
+
+
+def make_encoder(export_format: ExportFormat, gzip: bool = False):
+    if export_format == ExportFormat.CSV:
+        return CsvEncoder()
+    if export_format == ExportFormat.NDJSON:
+        return NdjsonEncoder()
+    # parquet compresses its pages itself instead of being gzipped whole
+    return ParquetEncoder(compression="gzip" if gzip else "snappy")
+
+
+async def encode_export(
+    chunks: AsyncIterator[List[dict]],
+    export_format: ExportFormat,
+    gzip: bool = False
+) -> AsyncIterator[bytes]:
+    """
+    Render row chunks as `export_format`, optionally gzipped, one output
+    piece per chunk.
+    """
+    encoder = make_encoder(export_format, gzip)
+    compressor = (
+        zlib.compressobj(6, zlib.DEFLATED, 31)
+        if gzip and export_format != ExportFormat.PARQUET else None
+    )
+    rows = 0
+
+    async for chunk in chunks:
+        rows += len(chunk)
+        data = encoder.encode(chunk)
+        if compressor is not None:
+            data = compressor.compress(data)
+        if data:
+            yield data
+
+    data = encoder.finish()
+    if compressor is not None:
+        data = compressor.compress(data) + compressor.flush()
+    if data:
+        yield data
+    logger.info("Exported %s log rows as %s", rows, export_format.value)
+
+
+def iter_csv(header: List[str], rows: Iterator[tuple]) -> Iterator[bytes]:
+    """
+    Render a blocking row iterator as CSV, a row batch at a time.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if count % 1000 == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
@@ -0,0 +1,117 @@
+import re
+from datetime import date
+from typing import List, Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.utils.loggers import logging
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "log_records"
+PARTITION_NAME = re.compile(r"^log_records_y(\d{4})m(\d{2})$")
+
+
+def month_start(target_date: date, months: int = 0) -> date:
+    """
+    First day of the month `months` away from `target_date`'s month.
+    """
+    month_index = target_date.year * 12 + target_date.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def partition_name(start: date) -> str:
+    return f"{PARENT_TABLE}_y{start.year:04d}m{start.month:02d}"
+
+
+async def list_partitions(db: AsyncSession) -> List[str]:
+    result = await db.execute(
+        text("""
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = :parent
+        """),
+        {"parent": PARENT_TABLE}
+    )
+    return [row[0] for row in result.fetchall()]
+
+
+async def create_future_partitions(
+    db: AsyncSession,
+    months_ahead: int = 3,
+    today: Optional[date] = None
+) -> List[str]:
+    """
+    Make sure the monthly partitions from the current month up to
+    `months_ahead` months out exist, so no row lands in the default one.
+
+    :return: Names of the partitions that were created.
+    """
+    today = today or date.today()
+    existing = set(await list_partitions(db))
+    created = []
+
+    for offset in range(months_ahead + 1):
+        start = month_start(today, offset)
+        name = partition_name(start)
+        if name in existing:
+            continue
+        # identifiers cannot be bound, both values are generated above
+        await db.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{month_start(start, 1).isoformat()}')"
+        ))
+        created.append(name)
+
+    await db.commit()
+    for name in created:
+        logger.info("Created partition %s", name)
+    return created
+
+
+async def detach_old_partitions(
+    db: AsyncSession,
+    retention_months: int,
+    today: Optional[date] = None
+) -> List[str]:
+    """
+    Detach monthly partitions that end before the retention window, once
+    `archive_logs.py` has moved all of their rows to parquet: archive_day
+    only deletes rows after verifying their archive, so an empty partition
+    has nothing left to lose. Partitions still holding rows are kept, since
+    the archiver only reads `log_records`.
+
+    :return: Names of the partitions that were detached.
+    """
+    cutoff = month_start(today or date.today(), -retention_months)
+    detached = []
+
+    for name in sorted(await list_partitions(db)):
+        match = PARTITION_NAME.match(name)
+        if not match:
+            continue
+        start = date(int(match.group(1)), int(match.group(2)), 1)
+        if month_start(start, 1) > cutoff:
+            continue
+        has_rows = (await db.execute(text(f"SELECT EXISTS (SELECT 1 FROM {name})"))).scalar()
+        if has_rows:
+            logger.warning("Partition %s is past retention but not archived yet, kept", name)
+            continue
+        await db.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+        detached.append(name)
+
+    await db.commit()
+    for name in detached:
+        logger.info("Detached partition %s", name)
+    return detached
+
+
+async def maintain_partitions(
+    db: AsyncSession,
+    months_ahead: int = 3,
+    retention_months: Optional[int] = None
+):
+    await create_future_partitions(db, months_ahead=months_ahead)
+    if retention_months is not None:
+        await detach_old_partitions(db, retention_months=retention_months)
@@ -1,12 +1,18 @@
+import time
 import asyncio
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from contextlib import contextmanager
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, or_, select, update
 from .analytics import LarkUsersAnalytics
-from typing import List
-from datetime import date, datetime
-from src.core.models import LarkHistoryReference
+from typing import Dict, List, Optional, Set, Tuple
+from datetime import date, datetime, timedelta
+from src.core.models import LarkHistoryReference, LogRecord
+from src.db.logger import touch_log_history_references
+from src.core.sync_signal import SyncSignal
 from src.lark.lark import Lark
 from src.core.config import settings
+from src.core.metrics import metrics
+from src.lark.base_manager import BatchWriteResult
 from src.lark.exceptions import LarkBaseHTTPException
 from src.utils.date_utils import get_date_timestamp, timestamp_to_date
 from src.utils.loggers import logging
@@ -17,106 +23,314 @@ logger = logging.getLogger(__name__)
 class LarkSynchronizer:
     def __init__(
         self,
-        db: Session,
+        db: AsyncSession,
         lark: Lark,
         analytics: LarkUsersAnalytics,
-        waiting_period: float = 2.0
+        waiting_period: float = 2.0,
+        signal: Optional[SyncSignal] = None,
+        debounce: float = 2.0,
+        exact: bool = False,
+        catch_up_days: int = 31,
+        catch_up_interval: Optional[float] = None
     ):
         self.db = db
         self.lark = lark
         self.analytics = analytics
         self.syncing_event = asyncio.Event()
         self.waiting_period = waiting_period
+        self.signal = signal
+        self.debounce = debounce
+        # recount from log_records instead of reading daily_agent_stats
+        self.exact = exact
+        # how far back pending references are still picked up automatically
+        self.catch_up_days = catch_up_days
+        # the signal only covers this process; changes logged by the other
+        # replicas are found by catching up this often
+        self.catch_up_interval = catch_up_interval
+        # milliseconds spent per phase of the current pass
+        self._phase_ms: Dict[str, float] = {"db": 0.0, "lark": 0.0}
 
     async def start_watching(self):
+        """
+        Keep Lark Base in sync with the logs. With a `signal` it only wakes
+        for references the log writer reported as changed; without one
+        (standalone process) it polls every `waiting_period` seconds.
+        """
+        if self.signal is not None:
+            await self._watch_signal()
+            return
+
         logger.debug("syncing started!")
         while not self.syncing_event.is_set():
             logger.debug("syncing at %s", datetime.now())
-            target_date = date.today()
-            
-            # First check if there are any records that don't have lark_record_id
-            refs_without_record_id = self.get_refs_without_remote_ref()
+            synced = await self.catch_up()
+            await self.report_lag()
+            await asyncio.sleep(self.waiting_period if synced else 3)
 
-            if len(refs_without_record_id) > 0:
-                await self.initialize_refs_without_record_id(
-                    refs=refs_without_record_id,
-                    target_date=target_date
+    async def _watch_signal(self):
+        logger.debug("syncing started, waiting for changes")
+        # before catching up, so that nothing logged meanwhile is missed
+        self.signal.subscribe()
+        try:
+            await self._watch_subscribed()
+        finally:
+            self.signal.unsubscribe()
+
+    async def _watch_subscribed(self):
+        # whatever changed before this process started or while Lark was down
+        await self.catch_up()
+        await self.report_lag()
+        await self.db.close()
+
+        while not self.syncing_event.is_set():
+            try:
+                dirty = await asyncio.wait_for(
+                    self.signal.wait(self.debounce),
+                    timeout=self.catch_up_interval
                 )
-            else:
-                logger.debug("no refs without record id")
-            
-            # records that is not yet synchronize to remote lark base storage
-            buffered_refs = self.get_buffered_refs(target_date)
+            except asyncio.TimeoutError:
+                await self.catch_up()
+                await self.report_lag()
+                await self.db.close()
+                continue
+            by_date: Dict[date, Set[str]] = {}
+            for union_id, log_date in dirty:
+                by_date.setdefault(log_date, set()).add(union_id)
 
-            logger.debug('buffered_refs_count: %s', len(buffered_refs))
-            
-            # create a request payload for updating corresponding record on lark base
-            def union_id_extractor(ref: LarkHistoryReference):
-                return ref.union_id
-            
-            union_ids = list(map(union_id_extractor, buffered_refs))
-            
-            result = self.analytics.get_logs_by_union_id(
-                union_ids=union_ids,
-                target_date=target_date
+            for target_date, union_ids in sorted(by_date.items()):
+                if await self._sync_safely(target_date, sorted(union_ids)) is None:
+                    # retried with the next burst, or after the pause below
+                    self.signal.publish((union_id, target_date) for union_id in union_ids)
+                    await asyncio.sleep(self.waiting_period)
+            await self.report_lag()
+            # no transaction or connection is held while idle
+            await self.db.close()
+
+    async def catch_up(self) -> int:
+        """
+        Sync every date, oldest first, that still has unsynced references
+        within `catch_up_days`: scans logged just before midnight, and
+        whatever piled up while Lark was unreachable.
+
+        :return: Number of records sent to Lark Base.
+        """
+        synced = 0
+        for target_date in await self.get_pending_dates():
+            synced += await self._sync_safely(target_date) or 0
+        return synced
+
+    async def backfill(
+        self,
+        target_date: date
+    ) -> Tuple[int, int]:
+        """
+        Resync every internal agent that logged on `target_date`, whether
+        or not its reference looks synced, creating missing references.
+
+        :return: (agents found, records sent to Lark Base)
+        """
+        result = await self.db.execute(
+            select(LogRecord.union_id)
+            .where(
+                LogRecord.log_date == target_date,
+                LogRecord.union_id != None
             )
-            
-            summaries = self.analytics.summary(result)
-            logger.debug("done computing summary!")
+            .distinct()
+        )
+        union_ids = sorted(result.scalars().all())
+        if not union_ids:
+            return 0, 0
+        await touch_log_history_references(
+            [(union_id, target_date) for union_id in union_ids],
+            datetime.now(),
+            self.db
+        )
+        await self.db.commit()
+        return len(union_ids), await self.sync_once(target_date, union_ids)
 
-            # convert the summary to lark payload
-            payload = self._mass_update_ref_payload(
-                summaries,
-                target_date
+    async def _sync_safely(
+        self,
+        target_date: date,
+        union_ids: Optional[List[str]] = None
+    ) -> Optional[int]:
+        """
+        :return: Records synced, None when the pass failed.
+        """
+        try:
+            return await self.sync_once(target_date, union_ids)
+        except Exception as err:
+            await self.db.rollback()
+            metrics.increment("sync_failed_passes_total", code=getattr(err, "code", None))
+            logger.error("Sync of %s failed: %r", target_date, err)
+            return None
+
+    async def report_lag(self):
+        """
+        Publish `sync_lag_seconds`, the age of the oldest change not yet in
+        Lark Base (0 when everything is synced), the number to alert on.
+        It keeps growing while syncs fail, however often the refs are
+        touched again.
+        """
+        try:
+            oldest = await self.db.scalar(
+                select(func.min(LarkHistoryReference.first_pending_at))
+                .where(*self._pending_conditions())
             )
+        except Exception as err:
+            await self.db.rollback()
+            logger.warning("Could not compute sync lag: %r", err)
+            return
+        lag = 0.0
+        if oldest is not None:
+            lag = max((datetime.now(oldest.tzinfo) - oldest).total_seconds(), 0.0)
+        metrics.set_gauge("sync_lag_seconds", lag)
 
-            current_timestamp = datetime.now()
+    @contextmanager
+    def _timed(self, phase: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._phase_ms[phase] += (time.perf_counter() - started) * 1000
 
-            if len(payload) == 0:
-                logger.debug("🔄 skip sync 🕒 %s", current_timestamp)
-                await asyncio.sleep(3)
-                continue
-                
-            # mark the references as sync
+    def _report_batch(self, operation: str, response: BatchWriteResult):
+        for size in response.chunk_sizes:
+            metrics.observe("sync_lark_call_records", size, operation=operation)
+        for failure in response.failures:
+            metrics.increment("sync_lark_failures_total", operation=operation, code=failure.code)
+
+    async def sync_once(
+        self,
+        target_date: date,
+        union_ids: Optional[List[str]] = None
+    ) -> int:
+        """
+        One sync pass for `target_date`, restricted to `union_ids` when given.
+        Time spent waiting on the database and on Lark is reported apart.
+
+        :return: Number of records sent to Lark Base.
+        """
+        self._phase_ms = {"db": 0.0, "lark": 0.0}
+        try:
+            return await self._sync_pass(target_date, union_ids)
+        finally:
+            for phase, elapsed in self._phase_ms.items():
+                metrics.observe("sync_pass_ms", elapsed, phase=phase)
+
+    async def _sync_pass(
+        self,
+        target_date: date,
+        union_ids: Optional[List[str]] = None
+    ) -> int:
+        # First check if there are any records that don't have lark_record_id
+        with self._timed("db"):
+            refs_without_record_id = await self.get_refs_without_remote_ref(
+                target_date=target_date,
+                union_ids=union_ids
+            )
+
+        create_error = None
+        if len(refs_without_record_id) > 0:
+            try:
+                await self.initialize_refs_without_record_id(
+                    refs=refs_without_record_id
+                )
+            except LarkBaseHTTPException as err:
+                # the refs that were created still get their update below
+                create_error = err
+        else:
+            logger.debug("no refs without record id")
+
+        synced = await self._sync_buffered(target_date, union_ids)
+        if create_error is not None:
+            raise create_error
+        return synced
+
+    async def _sync_buffered(
+        self,
+        target_date: date,
+        union_ids: Optional[List[str]] = None
+    ) -> int:
+        # records that is not yet synchronize to remote lark base storage
+        with self._timed("db"):
+            buffered_refs = await self.get_buffered_refs(target_date, union_ids)
+
+        logger.debug('buffered_refs_count: %s', len(buffered_refs))
+        
+        # create a request payload for updating corresponding record on lark base
+        def union_id_extractor(ref: LarkHistoryReference):
+            return ref.union_id
+        
+        buffered_union_ids = list(map(union_id_extractor, buffered_refs))
+        if not buffered_union_ids:
+            logger.debug("🔄 skip sync 🕒 %s", datetime.now())
+            return 0
+        metrics.observe("sync_batch_agents", len(buffered_union_ids))
+
+        with self._timed("db"):
+            summaries = await self.analytics.summary(
+                union_ids=buffered_union_ids,
+                target_date=target_date,
+                exact=self.exact
+            )
+        logger.debug("done computing summary!")
+
+        # convert the summary to lark payload
+        payload = self._mass_update_ref_payload(
+            summaries,
+            target_date
+        )
+
+        if len(payload) == 0:
+            logger.debug("🔄 skip sync 🕒 %s", datetime.now())
+            return 0
+            
+        # mark the references as sync
+        with self._timed("lark"):
             response = await self.lark.base.update_records(
                 app_token=settings.BASE_LOGS_APP_TOKEN,
                 table_id=settings.LOGS_TABLE_ID,
-                records={
-                    "records": payload
-                }
+                records=payload
             )
-            
-            record_ids = [
-                record["record_id"]
-                for record in response.data["records"]
-            ]
-
-            self.mass_mark_as_sync(
-                record_ids,
-                target_date
+        self._report_batch("update", response)
+
+        record_ids = [
+            record["record_id"]
+            for record in response.records
+        ]
+
+        # chunks that went through are marked even when others failed
+        if record_ids:
+            with self._timed("db"):
+                await self.mass_mark_as_sync(
+                    record_ids,
+                    target_date
+                )
+            metrics.increment("sync_records_total", len(record_ids))
+        if not response.ok:
+            failure = response.failures[0]
+            raise LarkBaseHTTPException(
+                failure.code if failure.code is not None else -1,
+                f"{len(response.failed_records)} of {len(payload)} records not synced: {failure.msg}"
             )
-            logger.info("synced~!")
-            
-            await asyncio.sleep(self.waiting_period)
+        logger.info("synced~!")
+        return len(record_ids)
     
     async def initialize_refs_without_record_id(
         self,
-        refs: List[LarkHistoryReference],
-        target_date: date
+        refs: List[LarkHistoryReference]
     ):
-        union_ids = [ref.union_id for ref in refs]
-
-        multiple_refs_payload = self.create_multiple_refs_payload(
-            union_ids=union_ids, target_date=target_date
-        )
+        multiple_refs_payload = self.create_multiple_refs_payload(refs)
         
-        response = await self.lark.base.create_records(
-            app_token=settings.BASE_LOGS_APP_TOKEN,
-            table_id=settings.LOGS_TABLE_ID,
-            data=multiple_refs_payload
-        )
+        with self._timed("lark"):
+            response = await self.lark.base.create_records(
+                app_token=settings.BASE_LOGS_APP_TOKEN,
+                table_id=settings.LOGS_TABLE_ID,
+                data=multiple_refs_payload
+            )
+        self._report_batch("create", response)
 
-        created_records = response.data.records if response.code == 0 else []        
+        created_records = response.records
         need_to_be_updated_record = []
         for record in created_records:
             need_to_be_updated_record.append({
@@ -125,73 +339,126 @@ class LarkSynchronizer:
                 "log_date": timestamp_to_date(record["fields"]["Log Date"])
             })
 
-        self.db.bulk_update_mappings(LarkHistoryReference, need_to_be_updated_record)
-        self.db.commit()
+        with self._timed("db"):
+            if need_to_be_updated_record:
+                # ORM bulk UPDATE by primary key (union_id, log_date)
+                await self.db.execute(
+                    update(LarkHistoryReference),
+                    need_to_be_updated_record
+                )
+            await self.db.commit()
+
+        if not response.ok:
+            # refs of failed chunks keep a null lark_record_id, the pass is
+            # failed so that they are retried like failed updates
+            failure = response.failures[0]
+            raise LarkBaseHTTPException(
+                failure.code if failure.code is not None else -1,
+                f"{len(response.failed_records)} of {len(refs)} records not created: {failure.msg}"
+            )
     
     def create_multiple_refs_payload(
         self,
-        union_ids: List[str],
-        target_date: date
+        refs: List[LarkHistoryReference]
     ):
         items = []
-        for union_id in union_ids:
+        for ref in refs:
             payload = {
                 "fields": {
                     "Field Agent": [
-                        { "id": union_id }
+                        { "id": ref.union_id }
                     ],
                     "Total Requests": 0,
                     "Positive Count": 0,
                     "For Confirmation Count": 0,
                     "Unique Scanned Count": 0,
-                    "Log Date": get_date_timestamp(target_date)
+                    "Log Date": get_date_timestamp(ref.log_date)
                 }
             }
             items.append(payload)
         return items
 
-    def get_refs_without_remote_ref(self):
-        return self.db.query(LarkHistoryReference).filter(
+    async def get_pending_dates(self) -> List[date]:
+        """
+        Dates with references that are not created in or synced to Lark Base.
+        """
+        result = await self.db.execute(
+            select(LarkHistoryReference.log_date)
+            .where(*self._pending_conditions())
+            .distinct()
+            .order_by(LarkHistoryReference.log_date)
+        )
+        return list(result.scalars().all())
+
+    def _pending_conditions(self):
+        return (
+            LarkHistoryReference.log_date >= date.today() - timedelta(days=self.catch_up_days),
+            or_(
+                LarkHistoryReference.lark_record_id == None,
+                LarkHistoryReference.updated_at > LarkHistoryReference.last_sync_at,
+                LarkHistoryReference.updated_at == None,
+                LarkHistoryReference.last_sync_at == None,
+            )
+        )
+
+    async def get_refs_without_remote_ref(
+        self,
+        target_date: Optional[date] = None,
+        union_ids: Optional[List[str]] = None
+    ):
+        query = select(LarkHistoryReference).where(
             LarkHistoryReference.lark_record_id == None
-        ).all()
+        )
+        if target_date is not None:
+            query = query.where(LarkHistoryReference.log_date == target_date)
+        if union_ids is not None:
+            query = query.where(LarkHistoryReference.union_id.in_(union_ids))
+        result = await self.db.execute(query)
+        return result.scalars().all()
 
-    def get_buffered_refs(
+    async def get_buffered_refs(
         self,
-        target_date: date
+        target_date: date,
+        union_ids: Optional[List[str]] = None
     ):
-        return self.db.query(
+        query = select(
             LarkHistoryReference
         ).where(
-            or_(
+            LarkHistoryReference.log_date == target_date,
+            LarkHistoryReference.lark_record_id != None
+        )
+        if union_ids is not None:
+            # published by the log writer after its commit, known to be dirty
+            # even when a sync pass overlapping the write reset updated_at
+            query = query.where(LarkHistoryReference.union_id.in_(union_ids))
+        else:
+            query = query.where(or_(
                 LarkHistoryReference.updated_at > LarkHistoryReference.last_sync_at,
                 LarkHistoryReference.updated_at == None,
                 LarkHistoryReference.last_sync_at == None,
-            ),
-            LarkHistoryReference.log_date == target_date,
-            LarkHistoryReference.lark_record_id != None
-        ).all()
+            ))
+        result = await self.db.execute(query)
+        return result.scalars().all()
         
-    def mass_mark_as_sync(
+    async def mass_mark_as_sync(
         self,
         record_ids: List[str],
         log_date: date
     ):
-        rows = (
-            self.db
-                .query(LarkHistoryReference)
-                .filter(
-                    LarkHistoryReference.lark_record_id.in_(record_ids),
-                    LarkHistoryReference.log_date == log_date
-                )
-                .all()
+        result = await self.db.execute(
+            select(LarkHistoryReference).where(
+                LarkHistoryReference.lark_record_id.in_(record_ids),
+                LarkHistoryReference.log_date == log_date
+            )
         )
-        for row in rows:
+        for row in result.scalars().all():
             current = datetime.now()
             row.updated_at = current
             row.last_sync_at = current
+            row.first_pending_at = None
             self.db.add(row)
 
-        self.db.commit()
+        await self.db.commit()
             
             
     
@@ -272,15 +539,15 @@ class LarkSynchronizer:
         union_id: str,
         target_date: date
     ):
-        ref = self.find_ref(
+        ref = await self.find_ref(
             union_id=union_id,
             target_date=target_date
         )
         if not ref:
-            ref = self.create_ref(union_id, target_date)
+            ref = await self.create_ref(union_id, target_date)
         return ref
             
-    def create_ref(
+    async def create_ref(
         self,
         union_id: str,
         target_date: date
@@ -290,33 +557,34 @@ class LarkSynchronizer:
             log_date=target_date
         )
         self.db.add(ref)
-        self.db.commit()
-        self.db.refresh(ref)
+        await self.db.commit()
+        await self.db.refresh(ref)
         return ref
 
-    def find_ref(
+    async def find_ref(
         self,
         union_id: str,
         target_date: date
     ):
-        return self.db.query(LarkHistoryReference) \
-            .where(
+        result = await self.db.execute(
+            select(LarkHistoryReference).where(
                 LarkHistoryReference.union_id == union_id,
                 LarkHistoryReference.log_date == target_date
-            ) \
-            .first()
+            )
+        )
+        return result.scalars().first()
 
     async def mark_as_sync(
         self,
         union_id: str,
         target_date: date
     ) -> bool:
-        ref = self.find_ref(union_id, target_date)
+        ref = await self.find_ref(union_id, target_date)
         if not ref:
             return False
         ref.updated_at = datetime.now()
         self.db.add(ref)
-        self.db.commit()
+        await self.db.commit()
         return True
 
     async def sync_required(
@@ -331,12 +599,14 @@ class LarkSynchronizer:
             return None
 
         ref.updated_at = datetime.now()
+        if ref.first_pending_at is None:
+            ref.first_pending_at = ref.updated_at
         
         self.db.add(ref)
 
         if autocommit:
-            self.db.commit()
-            self.db.refresh(ref)
+            await self.db.commit()
+            await self.db.refresh(ref)
         
         return ref
 
@@ -5,9 +5,9 @@ from fastapi import UploadFile
 
 UPLOAD_TEMP_DIR = "uploads"
 
-os.makedirs(UPLOAD_TEMP_DIR, exist_ok=True)
-
 def store_file(file: UploadFile, upload_temp_dir = UPLOAD_TEMP_DIR) -> str:
+    os.makedirs(upload_temp_dir, exist_ok=True)
+
     file_name = f"{uuid4()}-{file.filename}"
 
     file_path = os.path.join(upload_temp_dir, file_name)
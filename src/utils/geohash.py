@@ -0,0 +1,117 @@
+import math
+from typing import List, Tuple
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+DEFAULT_PRECISION = 9
+EARTH_RADIUS_METERS = 6371008.8
+
+BoundingBox = Tuple[float, float, float, float]
+
+
+def encode(latitude: float, longitude: float, precision: int = DEFAULT_PRECISION) -> str:
+    """
+    Geohash of a point. Precision 9 is a cell of roughly 5m x 5m.
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+
+    while len(chars) < precision:
+        if even:
+            middle = (lon_range[0] + lon_range[1]) / 2
+            if longitude >= middle:
+                value = value << 1 | 1
+                lon_range[0] = middle
+            else:
+                value <<= 1
+                lon_range[1] = middle
+        else:
+            middle = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= middle:
+                value = value << 1 | 1
+                lat_range[0] = middle
+            else:
+                value <<= 1
+                lat_range[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = 0
+            value = 0
+
+    return "".join(chars)
+
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """
+    (height, width) in degrees of a cell at `precision`.
+    """
+    total_bits = 5 * precision
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def bbox_around(latitude: float, longitude: float, radius_meters: float) -> BoundingBox:
+    """
+    (min_lat, min_lon, max_lat, max_lon) enclosing a circle.
+    """
+    lat_delta = math.degrees(radius_meters / EARTH_RADIUS_METERS)
+    # the degrees of longitude per meter grow towards the poles
+    lon_delta = lat_delta / max(math.cos(math.radians(latitude)), 1e-6)
+    return (
+        max(latitude - lat_delta, -90.0),
+        max(longitude - lon_delta, -180.0),
+        min(latitude + lat_delta, 90.0),
+        min(longitude + lon_delta, 180.0)
+    )
+
+
+def cover(
+    bbox: BoundingBox,
+    max_cells: int = 32,
+    max_precision: int = DEFAULT_PRECISION
+) -> List[str]:
+    """
+    Smallest set of equally sized geohash cells covering `bbox`, at the
+    finest precision up to `max_precision` that needs no more than
+    `max_cells` cells. Every point of the box has one of the returned cells
+    as a prefix of its geohash.
+    """
+    min_lat, min_lon, max_lat, max_lon = bbox
+    best = [""]
+
+    for precision in range(1, max_precision + 1):
+        height, width = cell_size(precision)
+        rows = range(
+            math.floor((min_lat + 90) / height),
+            min(math.floor((max_lat + 90) / height), round(180 / height) - 1) + 1
+        )
+        columns = range(
+            math.floor((min_lon + 180) / width),
+            min(math.floor((max_lon + 180) / width), round(360 / width) - 1) + 1
+        )
+        if len(rows) * len(columns) > max_cells:
+            break
+        best = [
+            encode(-90 + (row + 0.5) * height, -180 + (column + 0.5) * width, precision)
+            for row in rows
+            for column in columns
+        ]
+
+    return best
+
+
+def distance_meters(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Great-circle (haversine) distance between two points.
+    """
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * math.asin(math.sqrt(a))
@@ -0,0 +1,93 @@
+import math
+import zlib
+import hashlib
+from typing import Iterable, Optional
+
+FORMAT_VERSION = 1
+DEFAULT_PRECISION = 12
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct counter.
+
+    With the default precision (4096 one-byte registers) the standard error
+    is about 1.6%, and small cardinalities (a few thousand) fall back to
+    linear counting, which is close to exact. Sketches of the same precision
+    merge by taking the register-wise max, so per agent/day sketches can be
+    combined into any team or date range without touching raw logs.
+    """
+    def __init__(
+        self,
+        precision: int = DEFAULT_PRECISION,
+        registers: Optional[bytearray] = None
+    ):
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = registers if registers is not None else bytearray(self.size)
+        if len(self.registers) != self.size:
+            raise ValueError("register count does not match the precision")
+
+    def add(self, value: str):
+        hashed = int.from_bytes(
+            hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(),
+            "big"
+        )
+        remaining_bits = 64 - self.precision
+        index = hashed >> remaining_bits
+        rest = hashed & ((1 << remaining_bits) - 1)
+        rank = remaining_bits - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, values: Iterable[str]):
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        """
+        Fold `other` into this sketch in place.
+        """
+        if other.precision != self.precision:
+            raise ValueError("cannot merge sketches of different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def count(self) -> int:
+        alpha = 0.7213 / (1 + 1.079 / self.size)
+        estimate = alpha * self.size ** 2 / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.size and zeros:
+            estimate = self.size * math.log(self.size / zeros)
+        return round(estimate)
+
+    def to_bytes(self) -> bytes:
+        # mostly empty for a single agent's day, compresses to a few bytes
+        return bytes([FORMAT_VERSION, self.precision]) + zlib.compress(bytes(self.registers), 1)
+
+    @classmethod
+    def from_bytes(cls, payload: bytes) -> "HyperLogLog":
+        version, precision = payload[0], payload[1]
+        if version != FORMAT_VERSION:
+            raise ValueError(f"unknown sketch format {version}")
+        return cls(precision, bytearray(zlib.decompress(payload[2:])))
+
+    @classmethod
+    def union(
+        cls,
+        sketches: Iterable["HyperLogLog"],
+        precision: int = DEFAULT_PRECISION
+    ) -> "HyperLogLog":
+        merged = cls(precision)
+        for sketch in sketches:
+            merged.merge(sketch)
+        return merged
+
+    def __eq__(self, other) -> bool:
+        return (
+            isinstance(other, HyperLogLog)
+            and other.precision == self.precision
+            and other.registers == self.registers
+        )
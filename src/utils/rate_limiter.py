@@ -1,4 +1,6 @@
 import time
+from typing import Optional
+from cachetools import TTLCache
 
 class RateLimiter:
     """
@@ -32,3 +34,63 @@ class RateLimiter:
             return True
         else:
             return False
+
+
+class LoginThrottle:
+    """
+    Sliding-window throttle of failed logins, tracked per username and,
+    when `max_failures_per_ip` is set, per client IP.
+    """
+
+    def __init__(
+        self,
+        max_failures_per_username: int = 5,
+        max_failures_per_ip: Optional[int] = None,
+        window: int = 300,
+        maxsize: int = 10000
+    ):
+        """
+        :param max_failures_per_username: Failed attempts allowed per username within the window.
+        :param max_failures_per_ip: Failed attempts allowed per client IP within the window,
+            None to not track IPs. Only set it when the IP is the real client's: behind a
+            proxy every caller shares the proxy's address and would lock each other out.
+        :param window: The window duration in seconds.
+        :param maxsize: Upper bound of tracked usernames/IPs, oldest are evicted first.
+        """
+        self.window = window
+        self._limits = {
+            "username": max_failures_per_username,
+            "ip": max_failures_per_ip
+        }
+        self._failures = TTLCache(maxsize=maxsize, ttl=window)
+
+    def _recent(self, key: tuple, now: float) -> list:
+        return [ts for ts in self._failures.get(key, []) if ts > now - self.window]
+
+    def _keys(self, username: str, ip: str | None) -> list:
+        keys = [("username", username)]
+        if ip is not None and self._limits["ip"] is not None:
+            keys.append(("ip", ip))
+        return keys
+
+    def retry_after(self, username: str, ip: str | None) -> float:
+        """
+        Seconds until another attempt is allowed, 0 if the attempt can proceed.
+        """
+        now = time.time()
+        wait = 0.0
+
+        for kind, value in self._keys(username, ip):
+            recent = self._recent((kind, value), now)
+            if len(recent) >= self._limits[kind]:
+                wait = max(wait, recent[0] + self.window - now)
+
+        return wait
+
+    def record_failure(self, username: str, ip: str | None):
+        now = time.time()
+        for key in self._keys(username, ip):
+            self._failures[key] = self._recent(key, now) + [now]
+
+    def reset(self, username: str):
+        self._failures.pop(("username", username), None)
@@ -1,24 +1,34 @@
+"""
+Standalone Lark Base synchronizer. Without the API's log writer in the same
+process it has nothing to wake it, so it polls; set SYNC_EMBEDDED instead to
+run it inside the API, driven by the writer. Any number of copies can run,
+only the holder of the leader lease syncs.
+"""
 import asyncio
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
 from src.services.synchronize import LarkSynchronizer
 from src.services.analytics import LarkUsersAnalytics
-from datetime import date
-from src.core.dependencies import get_base_manager
+from src.core.dependencies import get_base_manager, sync_leader
+from src.core.database import AsyncSessionLocal
 from src.core.config import settings
 
 lark = get_base_manager()
-engine = create_engine(settings.DATABASE_URL, echo=False)
 
-SessionLocal = sessionmaker(
-    bind=engine
-)
-db = SessionLocal()
-analytics = LarkUsersAnalytics(db)
-synchronizer = LarkSynchronizer(
-    db=db,
-    analytics=analytics,
-    lark=lark
-)
-target_date = date.today(),
-asyncio.run(synchronizer.start_watching())
+
+async def run_synchronizer():
+    async with AsyncSessionLocal() as db:
+        analytics = LarkUsersAnalytics(db)
+        synchronizer = LarkSynchronizer(
+            db=db,
+            analytics=analytics,
+            lark=lark,
+            exact=settings.SYNC_EXACT_COUNTS,
+            catch_up_days=settings.SYNC_CATCH_UP_DAYS
+        )
+        await synchronizer.start_watching()
+
+
+async def main():
+    await sync_leader.run(run_synchronizer)
+
+
+asyncio.run(main())
\ No newline at end of file
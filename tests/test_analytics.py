@@ -0,0 +1,65 @@
+import asyncio
+from datetime import date
+from src.services.analytics import LarkUsersAnalytics
+
+
+def summary_row(union_id: str, total: int, **extra) -> dict:
+    return {
+        "union_id": union_id,
+        "record_id": f"rec_{union_id}",
+        "total_detected_count": total,
+        "positive_plate_count": 0,
+        "for_confirmation_count": 0,
+        "unique_plate_count": total,
+        **extra
+    }
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def mappings(self):
+        return self
+
+    def fetchall(self):
+        return self.rows
+
+
+class FakeSession:
+    """
+    Answers the stats query with `stats` and the exact one with `exact`,
+    counting the exact queries.
+    """
+    def __init__(self, stats, exact):
+        self.stats = stats
+        self.exact = exact
+        self.exact_queries = 0
+
+    async def execute(self, query):
+        if "has_stats" in query.selected_columns.keys():
+            return FakeResult(self.stats)
+        self.exact_queries += 1
+        return FakeResult(self.exact)
+
+
+def test_stats_rows_are_used_as_is():
+    db = FakeSession(stats=[summary_row("on_a", 3, has_stats=True)], exact=[])
+
+    summaries = asyncio.run(LarkUsersAnalytics(db).summary(["on_a"], date(2026, 1, 2)))
+
+    assert summaries == [summary_row("on_a", 3)]
+    assert db.exact_queries == 0
+
+
+def test_agents_without_stats_fall_back_to_exact_totals():
+    db = FakeSession(
+        stats=[summary_row("on_a", 3, has_stats=True), summary_row("on_b", 0, has_stats=False)],
+        exact=[summary_row("on_b", 7)]
+    )
+
+    summaries = asyncio.run(LarkUsersAnalytics(db).summary(["on_a", "on_b"], date(2026, 1, 2)))
+
+    # busiest first, and never the zeros of the missing stats row
+    assert summaries == [summary_row("on_b", 7), summary_row("on_a", 3)]
+    assert db.exact_queries == 1
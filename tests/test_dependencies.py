@@ -0,0 +1,28 @@
+import asyncio
+import jwt
+import pytest
+from fastapi import HTTPException
+from src.core.config import settings
+from src.core.dependencies import get_current_user
+from src.core.identity_cache import IdentityCache
+
+
+def token(payload: dict) -> str:
+    return jwt.encode(payload, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+
+
+@pytest.mark.parametrize("user_type", ["admin", None])
+def test_unknown_user_type_is_rejected(user_type):
+    credentials = token({"user_type": user_type, "user_id": "someone"})
+
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(get_current_user(db=None, token=credentials, cache=IdentityCache()))
+
+    assert raised.value.status_code == 401
+
+
+def test_invalid_token_is_rejected():
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(get_current_user(db=None, token="not-a-jwt", cache=IdentityCache()))
+
+    assert raised.value.status_code == 401
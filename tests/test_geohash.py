@@ -0,0 +1,51 @@
+import pytest
+from src.utils import geohash
+
+
+def test_encode_known_point():
+    # the classic reference point of the geohash format
+    assert geohash.encode(57.64911, 10.40744, precision=11) == "u4pruydqqvj"
+
+
+def test_encode_prefix_is_the_coarser_cell():
+    assert geohash.encode(14.5995, 120.9842, precision=5) == geohash.encode(14.5995, 120.9842)[:5]
+
+
+def test_cell_size():
+    height, width = geohash.cell_size(1)
+    assert (height, width) == (45.0, 45.0)
+
+
+def test_bbox_around_contains_the_circle():
+    min_lat, min_lon, max_lat, max_lon = geohash.bbox_around(14.5995, 120.9842, 1000)
+
+    assert geohash.distance_meters(14.5995, 120.9842, max_lat, 120.9842) == pytest.approx(1000, rel=1e-3)
+    assert geohash.distance_meters(14.5995, 120.9842, 14.5995, max_lon) >= 999
+    assert min_lat < 14.5995 < max_lat and min_lon < 120.9842 < max_lon
+
+
+def test_cover_contains_every_point_of_the_box():
+    bbox = (14.55, 120.95, 14.65, 121.05)
+    cells = geohash.cover(bbox, max_precision=7)
+
+    assert 0 < len(cells) <= 32
+    for lat in (14.55, 14.6, 14.65):
+        for lon in (120.95, 121.0, 121.05):
+            point = geohash.encode(lat, lon)
+            assert any(point.startswith(cell) for cell in cells)
+
+
+def test_cover_stops_at_max_precision():
+    cells = geohash.cover((14.6, 121.0, 14.6, 121.0), max_precision=5)
+
+    assert cells == [geohash.encode(14.6, 121.0, precision=5)]
+
+
+def test_cover_of_an_inverted_box_is_empty():
+    assert geohash.cover((14.65, 120.95, 14.55, 121.05)) == []
+
+
+def test_distance_meters():
+    # one degree along a meridian
+    assert geohash.distance_meters(14.0, 121.0, 15.0, 121.0) == pytest.approx(111195, rel=1e-4)
+    assert geohash.distance_meters(14.6, 121.0, 14.6, 121.0) == 0
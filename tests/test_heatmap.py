@@ -0,0 +1,48 @@
+import asyncio
+from datetime import datetime, timezone
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src.api.v4 import heatmap
+from src.core.dependencies import get_async_db, get_principal
+from src.db.heatmap import get_heatmap_cells
+
+
+class UnusedSession:
+    async def execute(self, *args, **kwargs):
+        raise AssertionError("no query expected")
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(heatmap.router)
+    app.dependency_overrides[get_principal] = lambda: None
+    app.dependency_overrides[get_async_db] = lambda: UnusedSession()
+    heatmap.heatmap_cache.clear()
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("bbox", [
+    {"min_latitude": 15, "min_longitude": 120, "max_latitude": 14, "max_longitude": 121},
+    {"min_latitude": 14, "min_longitude": 121, "max_latitude": 15, "max_longitude": 120},
+])
+def test_inverted_bounding_box_is_rejected(client, bbox):
+    response = client.get("/api/v4/heatmap", params=bbox)
+
+    assert response.status_code == 400
+
+
+def test_partial_bounding_box_is_rejected(client):
+    response = client.get("/api/v4/heatmap", params={"min_latitude": 14})
+
+    assert response.status_code == 400
+
+
+def test_bounding_box_covering_no_cell_returns_no_rows():
+    start = datetime(2026, 1, 2, tzinfo=timezone.utc)
+    end = datetime(2026, 1, 3, tzinfo=timezone.utc)
+
+    cells = asyncio.run(get_heatmap_cells(5, start, end, UnusedSession(), bbox=(15, 120, 14, 121)))
+
+    assert cells == []
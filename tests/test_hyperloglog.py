@@ -0,0 +1,56 @@
+import pytest
+from src.utils.hyperloglog import HyperLogLog
+
+
+def plates(start: int, stop: int):
+    return (f"PLATE{number}" for number in range(start, stop))
+
+
+def test_empty_sketch_counts_zero():
+    assert HyperLogLog().count() == 0
+
+
+def test_small_counts_are_near_exact():
+    sketch = HyperLogLog()
+    sketch.update(plates(0, 500))
+    sketch.update(plates(0, 500))
+
+    assert abs(sketch.count() - 500) <= 5
+
+
+def test_large_counts_stay_within_the_standard_error():
+    sketch = HyperLogLog()
+    sketch.update(plates(0, 50000))
+
+    assert abs(sketch.count() - 50000) / 50000 < 0.05
+
+
+def test_merge_counts_the_union():
+    monday, tuesday = HyperLogLog(), HyperLogLog()
+    monday.update(plates(0, 1000))
+    tuesday.update(plates(500, 1500))
+
+    merged = HyperLogLog.union([monday, tuesday])
+
+    assert abs(merged.count() - 1500) / 1500 < 0.05
+    assert merged == HyperLogLog().merge(tuesday).merge(monday)
+
+
+def test_bytes_round_trip():
+    sketch = HyperLogLog(precision=10)
+    sketch.update(plates(0, 100))
+
+    assert HyperLogLog.from_bytes(sketch.to_bytes()) == sketch
+
+
+def test_sketches_of_other_precisions_do_not_merge():
+    with pytest.raises(ValueError):
+        HyperLogLog(precision=10).merge(HyperLogLog(precision=12))
+
+
+def test_unknown_format_is_rejected():
+    payload = bytearray(HyperLogLog().to_bytes())
+    payload[0] = 99
+
+    with pytest.raises(ValueError):
+        HyperLogLog.from_bytes(bytes(payload))
@@ -0,0 +1,105 @@
+import httpx
+import pytest
+from src.lark.exceptions import LarkCircuitOpenError
+from src.lark.policy import CircuitBreaker, OutboundPolicy, lark_code, retry_after_seconds
+
+
+def response(status_code: int = 200, json=None, headers=None) -> httpx.Response:
+    return httpx.Response(status_code, json=json, headers=headers)
+
+
+def test_retry_after_reads_either_header():
+    assert retry_after_seconds(response(429, headers={"Retry-After": "3"})) == 3.0
+    assert retry_after_seconds(response(200, headers={"x-ogw-ratelimit-reset": "1.5"})) == 1.5
+    assert retry_after_seconds(response(429, headers={"Retry-After": "soon"})) is None
+    assert retry_after_seconds(response(429)) is None
+
+
+def test_lark_code():
+    assert lark_code(response(json={"code": 1254290})) == 1254290
+    assert lark_code(response(json=["not", "an", "object"])) is None
+    assert lark_code(httpx.Response(502, text="Bad Gateway")) is None
+
+
+def test_breaker_opens_after_the_threshold(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("src.lark.policy.time.monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.retry_in() == 30
+
+
+def test_breaker_lets_one_trial_through_when_half_open(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("src.lark.policy.time.monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+
+    now[0] += 30
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    # a failed trial reopens it, a successful one closes it
+    breaker.record_failure()
+    assert breaker.state == "open"
+    now[0] += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_lost_trial_is_replaced_after_the_timeout(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("src.lark.policy.time.monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+
+    now[0] += 30
+    assert breaker.allow()
+    now[0] += 30
+    assert breaker.allow()
+
+
+def test_breakers_are_per_endpoint():
+    policy = OutboundPolicy(failure_threshold=1)
+    policy.breaker("base.batch_write").record_failure()
+
+    with pytest.raises(LarkCircuitOpenError) as raised:
+        policy.check("base.batch_write")
+    assert raised.value.retryable
+    policy.check("messenger.send")
+
+
+def test_backoff_is_capped_and_honours_retry_after():
+    policy = OutboundPolicy(backoff_base=1, backoff_max=4)
+
+    assert all(0 <= policy.backoff(attempt) <= 4 for attempt in range(1, 10))
+    assert policy.backoff(1, retry_after=7) == 7
+
+
+@pytest.mark.parametrize("status_code, code, retryable", [
+    (429, None, True),
+    (503, None, True),
+    (200, 1254291, True),
+    (200, 99991400, True),
+    (400, None, False),
+    (200, 1254045, False),
+])
+def test_retryable_responses(status_code, code, retryable):
+    policy = OutboundPolicy()
+
+    assert policy.is_retryable_response(response(status_code), code) is retryable
+    assert policy.as_exception(response(status_code), code).retryable is retryable
+
+
+def test_unlisted_endpoints_use_the_default_timeout():
+    policy = OutboundPolicy()
+
+    assert policy.timeout("base.batch_write") == 30.0
+    assert policy.timeout("messenger.send") is None
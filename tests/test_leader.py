@@ -0,0 +1,80 @@
+import asyncio
+import pytest
+from src.core.leader import LeaderElection
+
+
+class FakeConnection:
+    def __init__(self, hang_after_lock: bool):
+        self.hang_after_lock = hang_after_lock
+        self.closed = False
+        self.invalidated = False
+        self.unlocked = False
+
+    async def execution_options(self, **options):
+        return self
+
+    async def scalar(self, statement):
+        if "pg_try_advisory_lock" in str(statement):
+            return True
+        if self.hang_after_lock:
+            await asyncio.Event().wait()
+        if "pg_advisory_unlock" in str(statement):
+            self.unlocked = True
+            return True
+        return 1
+
+    async def invalidate(self):
+        self.invalidated = True
+
+
+class FakeEngine:
+    def __init__(self, connection: FakeConnection):
+        self.connection = connection
+
+    def connect(self):
+        engine = self
+
+        class Context:
+            async def __aenter__(self):
+                return engine.connection
+
+            async def __aexit__(self, *exc_info):
+                return False
+        return Context()
+
+
+def election(connection: FakeConnection) -> LeaderElection:
+    return LeaderElection(FakeEngine(connection), "test", lock_key=1, check_interval=0.05)
+
+
+def test_hung_ping_cancels_the_work_and_drops_the_connection():
+    connection = FakeConnection(hang_after_lock=True)
+    leader = election(connection)
+    work_cancelled = asyncio.Event()
+
+    async def work():
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            work_cancelled.set()
+            raise
+
+    async def main():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(leader._lead(work), timeout=1)
+        assert work_cancelled.is_set()
+
+    asyncio.run(main())
+    assert connection.invalidated
+
+
+def test_finished_work_releases_the_lock():
+    connection = FakeConnection(hang_after_lock=False)
+    leader = election(connection)
+
+    async def work():
+        await asyncio.sleep(0.1)
+
+    asyncio.run(leader._lead(work))
+    assert connection.unlocked
+    assert not connection.invalidated
@@ -0,0 +1,69 @@
+import uuid
+from datetime import date, datetime, timezone
+from src.core.log_spool import LogSpool
+
+
+def row(**overrides) -> dict:
+    return {
+        "id": uuid.uuid4(),
+        "log_date": date(2026, 1, 2),
+        "timestamp": datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+        "scanned_text": "ABC1234",
+        **overrides
+    }
+
+
+def test_rows_round_trip_through_a_segment(tmp_path):
+    spool = LogSpool(str(tmp_path))
+    rows = [row(), row(scanned_text="XYZ9876")]
+
+    spool.append(rows)
+    assert spool.closed_segments() == []
+
+    spool.rotate()
+    [segment] = spool.closed_segments()
+    assert spool.read_segment(segment) == rows
+
+
+def test_segments_rotate_past_the_size_limit(tmp_path):
+    spool = LogSpool(str(tmp_path), segment_max_bytes=1)
+
+    spool.append([row()])
+    spool.append([row()])
+
+    assert len(spool.closed_segments()) == 2
+
+
+def test_torn_last_line_is_skipped(tmp_path):
+    spool = LogSpool(str(tmp_path))
+    first = row()
+    spool.append([first])
+    spool.rotate()
+    [segment] = spool.closed_segments()
+    with open(segment, "a", encoding="utf-8") as handle:
+        handle.write('{"id": "')
+
+    assert spool.read_segment(segment) == [first]
+
+
+def test_active_segment_of_another_worker_is_not_replayed(tmp_path):
+    writer = LogSpool(str(tmp_path))
+    replayer = LogSpool(str(tmp_path))
+
+    writer.append([row()])
+    assert replayer.closed_segments() == []
+
+    writer.rotate()
+    assert len(replayer.closed_segments()) == 1
+
+
+def test_removing_a_removed_segment_is_fine(tmp_path):
+    spool = LogSpool(str(tmp_path))
+    spool.append([row()])
+    spool.rotate()
+    [segment] = spool.closed_segments()
+
+    spool.remove_segment(segment)
+    spool.remove_segment(segment)
+
+    assert spool.closed_segments() == []
@@ -0,0 +1,65 @@
+import asyncio
+import os
+import uuid
+from datetime import date
+from sqlalchemy.exc import OperationalError
+from src.core.log_spool import LogSpool
+from src.core.log_writer import LogWriter
+
+
+def spooled_writer(tmp_path, **kwargs) -> LogWriter:
+    spool = LogSpool(str(tmp_path))
+    spool.append([{"id": uuid.uuid4(), "log_date": date(2026, 1, 2)}])
+    spool.rotate()
+    return LogWriter(session_factory=None, spool=spool, **kwargs)
+
+
+def test_segment_removed_by_another_worker_is_skipped(tmp_path, monkeypatch):
+    writer = spooled_writer(tmp_path)
+    written = []
+
+    async def write_batch(batch):
+        written.extend(batch)
+        return batch, []
+    monkeypatch.setattr(writer, "write_batch", write_batch)
+
+    read_segment = writer._spool.read_segment
+    def replayed_meanwhile(path):
+        os.remove(path)
+        return read_segment(path)
+    monkeypatch.setattr(writer._spool, "read_segment", replayed_meanwhile)
+
+    assert asyncio.run(writer.replay_spool()) == 0
+    assert written == []
+    assert writer.db_available
+
+
+def run_replay_loop(writer: LogWriter):
+    async def main():
+        task = asyncio.create_task(writer._replay_loop())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    asyncio.run(main())
+
+
+def test_spool_errors_leave_the_database_available(tmp_path, monkeypatch):
+    writer = spooled_writer(tmp_path, replay_interval=0.01)
+
+    async def replay_spool():
+        raise PermissionError("spool directory")
+    monkeypatch.setattr(writer, "replay_spool", replay_spool)
+
+    run_replay_loop(writer)
+    assert writer.db_available
+
+
+def test_database_errors_mark_the_database_unavailable(tmp_path, monkeypatch):
+    writer = spooled_writer(tmp_path, replay_interval=0.01)
+
+    async def replay_spool():
+        raise OperationalError("INSERT", {}, ConnectionRefusedError())
+    monkeypatch.setattr(writer, "replay_spool", replay_spool)
+
+    run_replay_loop(writer)
+    assert not writer.db_available
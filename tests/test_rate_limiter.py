@@ -0,0 +1,54 @@
+from src.utils.rate_limiter import LoginThrottle
+
+
+def test_username_is_locked_after_max_failures():
+    throttle = LoginThrottle(max_failures_per_username=3, window=60)
+
+    for _ in range(2):
+        throttle.record_failure("alice", "10.0.0.1")
+    assert throttle.retry_after("alice", "10.0.0.1") == 0
+
+    throttle.record_failure("alice", "10.0.0.1")
+    assert 0 < throttle.retry_after("alice", "10.0.0.1") <= 60
+    assert throttle.retry_after("bob", "10.0.0.1") == 0
+
+
+def test_reset_clears_the_username():
+    throttle = LoginThrottle(max_failures_per_username=1, window=60)
+    throttle.record_failure("alice", None)
+
+    throttle.reset("alice")
+
+    assert throttle.retry_after("alice", None) == 0
+
+
+def test_ip_is_not_tracked_by_default():
+    # behind a proxy every caller shares one address
+    throttle = LoginThrottle(max_failures_per_username=2, window=60)
+
+    for username in ("alice", "bob", "carol", "dave"):
+        throttle.record_failure(username, "10.0.0.1")
+
+    assert throttle.retry_after("erin", "10.0.0.1") == 0
+
+
+def test_ip_is_locked_when_enabled():
+    throttle = LoginThrottle(max_failures_per_username=5, max_failures_per_ip=2, window=60)
+
+    throttle.record_failure("alice", "10.0.0.1")
+    throttle.record_failure("bob", "10.0.0.1")
+
+    assert throttle.retry_after("carol", "10.0.0.1") > 0
+    assert throttle.retry_after("carol", "10.0.0.2") == 0
+
+
+def test_failures_expire_with_the_window(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("src.utils.rate_limiter.time.time", lambda: now[0])
+    throttle = LoginThrottle(max_failures_per_username=1, window=60)
+
+    throttle.record_failure("alice", None)
+    assert throttle.retry_after("alice", None) == 60
+
+    now[0] += 61
+    assert throttle.retry_after("alice", None) == 0
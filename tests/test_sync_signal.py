@@ -0,0 +1,39 @@
+import asyncio
+from datetime import date
+from src.core.sync_signal import SyncSignal
+
+TODAY = date(2026, 1, 2)
+
+
+def test_publishes_are_dropped_without_a_subscriber():
+    signal = SyncSignal()
+
+    signal.publish([("on_a", TODAY)])
+
+    assert signal.pending == 0
+
+
+def test_wait_returns_everything_published_while_subscribed():
+    signal = SyncSignal()
+    signal.subscribe()
+
+    async def main():
+        waiting = asyncio.create_task(signal.wait(debounce=0.01))
+        await asyncio.sleep(0)
+        signal.publish([("on_a", TODAY)])
+        signal.publish([("on_b", TODAY), ("on_a", TODAY)])
+        return await waiting
+
+    assert asyncio.run(main()) == {("on_a", TODAY), ("on_b", TODAY)}
+    assert signal.pending == 0
+
+
+def test_unsubscribe_clears_pending_refs():
+    signal = SyncSignal()
+    signal.subscribe()
+    signal.publish([("on_a", TODAY)])
+
+    signal.unsubscribe()
+    signal.publish([("on_b", TODAY)])
+
+    assert signal.pending == 0
@@ -0,0 +1,91 @@
+import asyncio
+from datetime import date
+from types import SimpleNamespace
+import pytest
+from src.lark.base_manager import BatchChunkFailure, BatchWriteResult
+from src.lark.exceptions import LarkBaseHTTPException
+from src.services.synchronize import LarkSynchronizer
+from src.utils.date_utils import get_date_timestamp
+
+TARGET_DATE = date(2026, 1, 2)
+
+
+class FakeSession:
+    def __init__(self):
+        self.updates = []
+        self.commits = 0
+
+    async def execute(self, statement, params=None):
+        self.updates.append(params)
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        pass
+
+
+class FakeBase:
+    def __init__(self, result: BatchWriteResult):
+        self.result = result
+
+    async def create_records(self, app_token, table_id, data):
+        return self.result
+
+
+def created(union_id: str, record_id: str) -> dict:
+    return {
+        "record_id": record_id,
+        "fields": {
+            "Field Agent": [{"id": union_id}],
+            "Log Date": get_date_timestamp(TARGET_DATE)
+        }
+    }
+
+
+def synchronizer(result: BatchWriteResult, refs) -> LarkSynchronizer:
+    sync = LarkSynchronizer(
+        db=FakeSession(),
+        lark=SimpleNamespace(base=FakeBase(result)),
+        analytics=None
+    )
+    sync.buffered_passes = []
+
+    async def get_refs_without_remote_ref(target_date, union_ids):
+        return refs
+
+    async def sync_buffered(target_date, union_ids):
+        sync.buffered_passes.append(union_ids)
+        return 1
+
+    sync.get_refs_without_remote_ref = get_refs_without_remote_ref
+    sync._sync_buffered = sync_buffered
+    return sync
+
+
+def test_failed_create_chunks_fail_the_pass_after_the_rest_synced():
+    refs = [SimpleNamespace(union_id=union_id, log_date=TARGET_DATE) for union_id in ("on_a", "on_b")]
+    result = BatchWriteResult(
+        chunks=2,
+        chunk_sizes=[1, 1],
+        records=[created("on_a", "rec_a")],
+        failures=[BatchChunkFailure(index=1, records=[{"fields": {}}], code=1254290, msg="too many requests")]
+    )
+    sync = synchronizer(result, refs)
+
+    with pytest.raises(LarkBaseHTTPException) as raised:
+        asyncio.run(sync.sync_once(TARGET_DATE, ["on_a", "on_b"]))
+
+    assert raised.value.code == 1254290
+    # the created ref keeps its record id and is still updated this pass
+    assert sync.db.updates == [[{"union_id": "on_a", "lark_record_id": "rec_a", "log_date": TARGET_DATE}]]
+    assert sync.buffered_passes == [["on_a", "on_b"]]
+
+
+def test_successful_creates_do_not_fail_the_pass():
+    refs = [SimpleNamespace(union_id="on_a", log_date=TARGET_DATE)]
+    result = BatchWriteResult(chunks=1, chunk_sizes=[1], records=[created("on_a", "rec_a")])
+    sync = synchronizer(result, refs)
+
+    assert asyncio.run(sync.sync_once(TARGET_DATE, ["on_a"])) == 1
+    assert sync.db.commits == 1